@@ -2,7 +2,7 @@ import argparse
 import numpy
 import os
 
-from ssapy.strategies.condLocal import condLocal
+from ssapy.strategies.batchLocal import condLocalBatch
 
 from ssapy import listBundles, msListRevenue
 from ssapy.pricePrediction.jointGMM import expectedSurplus_
@@ -69,24 +69,23 @@ def main():
     bids = numpy.zeros(initBids.shape)
     es   = numpy.zeros(initBids.shape[0])
     
-    for itr, initBid, v, l in zip(xrange(vmat.shape[0]),initBids,vmat,lmat):
+    revenues = numpy.atleast_2d([msListRevenue(bundles,v,l) for v,l in zip(vmat,lmat)])
+    
+    # all valuations are solved together against the same samples
+    bids[:,:] = \
+        condLocalBatch(bundles,revenues,
+                       initBids,jointSamples,
+                       maxItr = args.maxitr,
+                       tol = args.tol,
+                       verbose = args.verbose,
+                       ret = 'bids',
+                       eps = args.eps)
+    
+    for itr, revenue in enumerate(revenues):
         print 'iteration {0}'.format(itr)
-        revenue = msListRevenue(bundles,v,l)
-        
-        bids[itr,:] = \
-            condLocal(bundles,revenue,
-                      initBid,jointSamples,
-                      maxItr = args.maxitr,
-                      tol = args.tol,
-                      verbose = args.verbose,
-                      ret = 'bids',
-                      eps = args.eps)
-        
-        brd = {}
-        for b,r in zip(bundles,revenue):
-            brd[tuple(b)] = r
         
-        es[itr] = expectedSurplus_(brd, bids[itr,:], evalSamples)
+        # revenue is listed in bundle code order
+        es[itr] = expectedSurplus_(revenue, bids[itr,:], evalSamples)
         
     numpy.savetxt(os.path.join(args.odir,'condLocalBids.txt'), bids)
     numpy.savetxt(os.path.join(args.odir,'condLocalExpectedSurplus.txt'),es)
@@ -2,7 +2,7 @@ import argparse
 import numpy
 import os
 
-from ssapy.strategies.jointLocal import jointLocal
+from ssapy.strategies.batchLocal import jointLocalBatch
 from ssapy import listBundles, msListRevenue
 from ssapy.pricePrediction.jointGMM import expectedSurplus_
 
@@ -69,24 +69,23 @@ def main():
     bids = numpy.zeros(initBids.shape)
     es   = numpy.zeros(initBids.shape[0])
     
-    for itr, initBid, v, l in zip(xrange(vmat.shape[0]),initBids,vmat,lmat):
+    revenues = numpy.atleast_2d([msListRevenue(bundles,v,l) for v,l in zip(vmat,lmat)])
+    
+    # all valuations are solved together against the same samples
+    bids[:,:], converged, nItr, d = \
+        jointLocalBatch(bundles,revenues,initBids,jointSamples,
+                        args.maxitr,args.tol,args.verbose,'all')
+    
+    for itr, revenue in enumerate(revenues):
         print 'Iteration = {0}'.format(itr)
-        revenue = msListRevenue(bundles,v,l)
-        
-        bids[itr,:], converged, nItr, d = \
-            jointLocal(bundles,revenue,initBid,jointSamples,
-                       args.maxitr,args.tol,args.verbose,'all')
-        
-        brd = {}
-        for b,r in zip(bundles,revenue):
-            brd[tuple(b)] = r
         
-        es[itr] = expectedSurplus_(brd, bids[itr,:], evalSamples)
+        # revenue is listed in bundle code order
+        es[itr] = expectedSurplus_(revenue, bids[itr,:], evalSamples)
         
         print '\t bid = {0}'.format(bids[itr,:])
-        print '\t converged = {0}'.format(converged)
-        print '\t Num. Iterations = {0}'.format(nItr)
-        print '\t d = {0}'.format(d)
+        print '\t converged = {0}'.format(converged[itr])
+        print '\t Num. Iterations = {0}'.format(nItr[itr])
+        print '\t d = {0}'.format(d[itr])
         print '\t Expected Surplus = {0}'.format(es[itr])
         
         
@@ -9,6 +9,7 @@ from .pricePrediction.jointGMM import jointGMM as gmm
 
 from .agents.marketSchedule import listRevenue as msListRevenue
 from .agents.marketSchedule import dictRevenue as msDictRevenue
+from .agents.marketSchedule import scheduleRevenue as msScheduleRevenue
 from .agents.marketSchedule import \
     randomValueVector as msRandomValueVector
     
@@ -5,7 +5,8 @@ from .marketSchedule import straightMU as msStraightMU
 from .marketSchedule import straightMV as msStraightMV
 from .marketSchedule import targetPrice as msTargetPrice
 from .marketSchedule.condMVLocal import condMVLocal as msCondMVLocal
-from .marketSchedule.jointLocal import jointLocal
+from .marketSchedule.jointLocal import jointLocal, jointLocalA
+from .marketSchedule.multiStartLocal import multiStartLocal as msMultiStartLocal
 
 
 
@@ -33,6 +34,10 @@ def agentFactory(**kwargs):
         return msCondMVLocal(**kwargs)
     elif agentType == "jointLocal":
         return jointLocal(**kwargs)
+    elif agentType == "jointLocalA":
+        return jointLocalA(**kwargs)
+    elif agentType == "msMultiStartLocal":
+        return msMultiStartLocal(**kwargs)
     else:
         raise ValueError("Unknown Agent Type {0}".format(agentType))
     
@@ -16,9 +16,11 @@ Yoon et. al. 2007
 
 import numpy
 import itertools
+import heapq
 
 from ssapy.agents import agentBase
 from ssapy.util import listBundles, cost
+from ssapy.util.revenue import revenueBase
 
 
 def randomValueVector(vmin = 1, vmax = 50, m = 5, l = None):
@@ -88,3 +90,173 @@ def dictRevenue(v, l):
         d[tuple(b)] = r
             
     return d
+
+def scheduleAcq(v, l, priceVector):
+    """
+    Optimal acquisition for the market scheduling revenue function
+    without enumerating bundles.
+    
+    A bundle whose l^th slot (in time order) is slot t has revenue v[t],
+    so the best such bundle is slot t plus the l-1 cheapest slots before t.
+    Scanning t = 0,...,m-1 while keeping the l-1 cheapest prices of the prefix
+    in a heap finds the optimal bundle in O(m log m).
+    
+    The optimal surplus is identical to acq(listBundles(m), listRevenue(...), priceVector).
+    Where several bundles attain it, acq picks one at random while this returns the
+    empty bundle if possible, otherwise the earliest completion slot t, with ties
+    between equal prices going to the earlier slot.
+    
+    Parameters
+    ----------
+    v: array_like, shape (n_goods)
+        The value vector of the market scheduling game.
+        
+    l: int
+        The number of slots the agent needs to obtain value.
+        
+    priceVector: array_like, shape (n_goods)
+        A point price prediction (may contain inf for unobtainable goods).
+        
+    Returns
+    -------
+    optBundle: ndarray, shape (n_goods), dtype = bool
+    
+    optSurplus: ndarray, shape (1)
+        Matches the return of ssapy.util.acq(...).
+    """
+    v = numpy.atleast_1d(v).astype(numpy.float64)
+    p = numpy.atleast_1d(priceVector).astype(numpy.float64)
+    m = p.shape[0]
+    
+    if l < 1:
+        raise ValueError("scheduleAcq(...) - l = {0} must be >= 1".format(l))
+    
+    k = l - 1
+    
+    # max heap (negated keys) of the k cheapest prices before slot t,
+    # infinite prices are counted separately so the sum never becomes inf - inf
+    heap      = []
+    finiteSum = 0.0
+    nInf      = 0
+    
+    bestSurplus = 0.0
+    bestT       = None
+    
+    for t in range(m):
+        if len(heap) == k and nInf == 0:
+            s = v[t] - p[t] - finiteSum
+            if s > bestSurplus:
+                bestSurplus = s
+                bestT = t
+                
+        if k == 0:
+            continue
+        
+        if len(heap) < k:
+            heapq.heappush(heap, (-p[t], -t))
+        elif p[t] < -heap[0][0]:
+            dropped = -heapq.heapreplace(heap, (-p[t], -t))[0]
+            if dropped == numpy.inf:
+                nInf -= 1
+            else:
+                finiteSum -= dropped
+        else:
+            continue
+        
+        if p[t] == numpy.inf:
+            nInf += 1
+        else:
+            finiteSum += p[t]
+    
+    optBundle = numpy.zeros(m, dtype = bool)
+    
+    if bestT is None:
+        return optBundle, numpy.atleast_1d(0.0)
+    
+    optBundle[bestT] = True
+    optBundle[numpy.argsort(p[:bestT], kind = 'mergesort')[:k]] = True
+    
+    # same arithmetic as ssapy.util.cost/surplus so results match acq(...) exactly,
+    # the optimal bundle never contains an unobtainable (inf) good
+    priceInfZero = p.copy()
+    priceInfZero[priceInfZero == numpy.inf] = 0.0
+    
+    return optBundle, numpy.atleast_1d(v[bestT] - numpy.dot(optBundle, priceInfZero))
+
+def scheduleMarginalUtility(v, l, priceVector, goodIdx):
+    """
+    Marginal utility of goodIdx for the market scheduling revenue function,
+    the surplus of the optimal bundle when goodIdx is free less the surplus
+    when goodIdx is unobtainable. Equal to ssapy.util.marginalUtility(...) 
+    with enumerated bundles and listRevenue(...).
+    """
+    priceVector = numpy.atleast_1d(priceVector).astype(numpy.float64)
+    
+    tempPriceInf = priceVector.copy()
+    tempPriceInf[goodIdx] = numpy.inf
+    
+    tempPriceZero = priceVector.copy()
+    tempPriceZero[goodIdx] = 0.0
+    
+    margUtil = scheduleAcq(v, l, tempPriceZero)[1] - scheduleAcq(v, l, tempPriceInf)[1]
+    
+    if margUtil < 0:
+        raise ValueError("scheduleMarginalUtility(...) - Negative Marginal Utility (shouldn't happen).")
+    
+    return margUtil
+
+class scheduleRevenue(revenueBase):
+    """
+    Implicit market scheduling revenue function defined by (v, l),
+    implementing the revenue function protocol of ssapy.util.revenue
+    without enumerating the 2^m bundles.
+    
+    Can be passed as the revenue argument of ssapy.util.acq(...),
+    ssapy.util.marginalUtility(...), the point price strategies
+    (straightMV, targetMV, targetMVS, targetPrice, ...) and the local search
+    strategies in place of a dense revenue vector; the bundles argument is then
+    ignored (may be None). It can also replace a bundleRevenueDict.
+    """
+    def __init__(self, v, l):
+        self.v = numpy.atleast_1d(v).astype(numpy.float64)
+        self.l = l
+        self.m = self.v.shape[0]
+        
+    def evaluateBundles(self, won):
+        """
+        Same values as listRevenue(won, v, l) for a bool array shape (n,m).
+        """
+        cs = numpy.cumsum(won, 1)
+        
+        t = numpy.argmax(cs >= self.l, 1)
+        
+        return numpy.where(cs[:,-1] >= self.l, self.v[t], 0.0)
+    
+    def expectedRevenue(self, pwin):
+        """
+        Expected revenue when slot t is won independently with probability pwin[t].
+        
+        The agent collects v[t] when it has won exactly l-1 slots before t and wins t;
+        the distribution of the number of slots won so far (up to l-1) is
+        updated slot by slot, O(m*l).
+        """
+        pwin = numpy.atleast_1d(pwin).astype(numpy.float64)
+        
+        nWon = numpy.zeros(self.l)
+        nWon[0] = 1.0
+        
+        er = 0.0
+        for t in range(self.m):
+            er += self.v[t]*nWon[-1]*pwin[t]
+            
+            prev = nWon.copy()
+            nWon *= (1.0 - pwin[t])
+            nWon[1:] += prev[:-1]*pwin[t]
+            
+        return er
+        
+    def acq(self, priceVector):
+        return scheduleAcq(self.v, self.l, priceVector)
+    
+    def marginalUtility(self, priceVector, goodIdx):
+        return scheduleMarginalUtility(self.v, self.l, priceVector, goodIdx)
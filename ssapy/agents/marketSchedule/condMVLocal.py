@@ -12,9 +12,7 @@ class condMVLocal(msAgent):
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction', self.pricePrediction)
         
-        bundles = kwargs.get('bundles',self.listBundles())
-        
-        revenue = kwargs.get('revenue',self.listRevenue())
+        bundles, revenue = self.bidRevenue(**kwargs)
         
         initss = kwargs.get('initss','straightMU8')
         
@@ -1,8 +1,7 @@
 import numpy
-from ssapy.agents.marketSchedule import listRevenue
 from ssapy.pricePrediction import jointGMM
 from ssapy.strategies.jointLocal import jointLocal as jointLocalStrategy
-from ssapy.util import listBundles
+from ssapy.strategies.jointLocal import jointLocalA as jointLocalAStrategy
 from ssapy.strategies.strategyFactory import strategyFactory
 
 from .msAgent import msAgent
@@ -26,9 +25,7 @@ class jointLocal(msAgent):
     def bid(self,**kwargs):
         pricePrediction = kwargs.get('pricePrediction', self.pricePrediction)
         
-        bundles         = kwargs.get('bundles', self.listBundles())
-        
-        revenue         = kwargs.get('revenue', listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         
         verbose         = kwargs.get('verbose', False)
         
@@ -48,4 +45,40 @@ class jointLocal(msAgent):
         
         samples         = pricePrediction.sample(n_samples = nsamples)
         
-        return jointLocalStrategy(bundles, revenue, initBids, samples, maxItr, tol, verbose, ret)          
\ No newline at end of file
+        return jointLocalStrategy(bundles, revenue, initBids, samples, maxItr, tol, verbose, ret)
+
+class jointLocalA(jointLocal):
+    """
+    jointLocal bidding with bundle win probabilities integrated from the 
+    jointGMM pricePrediction instead of nsamples samples.
+    """
+    def __init__(self, **kwargs):
+        super(jointLocalA, self).__init__(**kwargs)
+        
+        self.method       = kwargs.get('method', 'qmc')
+        
+        self.nPoints      = kwargs.get('nPoints', 1024)
+        
+    def bid(self,**kwargs):
+        pricePrediction = kwargs.get('pricePrediction', self.pricePrediction)
+        
+        bundles, revenue = self.bidRevenue(**kwargs)
+        
+        initStrategy    = kwargs.get('initStrategy', self.initStrategy)
+        
+        maxItr          = kwargs.get('maxItr', self.maxItr)
+        
+        tol             = kwargs.get('tol', self.tol)
+        
+        verbose         = kwargs.get('verbose', self.verbose)
+        
+        ret             = kwargs.get('ret', self.ret)
+        
+        method          = kwargs.get('method', self.method)
+        
+        nPoints         = kwargs.get('nPoints', self.nPoints)
+        
+        initBids        = kwargs.get('initBids',initStrategy(bundles, revenue, pricePrediction))
+        
+        return jointLocalAStrategy(bundles, revenue, initBids, pricePrediction, maxItr, tol, verbose, ret,
+                                   method = method, nPoints = nPoints)
@@ -8,6 +8,7 @@ from ...util import cost as cost_
 from ..marketSchedule import listRevenue as listRevenue_
 from ..marketSchedule import randomValueVector as randomValueVector_
 from ..marketSchedule import dictRevenue as dictRevenue_
+from ..marketSchedule import scheduleRevenue as scheduleRevenue_
 
 class msAgent(agentBase):
     """
@@ -132,6 +133,31 @@ class msAgent(agentBase):
         
     def dictRevenue(self):
         return dictRevenue_(self.v, self.l)
+    
+    def scheduleRevenue(self):
+        return scheduleRevenue_(self.v, self.l)
+    
+    def bidRevenue(self, **kwargs):
+        """
+        Return (bundles, revenue) for point price strategies.
+        
+        Explicit bundles/revenue kwargs are used as given. Without them
+        the implicit scheduleRevenue(v, l) is returned with bundles = None
+        so the 2^m bundles are never enumerated.
+        """
+        bundles = kwargs.get('bundles')
+        revenue = kwargs.get('revenue')
+        
+        if revenue is None and bundles is None:
+            return None, self.scheduleRevenue()
+        
+        if bundles is None:
+            bundles = self.listBundles()
+            
+        if revenue is None:
+            revenue = listRevenue_(bundles, self.v, self.l)
+            
+        return bundles, revenue
         
     def listBundles(self):
         return listBundles_(self.m)
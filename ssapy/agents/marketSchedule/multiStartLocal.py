@@ -0,0 +1,54 @@
+from ssapy.strategies.multiStart import multiStartLocal as multiStartLocalStrategy
+
+from .msAgent import msAgent
+
+class multiStartLocal(msAgent):
+    """
+    Market scheduling agent bidding the best of several local search runs
+    (see ssapy.strategies.multiStart.multiStartLocal).
+    """
+    def __init__(self, **kwargs):
+        super(multiStartLocal, self).__init__(**kwargs)
+        
+        self.localStrategy = kwargs.get('localStrategy','jointLocal')
+        
+        self.seeds         = kwargs.get('seeds',('straightMU8','targetPrice8'))
+        
+        self.nPerturb      = kwargs.get('nPerturb',2)
+        
+        self.nProcs        = kwargs.get('nProcs',1)
+        
+        self.maxItr        = kwargs.get('maxItr',100)
+        
+        self.tol           = kwargs.get('tol',1e-5)
+        
+        self.nsamples      = kwargs.get('nsamples',1000)
+        
+        self.nEvalSamples  = kwargs.get('nEvalSamples',1000)
+        
+    def bid(self, **kwargs):
+        pricePrediction = kwargs.get('pricePrediction', self.pricePrediction)
+        
+        bundles, revenue = self.bidRevenue(**kwargs)
+        
+        samples     = kwargs.get('samples')
+        if samples is None:
+            samples = pricePrediction.sample(n_samples = kwargs.get('nsamples', self.nsamples))
+        
+        evalSamples = kwargs.get('evalSamples')
+        if evalSamples is None:
+            evalSamples = pricePrediction.sample(n_samples = kwargs.get('nEvalSamples', self.nEvalSamples))
+        
+        return multiStartLocalStrategy(bundles, revenue, pricePrediction, samples, evalSamples,
+                                       localStrategy = kwargs.get('localStrategy', self.localStrategy),
+                                       seeds         = kwargs.get('seeds', self.seeds),
+                                       nPerturb      = kwargs.get('nPerturb', self.nPerturb),
+                                       nProcs        = kwargs.get('nProcs', self.nProcs),
+                                       maxItr        = kwargs.get('maxItr', self.maxItr),
+                                       tol           = kwargs.get('tol', self.tol),
+                                       verbose       = kwargs.get('verbose', False),
+                                       ret           = kwargs.get('ret', 'bids'))
+    
+    @staticmethod
+    def type():
+        return "msMultiStartLocal"
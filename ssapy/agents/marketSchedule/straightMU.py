@@ -1,4 +1,3 @@
-from ..marketSchedule import listRevenue
 from .msAgent import msAgent
 from ...strategies import straightMU as strategies
 
@@ -9,9 +8,7 @@ class straightMUa(msAgent):
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
         
-        bundles = kwargs.get('bundles', self.listBundles())
-        
-        revenue = kwargs.get('revenue', listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         
         verbose = kwargs.get('verbose',False)
         
@@ -25,9 +22,7 @@ class straightMU8(msAgent):
         
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
         
-        bundles = kwargs.get('bundles', self.listBundles())
-        
-        revenue = kwargs.get('revenue', listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         
         verbose = kwargs.get('verbose',False)
         
@@ -41,9 +36,7 @@ class straightMU64(msAgent):
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
         
-        bundles = kwargs.get('bundles', self.listBundles())
-        
-        revenue = kwargs.get('revenue', listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         
         verbose = kwargs.get('verbose',False)
         
@@ -56,9 +49,7 @@ class straightMU256(msAgent):
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
         
-        bundles = kwargs.get('bundles', self.listBundles())
-        
-        revenue = kwargs.get('revenue', listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         
         verbose = kwargs.get('verbose', False)
         
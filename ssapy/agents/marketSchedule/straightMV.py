@@ -1,6 +1,4 @@
 import ssapy.strategies.straightMV as straightMV_
-from ssapy.util import listBundles
-from ssapy.agents.marketSchedule import listRevenue
 
 #from ssapy.agents.marketSchedule.msAgent import msAgent
 from .msAgent import msAgent
@@ -12,10 +10,7 @@ class straightMV(msAgent):
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
         
-        bundles = kwargs.get('bundles', self.listBundles())
-        
-        revenue = kwargs.get('revenue',
-                               listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
                               
         return straightMV_(bundles = bundles, 
                         revenue = revenue, 
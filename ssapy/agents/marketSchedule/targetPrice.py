@@ -1,7 +1,5 @@
-from . import listRevenue
 from .msAgent import msAgent
 from ...strategies import targetPrice
-from ...util import listBundles
 
 class targetPrice8(msAgent):
     def __init__(self, **kwargs):
@@ -9,8 +7,7 @@ class targetPrice8(msAgent):
     
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
-        bundles = kwargs.get('bundles',listBundles(self.m))
-        revenue = kwargs.get('revenue',listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         verbose = kwargs.get('verbose',False)
         
         return targetPrice.targetPrice8(bundles, revenue, pricePrediction, verbose)
@@ -21,8 +18,7 @@ class targetPrice64(msAgent):
     
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
-        bundles = kwargs.get('bundles',listBundles(self.m))
-        revenue = kwargs.get('revenue',listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         verbose = kwargs.get('verbose',False)
         
         return targetPrice.targetPrice64(bundles, revenue, pricePrediction, verbose)
@@ -33,8 +29,7 @@ class targetPrice256(msAgent):
     
     def bid(self, **kwargs):
         pricePrediction = kwargs.get('pricePrediction',self.pricePrediction)
-        bundles = kwargs.get('bundles',listBundles(self.m))
-        revenue = kwargs.get('revenue',listRevenue(bundles, self.v, self.l))
+        bundles, revenue = self.bidRevenue(**kwargs)
         verbose = kwargs.get('verbose',False)
         
         return targetPrice.targetPrice256(bundles, revenue, pricePrediction, verbose)
\ No newline at end of file
@@ -0,0 +1,93 @@
+import unittest
+import numpy
+
+from ssapy.agents.marketSchedule import listRevenue, randomValueVector,\
+    scheduleAcq, scheduleMarginalUtility, scheduleRevenue
+from ssapy.strategies.straightMV import straightMV
+from ssapy.strategies.targetPrice import targetPrice
+from ssapy.strategies.jointLocal import jointLocalUpdate
+from ssapy.strategies.condLocal import condLocalUpdate, condLocalLimitUpdate,\
+    condLocalZeroUpdate
+from ssapy.strategies.margLocal import margLocalUpdate
+from ssapy.pricePrediction.jointGMM import expectedSurplus_
+from ssapy.util.revenue import denseRevenue
+from ssapy.util import listBundles, acq, marginalUtility
+
+class test_scheduleRevenue(unittest.TestCase):
+    def test_scheduleAcq(self):
+        """
+        Optimal surplus and marginal utilities must equal the enumerated results.
+        """
+        numpy.random.seed(0)
+        for trial in range(500):
+            m = numpy.random.randint(1,7)
+            v, l = randomValueVector(0, 50, m)
+            bundles = listBundles(m)
+            revenue = listRevenue(bundles, v, l)
+
+            pp = numpy.random.rand(m)*40
+            if trial % 5 == 0:
+                pp[numpy.random.randint(m)] = numpy.inf
+
+            optBundle, optSurplus = scheduleAcq(v, l, pp)
+
+            numpy.testing.assert_equal(optSurplus, acq(bundles, revenue, pp)[1])
+
+            bundleIdx = numpy.flatnonzero(numpy.all(bundles == optBundle,1))[0]
+            numpy.testing.assert_equal(revenue[bundleIdx] - numpy.sum(pp[optBundle]), optSurplus[0])
+
+            for goodIdx in range(m):
+                numpy.testing.assert_equal(scheduleMarginalUtility(v, l, pp, goodIdx),
+                                           marginalUtility(bundles, revenue, pp, goodIdx))
+
+    def test_strategies(self):
+        pp = numpy.asarray([5.,5.])
+        v  = [20.,10.]
+        l  = 1
+
+        numpy.testing.assert_equal(straightMV(None, scheduleRevenue(v, l), pp), [15.,0.])
+        numpy.testing.assert_equal(targetPrice(None, scheduleRevenue(v, l), pp), [5.,0.])
+
+        # 2^20 bundles are never enumerated
+        m = 20
+        v, l = randomValueVector(0, 50, m, 4)
+        bids = straightMV(None, scheduleRevenue(v, l), numpy.random.rand(m)*10)
+        self.assertEqual(bids.shape, (m,))
+
+    def test_localUpdates(self):
+        """
+        Local search updates with the implicit revenue function must match
+        the updates with the dense (bundles, revenue) representation.
+        """
+        numpy.random.seed(1)
+        for trial in range(20):
+            m = numpy.random.randint(2,6)
+            v, l = randomValueVector(0, 50, m)
+            bundles = listBundles(m)
+            revenue = listRevenue(bundles, v, l)
+            implicit = scheduleRevenue(v, l)
+            
+            samples = numpy.random.rand(200,m)*50
+            bids = numpy.random.rand(m)*50
+            if trial % 4 == 0:
+                # nothing is ever won
+                bids[:] = -1
+            
+            brd = dict((tuple(b),r) for b,r in zip(bundles,revenue))
+            
+            numpy.testing.assert_allclose(expectedSurplus_(implicit, bids, samples),
+                                          expectedSurplus_(brd, bids, samples))
+            
+            for j in range(m):
+                for update in [jointLocalUpdate, condLocalUpdate, 
+                               condLocalLimitUpdate, condLocalZeroUpdate]:
+                    numpy.testing.assert_allclose(update(None, implicit, bids, j, samples),
+                                                  update(bundles, revenue, bids, j, samples),
+                                                  atol = 1e-10)
+                
+                numpy.testing.assert_allclose(margLocalUpdate(None, implicit, bids, j, samples),
+                                              margLocalUpdate(None, denseRevenue(bundles, revenue), 
+                                                              bids, j, samples))
+
+if __name__ == "__main__":
+    unittest.main()
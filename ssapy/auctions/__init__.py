@@ -1,9 +1,15 @@
 __all__ = ["auctionBase", "simultaneousAuction"]
 
 from ssapy.agents.agentFactory import agentFactory
+from ssapy.auctions.reducers import reducerFactory
+from ssapy.util import compactArray
 
+import collections
+import copy
 import multiprocessing
+import multiprocessing.pool
 import numpy
+import queue
 
 def collectBids(agentList):
     
@@ -30,15 +36,19 @@ def simAuctionHelper(**kwargs):
     
     verbose      = kwargs.get('verbose', False)
 
-    retType      = kwargs.get('retType','bids')
-    
     l            = kwargs.get('l')
     
-    if retType == 'hob':
-        selfIdx  = kwargs.get('selfIdx')
-        if selfIdx == None:
-            raise ValueError("ERROR - simulateAuction(...):\n" + \
-                             "\t Must specify selfIdx when retType == 'hob'")
+    seed         = kwargs.get('seed')
+    
+    dtype        = kwargs.get('dtype')
+    scale        = kwargs.get('scale',1)
+    
+    nThreads     = kwargs.get('nThreads',1)
+    
+    if seed is not None:
+        numpy.random.seed(seed)
+    
+    reducer = getReducer(**kwargs)
             
     if verbose:
         print('In simulateAuction(...)')
@@ -47,63 +57,261 @@ def simAuctionHelper(**kwargs):
         print('m            = {0}'.format(m))
         print('minValuation = {0}'.format(minValuation))
         print('maxValuation = {0}'.format(maxValuation))
-        print('retType      = {0}'.format(retType))
+        print('reducer      = {0}'.format(reducer.__class__.__name__))
 
-    if retType == 'bids':
-        ret = numpy.zeros((nGames,nAgents,m))
-    elif retType == 'firstPrice' or retType == 'hob':
-        ret = numpy.zeros((nGames,m))
-    else:
-        raise ValueError("simulateAuction - Unknown return type")
-    
     agents = [agentFactory(agentType = atype, m = m, vmin = minValuation, vmax = maxValuation) for atype in agentType]
     
-    for itr in range(nGames):
-        if verbose:
-            print('running serial game {0}'.format(itr))
-
-        if retType == 'firstPrice' or retType == 'secondPrice' or retType == 'hob':
-            gameBids = numpy.zeros((nAgents,m))   
+    if not isinstance(pricePrediction,list):
+        pricePrediction = [pricePrediction]*nAgents
         
-        if isinstance(pricePrediction,list):  
-             
-            for agentIdx, agent, pp in zip(numpy.arange(nAgents),agents,pricePrediction):
+    if nThreads > 1:
+        bids = threadedBids(agents, pricePrediction, nGames, l, nThreads)
+        
+    else:
+        bids = numpy.zeros((nGames,nAgents,m))
+        
+        for itr in range(nGames):
+            if verbose:
+                print('running serial game {0}'.format(itr))
                 
-                agent.randomValuation(l = l)     
-                    
-                if retType == 'bids':
-                    ret[itr, agentIdx, :] = agent.bid(pricePrediction = pp)
-                            
-                elif retType == 'firstPrice' or retType == 'secondPrice' or retType == 'hob':
-                    gameBids[agentIdx,:] = agent.bid(pricePrediction = pp)
-                    
-        else:
-            for agentIdx, agent in enumerate(agents):
+            for agentIdx, agent, pp in zip(numpy.arange(nAgents),agents,pricePrediction):
                 
-                agent.randomValuation(l=l)
+                agent.randomValuation(l = l)
                 
-                if retType == 'bids':
-                    ret[itr, agentIdx, :] = agent.bid(pricePrediction = pricePrediction)
-                    
-                elif retType == 'firstPrice' or retType == 'secondPrice' or retType == 'hob':
-                        gameBids[agentIdx,:] = agent.bid(pricePrediction = pricePrediction)
-            
-        if retType == 'firstPrice':
-            ret[itr,:] = numpy.max(gameBids,0)
+                bids[itr, agentIdx, :] = agent.bid(pricePrediction = pp)
             
-        elif retType == 'hob':
+    # reduce the block here, in the process which played the games,
+    # so only the summary is returned to the parent.
+    ret = reducer(bids)
+    
+    # price outputs (bids, hob, first/second price) are stored compactly,
+    # histogram counts and moments are returned as computed.
+    if isinstance(ret,numpy.ndarray) and ret.dtype.kind == 'f':
+        ret = compactArray(ret, dtype, scale)
+        
+    return ret
+        
+def threadedBids(agents, pricePrediction, nGames, l = None, nThreads = 2):
+    """
+    Compute the bids of every agent in nGames games with a pool of nThreads
+    threads in this process. Strategies dominated by large numpy operations
+    (e.g. jointLocal, condMVLocal, bidEvalS with many samples) release the GIL
+    so the agents' bids are computed concurrently across the whole block.
+    
+    Valuations are drawn serially, in game order, before any bidding starts;
+    each (game, agent) pair bids with its own shallow copy of the agent.
+    Random draws made inside agent.bid(...) happen in thread order,
+    so the bids are not reproducible from a seed.
+    
+    Returns bids, shape = (nGames, len(agents), m)
+    """
+    tasks = []
+    for itr in range(nGames):
+        for agent, pp in zip(agents,pricePrediction):
+            gameAgent = copy.copy(agent)
+            gameAgent.randomValuation(l = l)
+            tasks.append((gameAgent,pp))
             
-            ret[itr,:] = numpy.max( numpy.delete(gameBids,selfIdx,0), 0 )
+    if nGames == 0:
+        return numpy.zeros((0,len(agents),agents[0].m))
+    
+    pool = multiprocessing.pool.ThreadPool(nThreads)
+    try:
+        bids = pool.map(_bidTask, tasks)
+    finally:
+        pool.close()
+        pool.join()
+        
+    return numpy.asarray(bids,dtype=float).reshape(nGames,len(agents),-1)
+
+def _bidTask(task):
+    agent, pp = task
+    return agent.bid(pricePrediction = pp)
+        
+def getReducer(**kwargs):
+    """
+    Return the reducer specified by the reducer keyword (a reducer instance
+    or a reducerFactory string) or, if reducer is not given, the reducer
+    equivalent to retType.
+    """
+    reducer = kwargs.get('reducer')
+    
+    if reducer is None:
+        retType = kwargs.get('retType','bids')
+        if retType not in ['bids','firstPrice','secondPrice','hob']:
+            raise ValueError("simulateAuction - Unknown return type")
+        
+        if retType == 'hob' and kwargs.get('selfIdx') == None:
+            raise ValueError("ERROR - simulateAuction(...):\n" + \
+                             "\t Must specify selfIdx when retType == 'hob'")
             
-        elif retType == 'secondPrice':
-            for goodIdx in range(gameBids.shape[1]):
-                goodBids = gameBids[:,m]
-                goodArgMax = numpy.argmax(goodBids)
-                ret[itr,goodIdx] = numpy.max(numpy.delete(goodBids,goodArgMax))
+        subArgs = {}
+        subArgs.update(kwargs)
+        subArgs['reducer'] = retType
+        return reducerFactory(**subArgs)
+    
+    elif isinstance(reducer,str):
+        return reducerFactory(**kwargs)
+    
+    return reducer
+
+def blockSizes(nGames, blockSize):
+    """
+    Split nGames into a list of block sizes, each at most blockSize games.
+    """
+    nGameList = [blockSize]*(nGames//blockSize)
+    if nGames % blockSize:
+        nGameList.append(nGames % blockSize)
+        
+    return nGameList
+
+def simulateAuctionStream(**kwargs):
+    """
+    Generator version of simulateAuction(...). Instead of holding the results
+    of every game in memory, yield the results in blocks of (at most) blockSize
+    games as they are completed.
+    
+    Accepts all the parameters of simulateAuction(...) as well as:
+    
+    blockSize: int, optional - default = 1000
+        The (maximum) number of games simulated per block. Each yielded block
+        has shape (blockSize,nAgents,m) if retType == 'bids' or (blockSize,m)
+        otherwise; only the last block may be smaller.
+        
+        If a reducer is specified each yielded block is the reducer's partial
+        result for that block, combine them with reducer.combine(blocks).
+        
+    pool: multiprocessing.Pool, optional - default = None
+        An existing pool of worker processes to run the blocks on. If not
+        specified and parallel == True a pool of nProc workers is created
+        and terminated when the stream is exhausted (or closed).
+        
+    maxPending: int, optional - default = 2*nProc
+        Maximum number of blocks submitted to the pool which have not yet
+        been consumed. Bounds the memory held by finished but unconsumed blocks.
+        
+    ordered: bool, optional - default = True
+        If True, yield blocks in the order they were submitted. Otherwise
+        yield each block as soon as any worker has finished it.
+        
+    Example
+    -------
+    Accumulate the first price histogram of 10^7 games in bounded memory:
+    
+        counts = 0
+        for block in simulateAuctionStream(reducer = 'hist', stat = 'firstPrice', nGames = 10**7, ...):
+            counts += block
+    """
+    agentType = kwargs.get('agentType')
+        
+    if isinstance(agentType,list):
+        nAgents = len(agentType)
+        
+    elif isinstance(agentType,str):
+        nAgents   = kwargs.get('nAgents',8)
+        agentType = [agentType]*nAgents
+    
+    nGames          = kwargs.get('nGames')
+    blockSize       = kwargs.get('blockSize',1000)
+    parallel        = kwargs.get('parallel',True)
+    if parallel:
+        nProc       = kwargs.get('nProc', multiprocessing.cpu_count())
+        maxPending  = kwargs.get('maxPending', 2*nProc)
+        ordered     = kwargs.get('ordered', True)
+        
+    m            = kwargs.get('m',5)
+    minValuation = kwargs.get('minValuation',0)
+    maxValuation = kwargs.get('maxValuation',50)
+    
+    verbose      = kwargs.get('verbose', False)
+
+    
+    #can specify lambad (1 = perfect substitutes, 5 = perfect complements)
+    l            = kwargs.get('l') 
+    
+    # validate the reducer in the parent before any games are played
+    reducer      = getReducer(**kwargs)
             
-    return ret
+    if blockSize < 1:
+        raise ValueError("simulateAuctionStream - blockSize must be >= 1")
+    
+    nGameList = blockSizes(nGames, blockSize)
+    
+    if verbose:
+        print('In simulateAuction(...)')
+        print('agentType    = {0}'.format(agentType))
+        print('nGames       = {0}'.format(nGames))
+        print('parallel     = {0}'.format(parallel))
+        if parallel:
+            print('nProc    = {0}'.format(nProc))
+        print('m            = {0}'.format(m))
+        print('minValuation = {0}'.format(minValuation))
+        print('maxValuation = {0}'.format(maxValuation))
+        print('reducer      = {0}'.format(reducer.__class__.__name__))
+        print('l            = {0}'.format(l))
+        print('blockSize    = {0}'.format(blockSize))
+        print('Number of blocks = {0}'.format(len(nGameList)))
+        
+    subArgs = {}
+    subArgs.update(kwargs)
+    subArgs.pop('pool', None)
+    subArgs['parallel'] = False
+    subArgs['verbose']  = False
+        
+    if not parallel:
+        for nBlock in nGameList:
+            subArgs['nGames'] = nBlock
+            yield simAuctionHelper(**subArgs)
+        return
+    
+    pool = kwargs.get('pool')
+    ownPool = pool is None
+    if ownPool:
+        pool = multiprocessing.Pool(nProc)
         
+    if verbose:
+        print('Running parallel simulation.')
+        print('Number of cores = {0}'.format(nProc))
         
+    # unordered blocks are pushed onto finished by the pool's result
+    # handler as they complete, pending only counts the outstanding blocks
+    pending  = collections.deque()
+    finished = queue.Queue()
+    
+    def submit(args):
+        if ordered:
+            return pool.apply_async(simAuctionHelper, kwds = args)
+        return pool.apply_async(simAuctionHelper, kwds = args,
+                                callback = lambda r: finished.put((r, None)),
+                                error_callback = lambda e: finished.put((None, e)))
+    
+    def nextFinished():
+        r = pending.popleft()
+        if ordered:
+            return r.get()
+        result, error = finished.get()
+        if error is not None:
+            raise error
+        return result
+        
+    try:
+        for nBlock in nGameList:
+            subArgs['nGames'] = nBlock
+            # every block gets its own seed, otherwise forked workers
+            # share the parent's random state and replay the same valuations
+            subArgs['seed'] = numpy.random.randint(2**31 - 1)
+            pending.append(submit(dict(subArgs)))
+            
+            if len(pending) >= maxPending:
+                yield nextFinished()
+                
+        while pending:
+            yield nextFinished()
+            
+    finally:
+        if ownPool:
+            pool.terminate()
+            pool.join()
 
 def simulateAuction(**kwargs):
     """
@@ -137,6 +345,12 @@ def simulateAuction(**kwargs):
     nProc: int, optional - default = multiprocessing.cpu_count()
         Number of cores to use if parallel flag is set to true.
         
+    blockSize: int, optional - default = ceil(nGames/nProc) if parallel else nGames
+        Number of games simulated per block (see simulateAuctionStream).
+        
+    pool: multiprocessing.Pool, optional
+        An existing pool of worker processes to reuse.
+        
     pricePrediction: (point, margDist, jointGmm) or list thereof, required
         Price prediction or list of price predictions 
         ( 1 for each agent ) used in the simulation
@@ -161,92 +375,64 @@ def simulateAuction(**kwargs):
             
     selfIdx: int, required if retType == 'hob'
         Index of agent considered to be self. Excluded from max bid calculation.
-    """
-
-    agentType = kwargs.get('agentType')
         
-    if isinstance(agentType,list):
-        nAgents = len(agentType)
+    reducer: string or reducer, optional - default = None
+        Summary computed by each worker on its own block of games so that
+        only the summary is returned to the parent process (see
+        ssapy.auctions.reducers). Overrides retType when specified.
         
-    elif isinstance(agentType,str):
-        nAgents   = kwargs.get('nAgents',8)
-        agentType = [agentType]*nAgents
-    
-    nGames          = kwargs.get('nGames')
-    parallel        = kwargs.get('parallel',True)
-    if parallel:
-        nProc       = kwargs.get('nProc', multiprocessing.cpu_count())
+        'bids', 'firstPrice', 'secondPrice', 'hob' -> as retType
+        'hist' -> count matrix of stat, shape = (m,nBins)
+            using minPrice, maxPrice and delta (defaults 0, 50, 1)
+        'moments' -> (nGames, mean, variance) of stat for each good
         
-    pricePrediction = kwargs.get('pricePrediction')
+    stat: string, optional - default = 'hob'
+        Price statistic summarized by the 'hist' and 'moments' reducers,
+        one of 'hob', 'firstPrice' or 'secondPrice'.
         
-    m            = kwargs.get('m',5)
-    minValuation = kwargs.get('minValuation',0)
-    maxValuation = kwargs.get('maxValuation',50)
-    
-    verbose      = kwargs.get('verbose', False)
-
-    retType      = kwargs.get('retType','bids')
+    dtype: numpy dtype or string, optional - default = None (float64)
+        dtype of the returned bids/prices, e.g. 'float32' or, when every
+        value times scale is an integer, 'int16'/'int32' (see ssapy.util.compactArray).
+        
+    scale: float, optional - default = 1
+        Multiplier applied to the outputs before storing them with an integer
+        dtype. Pass the same scale to the fitters' aicFit(...) to undo it.
+        
+    nThreads: int, optional - default = 1
+        Number of threads each simulation process uses to compute agent bids
+        concurrently across its block of games (see threadedBids). Combines with
+        nProc, e.g. nProc = 4, nThreads = 4 keeps 16 bids in flight
+        in the memory of 4 processes.
+        
+    NOTE:
+        This is a thin wrapper which concatenates the blocks of
+        simulateAuctionStream(...). Use the stream directly to process
+        large numbers of games in bounded memory.
+    """
+    nGames   = kwargs.get('nGames')
+    parallel = kwargs.get('parallel',True)
     
-    #can specify lambad (1 = perfect substitutes, 5 = perfect complements)
-    l            = kwargs.get('l') 
+    subArgs = {}
+    subArgs.update(kwargs)
     
-    if retType == 'hob':
-        selfIdx  = kwargs.get('selfIdx')
-        if selfIdx == None:
-            raise ValueError("ERROR - simulateAuction(...):\n" + \
-                             "\t Must specify selfIdx when retType == 'hob'")
-    
-    if verbose:
-        print('In simulateAuction(...)')
-        print('agentType    = {0}'.format(agentType))
-        print('nGames       = {0}'.format(nGames))
-        print('parallel     = {0}'.format(parallel))
+    if 'blockSize' not in subArgs:
         if parallel:
-            print('nProc    = {0}'.format(nProc))
-        print('m            = {0}'.format(m))
-        print('minValuation = {0}'.format(minValuation))
-        print('maxValuation = {0}'.format(maxValuation))
-        print('retType      = {0}'.format(retType))
-        print('l            = {0}'.format(l))
-
-    ret = []
-    if parallel:
-        pool = multiprocessing.Pool(nProc)
-        
-        nGameList = [nGames//nProc]*nProc
-        nGameList[-1] += (nGames % nProc)
-        
-        if verbose:
-            print('Running parallel simulation.')
-            print('Number of cores = {0}'.format(nProc))
-            print('Number of simulations per core = {0}'.format(nGameList))
-            print('Total Number of simulations = {0}'.format((sum(nGameList))))
-
-        results = []
-        
-        for p in range(nProc):
-            subArgs = {}
-            subArgs.update(kwargs)
-            subArgs['parallel'] = False
-            subArgs['nGames'] = nGameList[p]
-            subArgs['verbose'] = False
-                 
-            results.append(pool.apply_async(simAuctionHelper, kwds = subArgs))
-
-        pool.close()
-        pool.join()
-            
-
-        for idx, r in enumerate(results):
-            if idx == 0:
-                ret = r.get()
-            else:                
-                ret = numpy.concatenate((ret,r.get()))
-            r._value = []
+            nProc = kwargs.get('nProc', multiprocessing.cpu_count())
+            subArgs['blockSize'] = max(1, -(-nGames//nProc))
+        else:
+            subArgs['blockSize'] = max(1, nGames)
             
-
+    reducer = getReducer(**kwargs)
+    subArgs['reducer'] = reducer
             
-    else:
-        ret = simAuctionHelper(**kwargs)
-        
-    return ret               
\ No newline at end of file
+    blocks = list(simulateAuctionStream(**subArgs))
+    
+    if not blocks:
+        subArgs['nGames']   = 0
+        subArgs['parallel'] = False
+        return reducer.finalize(simAuctionHelper(**subArgs))
+    
+    if len(blocks) == 1:
+        return reducer.finalize(blocks[0])
+    
+    return reducer.finalize(reducer.combine(blocks))
@@ -0,0 +1,205 @@
+"""
+this is /ssapy/auctions/reducers.py
+
+Reducers summarize a block of simulated bids, shape (nGames,nAgents,m),
+inside the worker process which played the games so that only the
+(small) reduced result is sent back to the parent process.
+
+Every reducer implements:
+    __call__(bids)      -> partial result for one block of games
+    combine(partials)   -> a single partial result from a list of partials
+    finalize(partial)   -> the value returned by simulateAuction(...)
+"""
+import numpy
+
+def highestOtherBids(bids, selfIdx):
+    """
+    Highest bid of all agents other than selfIdx for each game and good.
+
+    bids.shape = (nGames,nAgents,m) -> return shape = (nGames,m)
+    """
+    return numpy.max(numpy.delete(bids, selfIdx, 1), 1)
+
+def firstPrice(bids):
+    """
+    Highest bid for each good in each game.
+    """
+    return numpy.max(bids, 1)
+
+def secondPrice(bids):
+    """
+    Second highest bid for each good in each game.
+    """
+    if bids.shape[1] < 2:
+        raise ValueError("secondPrice - requires at least 2 agents.")
+
+    return numpy.sort(bids, 1)[:,-2,:]
+
+def statistic(bids, stat = 'hob', selfIdx = None):
+    """
+    Compute a per game price statistic from a block of bids.
+
+    stat := 'hob' | 'firstPrice' | 'secondPrice'
+    """
+    if stat == 'hob':
+        if selfIdx is None:
+            raise ValueError("Must specify selfIdx when stat == 'hob'")
+        return highestOtherBids(bids, selfIdx)
+    elif stat == 'firstPrice':
+        return firstPrice(bids)
+    elif stat == 'secondPrice':
+        return secondPrice(bids)
+    else:
+        raise ValueError("Unknown statistic {0}".format(stat))
+
+class reducerBase(object):
+    """
+    Base reducer: keeps the bids and concatenates blocks.
+    """
+    def __call__(self, bids):
+        return bids
+
+    def combine(self, partials):
+        return numpy.concatenate(partials)
+
+    def finalize(self, partial):
+        return partial
+
+class hobReducer(reducerBase):
+    """
+    Highest other agent bids with respect to selfIdx, shape (nGames,m).
+    """
+    def __init__(self, selfIdx = None):
+        if selfIdx is None:
+            raise ValueError("hobReducer - must specify selfIdx")
+        self.selfIdx = selfIdx
+
+    def __call__(self, bids):
+        return highestOtherBids(bids, self.selfIdx)
+
+class firstPriceReducer(reducerBase):
+    """
+    Highest bid on each good, shape (nGames,m).
+    """
+    def __call__(self, bids):
+        return firstPrice(bids)
+
+class secondPriceReducer(reducerBase):
+    """
+    Second highest bid on each good, shape (nGames,m).
+    """
+    def __call__(self, bids):
+        return secondPrice(bids)
+
+class histReducer(reducerBase):
+    """
+    Count matrix of a price statistic, shape (m, nBins), using the same
+    bins and binning convention as ssapy.pricePrediction.hist:
+    binEdges = arange(minPrice, maxPrice + delta, delta) and a value
+    belongs to the last bin whose lower edge is strictly less than the value
+    (values equal to minPrice are counted in the first bin).
+    """
+    def __init__(self, stat = 'hob', selfIdx = None, minPrice = 0, maxPrice = 50, delta = 1):
+        self.stat     = stat
+        self.selfIdx  = selfIdx
+        self.binEdges = numpy.arange(minPrice, maxPrice + delta, delta)
+
+        if stat == 'hob' and selfIdx is None:
+            raise ValueError("histReducer - must specify selfIdx when stat == 'hob'")
+
+    def __call__(self, bids):
+        x = statistic(bids, self.stat, self.selfIdx)
+
+        if numpy.any(x < self.binEdges[0]) or numpy.any(x > self.binEdges[-1]):
+            raise ValueError("histReducer - value not in histogram range " +\
+                             "[{0},{1}]".format(self.binEdges[0], self.binEdges[-1]))
+
+        nBins = self.binEdges.shape[0] - 1
+        m = x.shape[1]
+
+        binIdx = (numpy.searchsorted(self.binEdges, x, side = 'left') - 1).clip(0, nBins - 1)
+
+        # offset each good's bins so all goods are counted with one bincount
+        binIdx += numpy.arange(m)*nBins
+
+        return numpy.bincount(binIdx.ravel(), minlength = m*nBins).reshape(m, nBins)
+
+    def combine(self, partials):
+        return numpy.sum(partials, 0)
+
+class momentsReducer(reducerBase):
+    """
+    Running count, mean and variance of a price statistic over games.
+
+    Partial results are (n, mean, M2) tuples combined with the pairwise
+    update of Chan et. al., finalize returns (n, mean, variance).
+    """
+    def __init__(self, stat = 'hob', selfIdx = None):
+        self.stat    = stat
+        self.selfIdx = selfIdx
+
+        if stat == 'hob' and selfIdx is None:
+            raise ValueError("momentsReducer - must specify selfIdx when stat == 'hob'")
+
+    def __call__(self, bids):
+        x = statistic(bids, self.stat, self.selfIdx)
+
+        n = x.shape[0]
+        if n == 0:
+            return 0, numpy.zeros(x.shape[1]), numpy.zeros(x.shape[1])
+
+        mean = numpy.mean(x, 0)
+
+        return n, mean, numpy.sum((x - mean)**2, 0)
+
+    def combine(self, partials):
+        n, mean, M2 = partials[0]
+        for nb, meanb, M2b in partials[1:]:
+            if nb == 0:
+                continue
+            N = n + nb
+            delta = meanb - mean
+            mean = mean + delta*(float(nb)/N)
+            M2 = M2 + M2b + (delta**2)*(float(n)*nb/N)
+            n = N
+
+        return n, mean, M2
+
+    def finalize(self, partial):
+        n, mean, M2 = partial
+        if n == 0:
+            return n, mean, M2
+        return n, mean, M2/n
+
+def reducerFactory(**kwargs):
+    """
+    Function which returns a reducer given a reducer type string.
+
+    reducer := 'bids' | 'hob' | 'firstPrice' | 'secondPrice' | 'hist' | 'moments'
+
+    Remaining keyword arguments (selfIdx, stat, minPrice, maxPrice, delta)
+    are passed to the reducer.
+    """
+    reducer = kwargs.get('reducer')
+
+    if reducer == None:
+        raise ValueError("Must provide reducer (string).")
+    elif reducer == 'bids':
+        return reducerBase()
+    elif reducer == 'hob':
+        return hobReducer(kwargs.get('selfIdx'))
+    elif reducer == 'firstPrice':
+        return firstPriceReducer()
+    elif reducer == 'secondPrice':
+        return secondPriceReducer()
+    elif reducer == 'hist':
+        return histReducer(stat     = kwargs.get('stat','hob'),
+                           selfIdx  = kwargs.get('selfIdx'),
+                           minPrice = kwargs.get('minPrice',0),
+                           maxPrice = kwargs.get('maxPrice',50),
+                           delta    = kwargs.get('delta',1))
+    elif reducer == 'moments':
+        return momentsReducer(stat    = kwargs.get('stat','hob'),
+                              selfIdx = kwargs.get('selfIdx'))
+    else:
+        raise ValueError("Unknown Reducer Type {0}".format(reducer))
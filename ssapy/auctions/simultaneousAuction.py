@@ -11,6 +11,7 @@ from ssapy.auctions.auctionBase import *
 
 import numpy
 import heapq
+import multiprocessing.pool
 
 class simultaneousAuction(auctionBase):
     """
@@ -25,6 +26,12 @@ class simultaneousAuction(auctionBase):
         self.nPrice  = int(kwargs.get('nPrice', 2))
         self.reserve = kwargs.get('reserve',0)
         
+        # compute agent bids concurrently with a thread pool, either
+        # a shared multiprocessing.pool.ThreadPool or nThreads > 1
+        # for a pool created per runAuction(...) call
+        self.threadPool = kwargs.get('threadPool')
+        self.nThreads   = int(kwargs.get('nThreads', 1))
+        
         #indicate the auction has not yet run
         self.finalPrices = None
         self.winners     = None
@@ -81,7 +88,7 @@ class simultaneousAuction(auctionBase):
         reserve = kwargs.get('reserve', self.reserve)
             
         #collect the bids from the agents
-        bids = numpy.atleast_2d([agent.bid(**kwargs) for agent in self.agentList])
+        bids = numpy.atleast_2d(self.collectBids(**kwargs))
         
         # the highest bids
         winningBids = numpy.max(bids,0)
@@ -117,6 +124,32 @@ class simultaneousAuction(auctionBase):
         
         return winners, finalPrices, winningBids      
     
+    def collectBids(self,**kwargs):
+        """
+        Return the list of bids of all attached agents. 
+        
+        With a thread pool (threadPool or nThreads > 1) the agents bid
+        concurrently, which pays off for strategies dominated by large
+        numpy operations that release the GIL (e.g. jointLocal with many samples).
+        """
+        threadPool = kwargs.get('threadPool', self.threadPool)
+        nThreads   = int(kwargs.get('nThreads', self.nThreads))
+        
+        if threadPool is None and (nThreads < 2 or len(self.agentList) < 2):
+            return [agent.bid(**kwargs) for agent in self.agentList]
+        
+        bidFnc = lambda agent: agent.bid(**kwargs)
+        
+        if threadPool is not None:
+            return threadPool.map(bidFnc, self.agentList)
+        
+        threadPool = multiprocessing.pool.ThreadPool(min(nThreads,len(self.agentList)))
+        try:
+            return threadPool.map(bidFnc, self.agentList)
+        finally:
+            threadPool.close()
+            threadPool.join()
+            
     def notifyAgents(self,**kwargs):
         """
         Will modify all agent's agent.bundleWon and agent.finalPrices member variables
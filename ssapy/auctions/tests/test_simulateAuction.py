@@ -1,7 +1,8 @@
 import unittest
 import numpy
 
-from ssapy.auctions import simulateAuction,collectBids
+from ssapy.auctions import simulateAuction,simulateAuctionStream,collectBids
+from ssapy.auctions.simultaneousAuction import simultaneousAuction
 from ssapy.pricePrediction.jointGMM import jointGMM
 
 from ssapy import agentFactory
@@ -18,6 +19,120 @@ class test_simulateAuction(unittest.TestCase):
         
 #        print bids
         
+    def test_simulateAuctionStream(self):
+        agentType = "msStraightMUa"
+        pricePrediction = jointGMM(n_components=2)
+        pricePrediction.means_  = numpy.asarray([[10,5], [0,5]],dtype='float')
+        pricePrediction.weights_ = numpy.asarray([0.5,0.5],dtype = 'float')
+        
+        blocks = [b for b in simulateAuctionStream(agentType = agentType, nAgents = 5, nGames = 10, 
+                                                   m = 2, pricePrediction = pricePrediction, 
+                                                   blockSize = 4, parallel = False)]
+        
+        numpy.testing.assert_equal([b.shape for b in blocks], [(4,5,2),(4,5,2),(2,5,2)])
+        
+        hob = [b for b in simulateAuctionStream(agentType = agentType, nAgents = 5, nGames = 10, 
+                                                m = 2, pricePrediction = pricePrediction, 
+                                                blockSize = 3, nProc = 2, retType = 'hob', selfIdx = 0)]
+        
+        numpy.testing.assert_equal([b.shape for b in hob], [(3,2),(3,2),(3,2),(1,2)])
+        
+        # unordered blocks: the same games, in order of completion
+        numpy.random.seed(0)
+        hob1 = numpy.concatenate(list(simulateAuctionStream(agentType = agentType, nAgents = 5, nGames = 10, 
+                                                            m = 2, pricePrediction = pricePrediction, 
+                                                            blockSize = 3, nProc = 2, maxPending = 2, 
+                                                            retType = 'hob', selfIdx = 0)))
+        numpy.random.seed(0)
+        hob2 = numpy.concatenate(list(simulateAuctionStream(agentType = agentType, nAgents = 5, nGames = 10, 
+                                                            m = 2, pricePrediction = pricePrediction, 
+                                                            blockSize = 3, nProc = 2, maxPending = 2, ordered = False,
+                                                            retType = 'hob', selfIdx = 0)))
+        
+        self.assertEqual(hob2.shape, (10,2))
+        numpy.testing.assert_array_equal(numpy.sort(hob1,0), numpy.sort(hob2,0))
+        
+        numpy.random.seed(0)
+        bids1 = simulateAuction(agentType = agentType, nAgents = 5, nGames = 10, m = 2, 
+                                pricePrediction = pricePrediction, parallel = False)
+        numpy.random.seed(0)
+        bids2 = numpy.concatenate(list(simulateAuctionStream(agentType = agentType, nAgents = 5, nGames = 10, 
+                                                             m = 2, pricePrediction = pricePrediction, 
+                                                             blockSize = 10, parallel = False)))
+        
+        numpy.testing.assert_array_equal(bids1, bids2)
+        
+    def test_reducers(self):
+        agentType = "msStraightMUa"
+        pricePrediction = jointGMM(n_components=2)
+        pricePrediction.means_  = numpy.asarray([[10,5], [0,5]],dtype='float')
+        pricePrediction.weights_ = numpy.asarray([0.5,0.5],dtype = 'float')
+        
+        kwargs = dict(agentType = agentType, nAgents = 5, nGames = 20, m = 2, 
+                      pricePrediction = pricePrediction, blockSize = 6, nProc = 2)
+        
+        numpy.random.seed(0)
+        bids = simulateAuction(**kwargs)
+        
+        numpy.random.seed(0)
+        hob = simulateAuction(reducer = 'hob', selfIdx = 0, **kwargs)
+        numpy.testing.assert_array_equal(hob, numpy.max(bids[:,1:,:],1))
+        
+        numpy.random.seed(0)
+        sp = simulateAuction(retType = 'secondPrice', **kwargs)
+        numpy.testing.assert_array_equal(sp, numpy.sort(bids,1)[:,-2,:])
+        
+        numpy.random.seed(0)
+        counts = simulateAuction(reducer = 'hist', stat = 'firstPrice', **kwargs)
+        self.assertEqual(counts.shape, (2,50))
+        numpy.testing.assert_array_equal(counts.sum(1), [20,20])
+        
+        numpy.random.seed(0)
+        n, mean, var = simulateAuction(reducer = 'moments', selfIdx = 0, **kwargs)
+        self.assertEqual(n, 20)
+        numpy.testing.assert_allclose(mean, numpy.mean(hob,0))
+        numpy.testing.assert_allclose(var, numpy.var(hob,0))
+        
+    def test_dtype(self):
+        agentType = "msStraightMUa"
+        pricePrediction = jointGMM(n_components=2)
+        pricePrediction.means_  = numpy.asarray([[10,5], [0,5]],dtype='float')
+        pricePrediction.weights_ = numpy.asarray([0.5,0.5],dtype = 'float')
+        
+        kwargs = dict(agentType = agentType, nAgents = 5, nGames = 10, m = 2, 
+                      pricePrediction = pricePrediction, parallel = False)
+        
+        numpy.random.seed(0)
+        bids = simulateAuction(**kwargs)
+        
+        numpy.random.seed(0)
+        bids32 = simulateAuction(dtype = 'float32', **kwargs)
+        self.assertEqual(bids32.dtype, numpy.float32)
+        numpy.testing.assert_allclose(bids32, bids, rtol = 1e-6)
+        
+        numpy.random.seed(0)
+        self.assertRaises(ValueError, simulateAuction, dtype = 'int16', scale = 0.001, **kwargs)
+        
+    def test_nThreads(self):
+        kwargs = dict(agentType = "msStraightMV", nAgents = 4, nGames = 12, m = 3, 
+                      pricePrediction = numpy.asarray([5.,10.,15.]), parallel = False)
+        
+        bids = simulateAuction(nThreads = 3, **kwargs)
+        
+        self.assertEqual(bids.shape, (12,4,3))
+        numpy.testing.assert_(numpy.all(bids >= 0) and numpy.all(bids <= 50))
+        
+        # straightMV bids are deterministic for fixed valuations without ties
+        pp = numpy.asarray([5.,5.])
+        agentList = [agentFactory(agentType = "msStraightMV", pricePrediction = pp, v = v, l = 1) 
+                     for v in [[20.,10.],[30.,10.],[12.,10.]]]
+        
+        serial   = simultaneousAuction(agentList = agentList, m = 2).collectBids()
+        threaded = simultaneousAuction(agentList = agentList, m = 2, nThreads = 3).collectBids()
+        
+        numpy.testing.assert_array_equal(serial, [[15.,0.],[25.,0.],[7.,3.]])
+        numpy.testing.assert_array_equal(threaded, serial)
+        
     def test_collectBids(self):
         agentType = "msStraightMUa"
         pricePrediction = jointGMM(n_components=2)
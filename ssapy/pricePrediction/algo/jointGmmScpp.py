@@ -14,9 +14,10 @@ import time
 import pickle
 
 from ssapy import timestamp_
-from ssapy.auctions import simulateAuction
+from ssapy.auctions import simulateAuction, simulateAuctionStream
 from ssapy.pricePrediction import uniformpp
 from ssapy.pricePrediction.jointGMM import jointGMM
+from ssapy.util import expandArray
 from ssapy.util.padnums import pprint_table
 from ssapy.pricePrediction.util import apprxJointGmmKL
 
@@ -78,6 +79,12 @@ def jointGmmScpp(**kwargs):
     kwargs['nGames']       = kwargs.get('nGames',10000)
     kwargs['nklsamples']   = kwargs.get('nklsamples',1000)
     
+    # kl estimate of the stopping criterion: 'mc' (nklsamples samples drawn
+    # with klSeed, fixed by default), 'variational' or 'matched' (see pricePrediction.kl)
+    kwargs['klMethod']     = kwargs.get('klMethod','mc')
+    
+    kwargs['klSeed']       = kwargs.get('klSeed',0)
+    
     kwargs['maxItr']       = kwargs.get('maxItr',100)
 
     kwargs['tol']          = kwargs.get('tol',0.01)
@@ -87,6 +94,25 @@ def jointGmmScpp(**kwargs):
     kwargs['aicCompMax']   = kwargs.get('aicCompMax',21)
 
     kwargs['aicMinCovar']  = kwargs.get('aicMinCovar',0.1)
+    
+    # warm start each fit from the previous iteration's gmm, searching
+    # +/- aicWindow components around its size (see jointGMM.aicFitIncremental)
+    kwargs['aicWarmStart'] = kwargs.get('aicWarmStart',False)
+    
+    kwargs['aicWindow']    = kwargs.get('aicWindow',1)
+    
+    # fit the aic candidates on aicNProc processes, stop after aicPatience
+    # consecutive increases of aic (see modelSelection.aicSelect)
+    kwargs['aicNProc']     = kwargs.get('aicNProc',1)
+    
+    kwargs['aicPatience']  = kwargs.get('aicPatience')
+    
+    # stream hob in blocks of streamBlockSize games: the model is selected
+    # by aic on the first block and refined by online em (jointGMM.partialFit)
+    # on the remaining blocks, so nGames is not bounded by memory
+    kwargs['streamBlockSize'] = kwargs.get('streamBlockSize')
+    
+    kwargs['streamDecay']  = kwargs.get('streamDecay',0.6)
 
     kwargs['minPrice']     = kwargs.get('minPrice',0)
     
@@ -107,6 +133,15 @@ def jointGmmScpp(**kwargs):
     
     kwargs['pltMarg']      = kwargs.get('pltMarg', True)
     
+    # save all agent bids (nGames x nAgents x m) every iteration;
+    # otherwise only hob is returned from the simulation workers
+    kwargs['saveBids']     = kwargs.get('saveBids', False)
+    
+    # compact storage of simulated bids/hob, e.g. dtype = 'float32' or
+    # dtype = 'int16' with scale = 100 (see ssapy.util.compactArray)
+    kwargs['dtype']        = kwargs.get('dtype')
+    kwargs['scale']        = kwargs.get('scale',1)
+    
     kwargs['l']            = kwargs.get('l')
     
     kwargs['timeStamp']    = timestamp_()
@@ -149,7 +184,16 @@ def jointGmmScpp(**kwargs):
             print 'Iteration {0}'.format(itr+1)
         
         simStart = time.time()
-        bids = simulateAuction(**kwargs)
+        stream = None
+        if kwargs['saveBids']:
+            bids = simulateAuction(**kwargs)
+            hob = numpy.max(bids[:,idx2keep,:],1)
+        elif kwargs['streamBlockSize']:
+            stream = simulateAuctionStream(reducer = 'hob', blockSize = kwargs['streamBlockSize'], **kwargs)
+            hob = next(stream)
+        else:
+            # workers reduce their games to hob, full bids never reach this process
+            hob = simulateAuction(reducer = 'hob', **kwargs)
         simEnd = time.time()
 #        simFile = os.path.realpath(os.path.join(kwargs['oDir'],"simulationTime_{0}.txt".format(ps)))
         simFile = os.path.join(kwargs['oDir'],'simTime_0.01.txt')
@@ -166,24 +210,38 @@ def jointGmmScpp(**kwargs):
             
         del simStart, simEnd
         
-        bidsFile = 'bids_{0:04}_{1}.npy'.format(itr,filePostfix)
-        with open(os.path.join(kwargs['oDir'], bidsFile),'w') as f:
-            numpy.save(f, bids)
+        if kwargs['saveBids']:
+            bidsFile = 'bids_{0:04}_{1}.npy'.format(itr,filePostfix)
+            with open(os.path.join(kwargs['oDir'], bidsFile),'w') as f:
+                numpy.save(f, bids)
+            del bids
             
-        hob = numpy.max(bids[:,idx2keep,:],1)
         hobFile = os.path.join(kwargs['oDir'],'hob_{0:04}_{1}.txt'.format(itr,filePostfix))
         with open(hobFile,'w') as f:
             numpy.savetxt(f,hob)
         
-        del bids
                     
         nextpp = jointGMM(covariance_type = kwargs.get('covariance_type'))
-        temppp, aicValues, compRange = nextpp.aicFit(X=hob, compRange = models, min_covar = kwargs['aicMinCovar'], verbose = kwargs['verbose'])
+        if kwargs['aicWarmStart'] and isinstance(kwargs['pricePrediction'], jointGMM):
+            temppp, aicValues, compRange = nextpp.aicFitIncremental(X=hob, scale = kwargs['scale'], compRange = models, min_covar = kwargs['aicMinCovar'], 
+                                                                    prev = kwargs['pricePrediction'], window = kwargs['aicWindow'], verbose = kwargs['verbose'],
+                                                                    nProcs = kwargs['aicNProc'], patience = kwargs['aicPatience'])
+        else:
+            temppp, aicValues, compRange = nextpp.aicFit(X=hob, scale = kwargs['scale'], compRange = models, min_covar = kwargs['aicMinCovar'], verbose = kwargs['verbose'],
+                                                          nProcs = kwargs['aicNProc'], patience = kwargs['aicPatience'])
         
         aicFile = os.path.join(kwargs['oDir'],'aic_{0:03}_{1}.pdf'.format(itr+1,filePostfix))
         
         pltAic(compRange,aicValues,itr,aicFile)
         
+        if stream is not None:
+            nextpp.partialFit(hob, scale = kwargs['scale'], decay = kwargs['streamDecay'])
+            with open(hobFile,'a') as f:
+                for block in stream:
+                    numpy.savetxt(f, block)
+                    nextpp.partialFit(block, scale = kwargs['scale'], decay = kwargs['streamDecay'])
+            del stream
+        
         del hob,temppp,compRange
         
         ppFile = os.path.join(kwargs['oDir'], 'gmmScpp_{0:04}_{1}.pkl'.format(itr,filePostfix))
@@ -205,7 +263,8 @@ def jointGmmScpp(**kwargs):
             
         if itr > 0:
             kld = numpy.abs(apprxJointGmmKL(kwargs['pricePrediction'], nextpp, 
-                            nSamples = kwargs['nklsamples'], verbose = kwargs['verbose']))
+                            nSamples = kwargs['nklsamples'], verbose = kwargs['verbose'],
+                            method = kwargs['klMethod'], seed = kwargs['klSeed']))
             
             with open(os.path.join(kwargs['oDir'],'kld_{0}.txt'.format(filePostfix)),'a') as f:
                 numpy.savetxt(f,numpy.atleast_1d(kld))
@@ -262,20 +321,23 @@ def jointGmmScpp(**kwargs):
     # more bids then evaluate measures of similarity between the resulting 
     # bids and the scpp candidate.
     start = time.time()    
-    extraBids = simulateAuction(**kwargs)
+    if kwargs['saveBids']:
+        extraBids = simulateAuction(**kwargs)
+        extraHob = numpy.max(extraBids[:,idx2keep,:],1)
+        with open(os.path.join(kwargs['oDir'],'extraBids_{0}.npy'.format(filePostfix)), 'w') as f:
+            numpy.save(f, extraBids)
+        del extraBids
+    else:
+        extraHob = simulateAuction(reducer = 'hob', **kwargs)
     end = time.time()
     
-    with open(os.path.join(kwargs['oDir'],'extraBids_{0}.npy'.format(filePostfix)), 'w') as f:
-        numpy.save(f, extraBids)
-    
     if kwargs['verbose']:
         print 'Simulated {0} holdout auctions in {1} seconds'.format(kwargs['nGames'],end-start)
         
-    extraHob = numpy.max(extraBids[:,idx2keep,:],1)
     with open(os.path.join(kwargs['oDir'],'extraHob_{0}.txt'.format(filePostfix)),'w') as f:
         numpy.savetxt(f, extraHob)
     
-    ll = numpy.sum(kwargs['pricePrediction'].eval(extraHob)[0])
+    ll = numpy.sum(kwargs['pricePrediction'].eval(expandArray(extraHob, kwargs['scale']))[0])
     
     if kwargs['verbose']:
         print 'log-likelihood hold out = {0}'.format(ll)
@@ -288,8 +350,10 @@ def jointGmmScpp(**kwargs):
     # the extra model
     
     extraModel = jointGMM()
-    gmm, aicValues, compRange = extraModel.aicFit(X=extraHob, compRange = models, min_covar = kwargs['aicMinCovar'], verbose = kwargs['verbose'])
-    kld = numpy.abs(apprxJointGmmKL(kwargs['pricePrediction'], extraModel, nSamples = kwargs['nklsamples'], verbose = kwargs['verbose']))
+    gmm, aicValues, compRange = extraModel.aicFit(X=extraHob, scale = kwargs['scale'], compRange = models, min_covar = kwargs['aicMinCovar'], verbose = kwargs['verbose'],
+                                                  nProcs = kwargs['aicNProc'], patience = kwargs['aicPatience'])
+    kld = numpy.abs(apprxJointGmmKL(kwargs['pricePrediction'], extraModel, nSamples = kwargs['nklsamples'], verbose = kwargs['verbose'],
+                                    method = kwargs['klMethod'], seed = kwargs['klSeed']))
     
     f,ax = plt.subplots()
     colors = ['#777777']*len(aicValues)
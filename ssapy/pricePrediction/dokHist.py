@@ -3,6 +3,8 @@ import numpy
 
 import matplotlib.pyplot as plt
 
+from ssapy.pricePrediction.margSurplus import dokHistBins, margBins, binPartialMean
+
 #import os
 #import copy
 
@@ -285,54 +287,40 @@ class dokHist(object):
             
         
 def marginal_expected_cost( hob_hist, bid):
+    """
+    E[price; price <= bid] of a marginal histogram, the price uniform within 
+    each bin. bid may be a number or an array of bids, evaluated at once.
+    """
     if hob_hist.dim() != 1:
         err_str = "Must provide marginal histogram," +\
                   "hob_hist.dim() = {0} != 1".format(hob_hist.dim())
         raise ValueError(err_str)
-    if isnumber(bid):
-        pass
-    elif len(bid) != 1:
-        raise ValueError("len(bid) = {0} ! = 1".format(len(bid)))
     
-    ec = 0.0
+    ec = binPartialMean(dokHistBins(hob_hist), bid)
     
-    for r in hob_hist.c.keys():
-        r = r[0]
-         
-        if r[0] < bid and r[1] <= bid:
-            scale = 0.5*(r[1]**2 - r[0]**2)
-            ec += hob_hist.density(r[1])*scale
-        elif bid > r[0] and bid < r[1]:
-            scale = 0.5*(bid**2 - r[0]**2)
-            ec += hob_hist.density(r[1])*scale
-            
-    return ec
-        
-           
+    return ec[()] if ec.ndim == 0 else ec
         
 def expected_cost( hob_hist, bids ):
     """
     inputs:
         highest other agent bid histogram
-        bid vector
+        bid vector, shape (m,), or a batch of bid vectors, shape (n,m)
     outputs:
-        expected cost given bid
+        expected cost given bid (float, or shape (n,) for a batch)
     """
-    if isnumber(bids):
-        bidv = numpy.asarray([bids])
-    else:
-        bidv = numpy.asarray(bids)
+    bidv = numpy.asarray(bids, dtype = numpy.float64)
+    single = bidv.ndim < 2
+    bidv = numpy.atleast_2d(bidv.reshape(-1) if single else bidv)
         
-    if not bidv.shape[0] == hob_hist.dim():
+    if not bidv.shape[1] == hob_hist.dim():
         raise ValueError("hob_hist.dim() = {0} != bids.shape[0] = {1}".\
-                         format(hob_hist.dim(), bidv.shape[0]))
-        
-    ec = 0.0
-    for d, bid in enumerate(bidv):
-        marg = hob_hist.marginal(d)
-        ec += marginal_expected_cost(marg, bid)
+                         format(hob_hist.dim(), bidv.shape[1]))
+    
+    ec = numpy.zeros(bidv.shape[0])
+    for d, bins in enumerate(margBins(hob_hist)):
+        ec += binPartialMean(bins, bidv[:,d])
         
-    return ec
+    return ec[0] if single else ec
 
 def expected_utility( hob_hist, bundles, valuations, bids):
     pass
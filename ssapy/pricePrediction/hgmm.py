@@ -1,10 +1,13 @@
 import numpy
 import sklearn.mixture
 from scipy.stats import norm
+from sklearn.utils import check_random_state
 
 import matplotlib.pyplot as plt
 
 from .jointGMM import jointGMM
+from .modelSelection import aicSelect
+from ssapy.util import expandArray
 
 import time
 
@@ -15,72 +18,71 @@ class hgmm(jointGMM):
         super(hgmm,self).__init__(**kwargs)
         
     def sample(self, **kwargs):
-        minPrice = kwargs.get('minPrice', self.minPrice)
-        maxPrice = kwargs.get('maxPrice', self.maxPrice)
-        
+        """
+        n_samples of the hurdle mixture: with probability p0 all goods close 
+        at zero, otherwise prices are drawn from the mixture truncated to 
+        [minPrice, maxPrice] (see jointGMM.sample, kwargs are passed on).
+        The zero/non-zero split is drawn for all samples at once and the 
+        non-zero block is filled by a single truncated mixture draw.
+        """
         n_samples = kwargs.get('n_samples',1)
         
-        random_state = kwargs.get('random_state',self.random_state)
+        random_state = check_random_state(kwargs.get('random_state',self.random_state))
         
-        sampleFncPtr = super(jointGMM,self).sample
+        samples = numpy.zeros((n_samples, self.m()))
         
-        samples = numpy.zeros((n_samples, self.means_.shape[1]))
+        #flip all coins, zero rows stay all zeros
+        nonZero = random_state.uniform(size = n_samples) >= self.p0
+        nNonZero = numpy.count_nonzero(nonZero)
         
-        m = self.m()
-        idx = 0
-        while idx < n_samples:
-            
-            #flip a coin and choose all zeros or from 
-            #non-zero price distribution
-            if numpy.random.binomial(self.p0):
-                samples[idx,:] = numpy.zeros(m)
-                idx += 1
-            else:
-                s = sampleFncPtr(1,random_state)[0]
-                if ~numpy.any(s > maxPrice) and ~numpy.any(s < minPrice):
-                    samples[idx,:]=s
-                    idx += 1
+        if nNonZero:
+            kwargs = dict(kwargs, n_samples = nNonZero, random_state = random_state)
+            samples[nonZero] = super(hgmm,self).sample(**kwargs)
             
         return samples
     
     def aicFit(self, **kwargs):
-        X               = kwargs.get('X')
+        X               = expandArray(kwargs.get('X'), kwargs.get('scale',1))
         compRange       = kwargs.get('compRange',numpy.arange(1,6))
         
         #accept new mixture model params as arguments
         #and store on instance
         covariance_type = kwargs.get('covariance_type', 'full')
         random_state    = kwargs.get('random_state' , self.random_state)
-        thresh          = kwargs.get('thresh', self.thresh)
-        min_covar       = kwargs.get('min_covar', self.min_covar)
-        n_iter          = kwargs.get('n_itr', self.n_iter)
+        thresh          = kwargs.get('thresh', self.tol)
+        min_covar       = kwargs.get('min_covar', self.reg_covar)
+        n_iter          = kwargs.get('n_itr', self.max_iter)
         n_init          = kwargs.get('n_init', self.n_init)
-        params          = kwargs.get('params',self.params)
         init_params     = kwargs.get('init_params',self.init_params)
     
         verbose         = kwargs.get('verbose',True)
         
+        # concurrent fitting of the candidates, see modelSelection.aicSelect
+        pool            = kwargs.get('pool')
+        nProcs          = kwargs.get('nProcs', 1)
+        threads         = kwargs.get('threads', False)
+        patience        = kwargs.get('patience')
+        
         if verbose:
             print('starting aicFit(...)')
             print('compRange = {0}'.format(compRange))
             print('minCovar  = {0}'.format(min_covar))
             start = time.time()
             
-        clfList = [sklearn.mixture.GMM(n_components    = c, 
+        clfList = [sklearn.mixture.GaussianMixture(n_components    = c, 
                                        covariance_type = covariance_type,
                                        random_state    = random_state,
-                                       min_covar       = min_covar,
-                                       thresh          = thresh,
-                                       n_iter          = n_iter,
+                                       reg_covar       = min_covar,
+                                       tol             = thresh,
+                                       max_iter        = n_iter,
                                        n_init          = n_init,
-                                       params          = params,
                                        init_params     = init_params)\
                                        for c in compRange] 
                                        
         
-        [clf.fit(X) for clf in clfList]
-        
-        aicList = [clf.aic(X) for clf in clfList]
+        clfList, aicList = aicSelect(clfList, X, pool = pool, nProcs = nProcs, 
+                                     threads = threads, patience = patience)
+        compRange = compRange[:len(clfList)]
         
         argMinAic = numpy.argmin(aicList)
         
@@ -1,7 +1,13 @@
 import numpy
 import sklearn.mixture
 from scipy.stats import norm
-from ssapy.pricePrediction.mvncdf import mvnormcdf
+from scipy.special import ndtr
+from ssapy.pricePrediction.mvncdf import mvnormcdf, mvnRect
+from ssapy.pricePrediction.kl import gmmParams_
+from ssapy.pricePrediction.truncSample import truncGmmSample
+from ssapy.pricePrediction.modelSelection import aicSelect, risingRun_
+from ssapy.util import expandArray, bundles2codes
+from ssapy.util.revenue import codeRevenue
 
 import matplotlib.pyplot as plt
 from matplotlib import cm
@@ -11,23 +17,122 @@ import itertools
 import time
 import os
 import multiprocessing
+import multiprocessing.pool
 
 def expectedSurplus_( bundleRevenueDict, bidVector, samples ):
-    es = numpy.float64(0.)
+    """
+    Monte carlo estimate of expected surplus of bidVector given price samples.
     
-    for sample in samples:
-        goodsWon = sample <= bidVector
-        rev = bundleRevenueDict[(tuple(goodsWon))]
-        cost = numpy.dot(goodsWon,sample)
-        es += rev-cost
-        
-    return es/samples.shape[0]
+    bundleRevenueDict may be a dict keyed by tuple(bundle), a revenue table
+    indexed by bundle code (ssapy.util.revenueTable) or a revenue object.
+    """
+    goodsWon = samples <= bidVector
+    
+    rev = codeRevenue(bundleRevenueDict, bundles2codes(goodsWon))
+    
+    return numpy.mean(rev - numpy.sum(goodsWon*samples,1))
         
 def expectedSurplus(bundleRevenueDict, bidVector, jointGmmPricePrediction, n_samples = 10000):
     samples = jointGmmPricePrediction.sample(n_samples = n_samples)
     
     return expectedSurplus_(bundleRevenueDict, bidVector, samples)   
 
+def warmStartParams_(gmm, nComponents):
+    """
+    Initial (weights, means, precisions) for an nComponents mixture from a
+    fitted GaussianMixture: the heaviest components are kept when shrinking,
+    when growing the heaviest component is repeatedly split in two along its
+    principal axis (half the weight each, means +/- half a standard deviation).
+    """
+    w    = numpy.array(gmm.weights_, dtype = numpy.float64)
+    mu   = numpy.array(gmm.means_, dtype = numpy.float64)
+    cov  = numpy.array(gmm.covariances_, dtype = numpy.float64)
+    prec = numpy.array(gmm.precisions_, dtype = numpy.float64)
+
+    ct = gmm.covariance_type
+
+    if nComponents < w.shape[0]:
+        keep = numpy.sort(numpy.argsort(-w, kind = 'mergesort')[:nComponents])
+        w, mu = w[keep], mu[keep]
+        if ct != 'tied':
+            cov, prec = cov[keep], prec[keep]
+
+    while w.shape[0] < nComponents:
+        j = numpy.argmax(w)
+
+        c = cov if ct == 'tied' else cov[j]
+        if ct in ['full', 'tied']:
+            lam, v = numpy.linalg.eigh(c)
+            step = 0.5*numpy.sqrt(max(lam[-1], 0.0))*v[:,-1]
+        elif ct == 'diag':
+            step = numpy.zeros(mu.shape[1])
+            step[numpy.argmax(c)] = 0.5*numpy.sqrt(numpy.max(c))
+        else:
+            step = numpy.zeros(mu.shape[1])
+            step[0] = 0.5*numpy.sqrt(c)
+
+        w[j] /= 2.0
+        w  = numpy.append(w, w[j])
+        mu = numpy.vstack((mu, mu[j] + step))
+        mu[j] -= step
+        if ct != 'tied':
+            cov  = numpy.concatenate((cov, cov[j:j+1]))
+            prec = numpy.concatenate((prec, prec[j:j+1]))
+
+    return w/numpy.sum(w), mu, prec
+
+def gmmSuffStats_(gmm, X):
+    """
+    Expected sufficient statistics of the samples X under a fitted mixture,
+    divided by the number of samples: (responsibility mass (K,),
+    weighted sums (K,m), weighted sums of outer products (K,m,m)).
+    """
+    resp = gmm.predict_proba(X)
+    n = X.shape[0]
+
+    S0 = numpy.sum(resp,0)/n
+    S1 = numpy.dot(resp.T, X)/n
+    S2 = numpy.einsum('nk,ni,nj->kij', resp, X, X)/n
+
+    return [S0, S1, S2]
+
+def gmmFromSuffStats_(gmm, S0, S1, S2):
+    """
+    M-step: set weights, means and covariances (of gmm.covariance_type,
+    regularized by gmm.reg_covar) from the statistics of gmmSuffStats_.
+    """
+    nk   = S0 + 10*numpy.finfo(numpy.float64).eps
+    mu   = S1/nk[:,None]
+    covs = S2/nk[:,None,None] - numpy.einsum('ki,kj->kij', mu, mu)
+
+    m   = mu.shape[1]
+    reg = gmm.reg_covar
+    ct  = gmm.covariance_type
+
+    if ct == 'full':
+        cov = covs + reg*numpy.eye(m)
+        chol = numpy.linalg.cholesky(cov)
+        precChol = numpy.asarray([numpy.linalg.inv(c).T for c in chol])
+        prec = numpy.einsum('kij,klj->kil', precChol, precChol)
+    elif ct == 'tied':
+        cov = numpy.einsum('k,kij->ij', nk, covs)/numpy.sum(nk) + reg*numpy.eye(m)
+        precChol = numpy.linalg.inv(numpy.linalg.cholesky(cov)).T
+        prec = numpy.dot(precChol, precChol.T)
+    elif ct == 'diag':
+        cov = numpy.diagonal(covs, axis1 = 1, axis2 = 2) + reg
+        precChol = 1.0/numpy.sqrt(cov)
+        prec = 1.0/cov
+    else:
+        cov = numpy.mean(numpy.diagonal(covs, axis1 = 1, axis2 = 2), 1) + reg
+        precChol = 1.0/numpy.sqrt(cov)
+        prec = 1.0/cov
+
+    gmm.weights_              = nk/numpy.sum(nk)
+    gmm.means_                = mu
+    gmm.covariances_          = cov
+    gmm.precisions_cholesky_  = precChol
+    gmm.precisions_           = prec
+
 class jointGMM(sklearn.mixture.GaussianMixture):
     """
     A wrapper around sklearn.mixture.GMM to add some additional functionality
@@ -52,7 +157,12 @@ class jointGMM(sklearn.mixture.GaussianMixture):
         return self.means_.shape[1]
         
     def sample(self, **kwargs):
-        
+        """
+        n_samples from the mixture truncated to [minPrice, maxPrice] in every 
+        good, see ssapy.pricePrediction.truncSample.truncGmmSample for the 
+        optional kwargs minAccept, nBurn and method. The acceptance rates of 
+        the draw are kept in self.sampleStats_.
+        """
         minPrice  = kwargs.get('minPrice',self.minPrice)
         maxPrice  = kwargs.get('maxPrice',self.maxPrice)
         
@@ -60,44 +170,25 @@ class jointGMM(sklearn.mixture.GaussianMixture):
         
         random_state = kwargs.get('random_state',self.random_state)
         
-        sampleFncPtr = super(jointGMM,self).sample
+        w, mu, covs = gmmParams_(self)
+        
+        samples, self.sampleStats_ = truncGmmSample(w, mu, covs, n_samples, minPrice, maxPrice, random_state,
+                                                    minAccept = kwargs.get('minAccept', 0.01),
+                                                    nBurn     = kwargs.get('nBurn', 20),
+                                                    method    = kwargs.get('method', 'auto'),
+                                                    ret       = 'all')
         
-        samples = numpy.zeros((n_samples, self.means_.shape[1]))
-                
-        # inefficient way of restricting sample domain
-        # to valid prices but works for now...
-        idx = 0
-        while idx < n_samples:
-            s = sampleFncPtr(1,random_state)[0]
-            if ~numpy.any(s > maxPrice) and ~numpy.any(s < minPrice):
-                samples[idx,:] = s
-                idx += 1
-                
         return samples
     
-    def sampleMarg_(self, margIdx = None, n_samples = 1000):
+    def sampleMarg_(self, margIdx = None, n_samples = 1000, **kwargs):
         
         if margIdx == None:
             raise ValueError("Must specify marginal distribution to sample from - margIdx.")
         
-        w = numpy.atleast_1d(self.weights_)
-        samples = numpy.zeros(n_samples)
+        w, mu, covs = gmmParams_(self, margIdx)
         
-        components = numpy.random.multinomial(1,w,size=n_samples).argmax(axis=1)
-        for sIdx, component in enumerate(components):
-            done = False
-            
-            while not done:
-                sample = numpy.random.normal(loc = self.means_[component][margIdx],
-                                             scale = numpy.sqrt(self.covars_[component][margIdx][margIdx]))
-                if sample > self.minPrice and sample < self.maxPrice:
-                    samples[sIdx] = sample
-                    done = True
-                    break
-                
-            
-        return samples
-            
+        return truncGmmSample(w, mu, covs, n_samples, self.minPrice, self.maxPrice, 
+                              kwargs.get('random_state'))[:,0]
         
     def sampleMarg(self, n_samples = 1000):
         m = self.means_.shape[1]
@@ -117,22 +208,40 @@ class jointGMM(sklearn.mixture.GaussianMixture):
     
 #    def aicFit(self, X, compRange = range(1,6), minCovar = 9, covarType = 'full', verbose = True):
     def aicFit(self,**kwargs):
-        X               = kwargs.get('X')
+        """
+        Fit one mixture per number of components in compRange and keep the
+        model with minimum AIC.
+        
+        X may be float64, float32 or (scaled) integer samples as returned by
+        simulateAuction(..., dtype = ..., scale = ...); integer samples are
+        divided by scale and fit in float32.
+        
+        The candidates are fit concurrently on pool (e.g. the simulation's
+        pool) or on nProcs processes (threads = True for threads); with
+        patience the search stops once AIC has risen for patience consecutive
+        candidates and compRange is truncated to the candidates fit.
+        """
+        X               = expandArray(kwargs.get('X'), kwargs.get('scale',1))
         compRange       = kwargs.get('compRange',numpy.arange(1,6))
         
         #accept new mixture model params as arguments
         #and store on instance
         covariance_type = kwargs.get('covariance_type', 'full')
         random_state    = kwargs.get('random_state' , self.random_state)
-        thresh          = kwargs.get('thresh', self.thresh)
-        min_covar       = kwargs.get('min_covar', self.min_covar)
-        n_iter          = kwargs.get('n_itr', self.n_iter)
+        thresh          = kwargs.get('thresh', self.tol)
+        min_covar       = kwargs.get('min_covar', self.reg_covar)
+        n_iter          = kwargs.get('n_itr', self.max_iter)
         n_init          = kwargs.get('n_init', self.n_init)
-        params          = kwargs.get('params',self.params)
         init_params     = kwargs.get('init_params',self.init_params)
     
         verbose         = kwargs.get('verbose',True)
         
+        # concurrent fitting of the candidates, see modelSelection.aicSelect
+        pool            = kwargs.get('pool')
+        nProcs          = kwargs.get('nProcs', 1)
+        threads         = kwargs.get('threads', False)
+        patience        = kwargs.get('patience')
+        
         if verbose:
             print ('starting aicFit(...)')
             print ('compRange = {0}'.format(compRange))
@@ -150,9 +259,9 @@ class jointGMM(sklearn.mixture.GaussianMixture):
                                        for c in compRange] 
                                        
         
-        [clf.fit(X) for clf in clfList]
-        
-        aicList = [clf.aic(X) for clf in clfList]
+        clfList, aicList = aicSelect(clfList, X, pool = pool, nProcs = nProcs, 
+                                     threads = threads, patience = patience)
+        compRange = compRange[:len(clfList)]
         
         argMinAic = numpy.argmin(aicList)
         
@@ -170,8 +279,241 @@ class jointGMM(sklearn.mixture.GaussianMixture):
                 
         return clfList[argMinAic], aicList, compRange
     
+    def aicFitIncremental(self,**kwargs):
+        """
+        aicFit warm started from a previously fitted mixture (e.g. the
+        price prediction of the last SCPP iteration).
+
+        Only component counts in a window of +/- window around the previous
+        number of components are fit. EM for the previous number of components
+        starts from the previous weights, means and precisions, every other count
+        from the nearest count already fit (see warmStartParams_). If the best
+        AIC lies on the edge of the window the search is widened in that
+        direction, one component at a time, until AIC has risen for patience
+        consecutive counts or compRange is exhausted. Without a previous fit
+        this is aicFit.
+
+        The window is fit in rounds of the counts at the same distance from
+        the previous number of components, each round (and each widening step
+        of both directions) fit concurrently through modelSelection.aicSelect.
+
+        INPUTS
+        ------
+        X, scale, compRange, ... := as aicFit
+
+        pool, nProcs, threads    := as aicFit
+
+        patience := (int) consecutive increases of AIC that stop widening
+                    the window in one direction (None: 1).
+
+        prev   := (GaussianMixture) fitted mixture to warm start from,
+                  defaults to self if self has been fit.
+
+        window := (int) half width of the initial component window.
+
+        OUTPUTS
+        -------
+        as aicFit, compRange lists the component counts actually fit.
+        """
+        prev = kwargs.get('prev', self if hasattr(self, 'means_') else None)
+
+        if prev is None:
+            return self.aicFit(**kwargs)
+
+        X               = expandArray(kwargs.get('X'), kwargs.get('scale',1))
+        compRange       = numpy.atleast_1d(kwargs.get('compRange',numpy.arange(1,6)))
+        window          = kwargs.get('window', 1)
+
+        covariance_type = kwargs.get('covariance_type', prev.covariance_type)
+        random_state    = kwargs.get('random_state' , self.random_state)
+        thresh          = kwargs.get('thresh', self.tol)
+        min_covar       = kwargs.get('min_covar', self.reg_covar)
+        n_iter          = kwargs.get('n_itr', self.max_iter)
+
+        verbose         = kwargs.get('verbose',True)
+
+        pool            = kwargs.get('pool')
+        nProcs          = kwargs.get('nProcs', 1)
+        threads         = kwargs.get('threads', False)
+        patience        = kwargs.get('patience')
+        if patience is None:
+            patience = 1
+
+        if covariance_type != prev.covariance_type:
+            raise ValueError("jointGMM.aicFitIncremental(...) - covariance_type = {0} != prev.covariance_type = {1}".\
+                             format(covariance_type, prev.covariance_type))
+
+        if verbose:
+            print ('starting aicFitIncremental(...)')
+            start = time.time()
+
+        cMin, cMax = numpy.min(compRange), numpy.max(compRange)
+        k = min(max(prev.means_.shape[0], cMin), cMax)
+
+        # one pool for all rounds
+        ownPool = pool is None and nProcs > 1
+        if ownPool:
+            if threads:
+                pool = multiprocessing.pool.ThreadPool(min(nProcs, 2))
+            else:
+                pool = multiprocessing.Pool(min(nProcs, 2))
+
+        # warm start from the nearest component count fit so far
+        fits = {}
+        def fitRound(counts):
+            clfList = []
+            for c in counts:
+                src = fits[min(fits, key = lambda f: abs(f - c))][0] if fits else prev
+                w, mu, prec = warmStartParams_(src, c)
+                clfList.append(sklearn.mixture.GaussianMixture(n_components    = c,
+                                                               covariance_type = covariance_type,
+                                                               random_state    = random_state,
+                                                               reg_covar       = min_covar,
+                                                               tol             = thresh,
+                                                               max_iter        = n_iter,
+                                                               weights_init    = w,
+                                                               means_init      = mu,
+                                                               precisions_init = prec))
+
+            clfList, aicList = aicSelect(clfList, X, pool = pool)
+            fits.update(zip(counts, zip(clfList, aicList)))
+
+        try:
+            lo, hi = max(k - window, cMin), min(k + window, cMax)
+            fitRound([k])
+            for d in range(1, window + 1):
+                fitRound([c for c in (k - d, k + d) if lo <= c <= hi])
+
+            # widen towards smaller/larger models while the edge keeps improving
+            best = min(fits[c][1] for c in fits)
+            edges = {-1 : [lo], 1 : [hi]}
+            for step in (-1, 1):
+                if fits[edges[step][0]][1] > best:
+                    del edges[step]
+
+            while True:
+                edges = dict((step, path) for step, path in edges.items()
+                             if cMin <= path[-1] + step <= cMax and
+                             risingRun_([fits[c][1] for c in path]) < patience)
+                if not edges:
+                    break
+
+                fitRound([path[-1] + step for step, path in sorted(edges.items())])
+                for step, path in edges.items():
+                    path.append(path[-1] + step)
+        finally:
+            if ownPool:
+                pool.close()
+                pool.join()
+
+        fitRange = numpy.asarray(sorted(fits))
+        aicList  = [fits[c][1] for c in fitRange]
+
+        argMinAic = numpy.argmin(aicList)
+        best      = fits[fitRange[argMinAic]][0]
+
+        self.__dict__.update(best.__dict__)
+        self.covariance_type = covariance_type
+
+        if verbose:
+            print ('Finished aicFitIncremental(...) in {0} seconds'.format(time.time()-start))
+            print ('Minimum AIC = {0}'.format(aicList[argMinAic]))
+            print ('Number of components = {0}'.format(fitRange[argMinAic]))
+
+        return best, aicList, fitRange
+
+    def partialFit(self, X, scale = 1, decay = 0.6):
+        """
+        One step of online (stepwise) EM on a block of samples.
+
+        The expected sufficient statistics of the block under the current
+        parameters - per component the responsibility mass, the weighted sum
+        and the weighted sum of outer products of the samples, each divided
+        by the block size - are blended into the running statistics with
+        step size eta = (nBlocks + 1)**-decay; the parameters are then
+        re-estimated from the running statistics.
+
+        The first block initializes the mixture with a (k-means initialized)
+        batch fit of n_components components unless the model is already fit.
+
+        INPUTS
+        ------
+        X     := (2d array-like) block of samples, may be compact (see aicFit)
+
+        scale := scale of integer samples (see ssapy.util.expandArray)
+
+        decay := (float in (0.5,1]) step size decay, decay = 1 averages the
+                 statistics of all blocks with equal weight.
+        """
+        X = numpy.atleast_2d(expandArray(X, scale)).astype(numpy.float64)
+
+        if not hasattr(self, 'means_'):
+            super(jointGMM,self).fit(X)
+
+        if not hasattr(self, 'onlineStats_'):
+            self.onlineStats_ = None
+            self.nBlocks_     = 0
+            self.nSamples_    = 0
+
+        stats = gmmSuffStats_(self, X)
+
+        eta = (self.nBlocks_ + 1.0)**(-decay)
+        if self.onlineStats_ is None:
+            self.onlineStats_ = stats
+        else:
+            self.onlineStats_ = [(1.0 - eta)*s + eta*b for s, b in zip(self.onlineStats_, stats)]
+
+        gmmFromSuffStats_(self, *self.onlineStats_)
+
+        self.nBlocks_  += 1
+        self.nSamples_ += X.shape[0]
+
+        return self
+
+    def onlineFit(self, blocks, scale = 1, decay = 0.6, refineBlocks = None, verbose = False):
+        """
+        Fit the mixture to a stream of sample blocks (e.g. the hob blocks of
+        ssapy.auctions.simulateAuctionStream(reducer = 'hob', ...)) in memory
+        independent of the number of blocks, see partialFit.
+
+        refineBlocks := optional second pass over the samples (e.g. the same
+                        blocks replayed from disk or a new stream); the exact
+                        sufficient statistics of all of its blocks under the online
+                        estimate are accumulated and the parameters re-estimated
+                        once - one batch EM iteration in constant memory.
+
+        Returns self.
+        """
+        if verbose:
+            print ('starting onlineFit(...)')
+            start = time.time()
+
+        for X in blocks:
+            self.partialFit(X, scale = scale, decay = decay)
+
+        if refineBlocks is not None:
+            total, n = None, 0
+            for X in refineBlocks:
+                X = numpy.atleast_2d(expandArray(X, scale)).astype(numpy.float64)
+                stats = gmmSuffStats_(self, X)
+                if total is None:
+                    total = [s*X.shape[0] for s in stats]
+                else:
+                    total = [t + s*X.shape[0] for t, s in zip(total, stats)]
+                n += X.shape[0]
+
+            if n > 0:
+                self.onlineStats_ = [t/n for t in total]
+                gmmFromSuffStats_(self, *self.onlineStats_)
+
+        if verbose:
+            print ('Finished onlineFit(...) on {0} samples in {1} blocks in {2} seconds'.\
+                   format(self.nSamples_, self.nBlocks_, time.time()-start))
+
+        return self
+
     def pltMarg(self,**kwargs):
-        
+
         oFile    = kwargs.get('oFile')
         nPts     = kwargs.get('nPts',1000)
         minPrice = kwargs.get('minPrice',0)
@@ -316,86 +658,151 @@ class jointGMM(sklearn.mixture.GaussianMixture):
             plt.savefig(fname)
             
             
+    def rect_(self, nPoints = 1024, seed = 0):
+        """
+        Cached mvnRect of the components (standardization and Cholesky factors),
+        rebuilt when the parameters or the point set size/seed change.
+        """
+        cov = getattr(self, 'covariances_', None)
+        if cov is None:
+            cov = self.covars_
+
+        key   = (self.weights_, self.means_, cov)
+        cache = getattr(self, 'rectCache_', None)
+        if cache is not None and all(a is b for a, b in zip(cache[0], key)) and \
+                cache[1].nPoints == nPoints and cache[1].seed == seed:
+            return cache[1]
+
+        w, mu, covs = gmmParams_(self)
+        rect = mvnRect(mu, covs, nPoints, seed)
+        self.rectCache_ = (key, rect)
+
+        return rect
+
+    def rectProb(self, lower, upper, method = 'qmc', nPoints = 1024, seed = 0, **kwargs):
+        """
+        Probability of every box lower <= price <= upper, lower and upper
+        (nBoxes, m) or 1d for a single box, see ssapy.pricePrediction.mvncdf.mvnRect.
+
+        method = 'qmc' shares one quasi random point set of nPoints points (seed)
+        between all boxes and components, 'genz' integrates each with mvndst.
+        """
+        rect = self.rect_(nPoints, seed)
+
+        return numpy.dot(rect(lower, upper, method, **kwargs), numpy.atleast_1d(self.weights_))
+
+    def bundleProb(self, bundles, bids, **kwargs):
+        """
+        Probability of winning exactly each bundle with bids (every good in the
+        bundle priced at or below its bid, every other good above it), without
+        sampling. kwargs as rectProb.
+        """
+        bundles = numpy.atleast_2d(bundles).astype(bool)
+        bids    = numpy.atleast_1d(bids).astype(numpy.float64)
+
+        lower = numpy.where(bundles, -numpy.inf, bids)
+        upper = numpy.where(bundles, bids, numpy.inf)
+
+        return self.rectProb(lower, upper, **kwargs)
+
     def cdf(self, lower, upper,  **kwargs):
-        cdf = 0.0
-        for w, m, c in zip(self.weights_, self.means_, self.covars_):
-            cdf += w*mvnormcdf(lower, upper, m, c, **kwargs)
-            
-        return cdf
-            
+        """
+        P(lower <= price <= upper) of a single box, integrated by mvndst (as mvnormcdf).
+        """
+        return self.rectProb(lower, upper, method = 'genz', **kwargs)[0]
+
+    def margParams_(self):
+        """
+        Cached (weights (K,), means (K,m), marginal variances (K,m)) of the
+        mixture, recomputed when weights_, means_ or the covariances are replaced.
+        Covariances are read from covariances_ (or covars_ of older models) of
+        any covariance_type.
+        """
+        cov = getattr(self, 'covariances_', None)
+        if cov is None:
+            cov = self.covars_
+
+        cache = getattr(self, 'margCache_', None)
+        if cache is not None and cache[0] is self.weights_ and cache[1] is self.means_ and cache[2] is cov:
+            return cache[3]
+
+        w  = numpy.atleast_1d(numpy.asarray(self.weights_, dtype = numpy.float64))
+        mu = numpy.atleast_2d(numpy.asarray(self.means_, dtype = numpy.float64))
+        c  = numpy.asarray(cov, dtype = numpy.float64)
+        K, m = mu.shape
+
+        if c.ndim == 3:
+            var = numpy.diagonal(c, axis1 = 1, axis2 = 2)
+        elif self.covariance_type == 'tied':
+            var = numpy.tile(numpy.diag(c), (K,1))
+        elif self.covariance_type == 'spherical' or c.ndim == 1:
+            var = numpy.tile(c.reshape(K,1), (1,m))
+        else:
+            var = c.reshape(K,m)
+
+        params = (w, mu, var)
+        self.margCache_ = (self.weights_, self.means_, cov, params)
+
+        return params
+
+    def margIdx_(self, margIdx, fnc):
+        margIdx = numpy.asarray(margIdx)
+        m = self.means_.shape[1]
+        if numpy.any(margIdx >= m) or numpy.any(margIdx < 0):
+            raise ValueError("In jointGmm.{0}(...)\n".format(fnc) +\
+                             "margIdx = {0} >= self.means_.shape[1] = {1}".format(margIdx,m))
+        return margIdx
 
     def margParams(self,**kwargs):
         margIdx = kwargs.get('margIdx')
-        if margIdx == None:
+        if margIdx is None:
             raise ValueError("In jointGmm.margParams(...)\n" +\
                               "Must specify margIdx")
-            
-        if margIdx > self.means_.shape[1]:
-            raise ValueError("In jointGmm.margParams(...)\n" +\
-                             "margIdx = {0} > self.means_.shape[1] = {2}".format(margIdx,self.means_.shape[1]))
-        
-        w = self.weights_
-        m = [mean[margIdx] for mean in self.means_]
-        v = [var[margIdx,margIdx] for var in self.covars_]
-        
-        return w, m, v
-    
-    def margCdf(self, x, margIdx):    
-                
-        if isinstance(margIdx,list) or isinstance(margIdx, numpy.ndarray):
-            
-            cdf = numpy.zeros(len(margIdx))
-            
-            for (w,mean,cov) in zip(self.weights_, self.means_, self.covars_):
-                for idx in margIdx:
-                    cdf[idx] += w*norm.cdf(x, loc = mean[margIdx], scale = numpy.sqrt(cov[margIdx,margIdx]))
-                
-            
-            if numpy.any(cdf > 1.0):
-                raise ValueError("In jointGmm.margCdf(...)\n" +\
-                                 "cdf = {0} > 1.0".format(cdf))
-                
-            elif numpy.any(cdf < 0.0):
-                raise ValueError("In jointGmm.margCdf(...)\n" +\
-                                 "cdf ={0} < 0.0".format(cdf))
-                
-        else:
-            if margIdx > self.means_.shape[1]:
-                raise ValueError("In jointGmm.margParams(...)\n" +\
-                                 "margIdx = {0} > self.means_.shape[1] = {1}".format(margIdx,self.means_.shape[1]))
-            cdf = numpy.float(0.0)
-            for (w,mean,cov) in zip(self.weights_, self.means_, self.covars_):
-                cdf += w*norm.cdf(x, loc = mean[margIdx], scale = numpy.sqrt(cov[margIdx, margIdx]))
-            
-            if cdf > 1.001:
-                raise ValueError("In jointGmm.margCdf(...)\n" +\
-                                 "cdf = {0} > 1.0".format(cdf))
-            elif cdf < 0.0:
-                raise ValueError("In jointGmm.margCdf(...)\n" +\
-                                 "cdf ={0} < 0.0".format(cdf))    
-                
-        return cdf
-    
+
+        margIdx = self.margIdx_(margIdx, 'margParams')
+
+        w, mu, var = self.margParams_()
+
+        return w, mu[:,margIdx], var[:,margIdx]
+
+    def margCdf(self, x, margIdx):
+        """
+        Marginal cdf of the goods margIdx at the prices x. x and margIdx may be
+        scalars or arrays and are broadcast against each other, e.g.
+        margCdf(bids, range(m)) evaluates the cdf of every good at its bid.
+        """
+        margIdx = self.margIdx_(margIdx, 'margCdf')
+
+        w, mu, var = self.margParams_()
+
+        z = (numpy.asarray(x, dtype = numpy.float64)[...,None] - mu.T[margIdx])/numpy.sqrt(var.T[margIdx])
+
+        cdf = numpy.dot(ndtr(z), w)
+
+        if numpy.any(cdf > 1.001):
+            raise ValueError("In jointGmm.margCdf(...)\n" +\
+                             "cdf = {0} > 1.0".format(cdf))
+        elif numpy.any(cdf < 0.0):
+            raise ValueError("In jointGmm.margCdf(...)\n" +\
+                             "cdf ={0} < 0.0".format(cdf))
+
+        return cdf[()] if cdf.ndim == 0 else cdf
+
     def margPdf(self, x, margIdx = None):
-            
-        if margIdx > self.means_.shape[1]:
-                raise ValueError("In jointGmm.margPdf(...)\n" +\
-                                 "margIdx = {0} > self.means_.shape[1] = {1}".format(margIdx,self.means_.shape[1]))
-                
-        p = 0.0
-        for (w,mean,cov) in zip(self.weights_, self.means_, self.covars_):
-            p += w*norm.pdf(x, loc = mean[margIdx], scale = numpy.sqrt(cov[margIdx,margIdx]))
-            
-#            if p > 1 + 1.003:
-#                raise ValueError("In jointGmm.margCdf(...)\n" +\
-#                                 "p = {0} > 1.0".format(p))
-            
-            if p < 0.0:
-                raise ValueError("In jointGmm.margCdf(...)\n" +\
-                                 "p = {0} < 0.0".format(p))
-                
-        return p
-        
+        """
+        Marginal density of the goods margIdx at the prices x, broadcast as margCdf.
+        """
+        margIdx = self.margIdx_(margIdx, 'margPdf')
+
+        w, mu, var = self.margParams_()
+
+        sd = numpy.sqrt(var.T[margIdx])
+        z  = (numpy.asarray(x, dtype = numpy.float64)[...,None] - mu.T[margIdx])/sd
+
+        p = numpy.dot(numpy.exp(-0.5*z*z)/(numpy.sqrt(2.0*numpy.pi)*sd), w)
+
+        return p[()] if p.ndim == 0 else p
+
     def totalCorrelationMC(self, nsamples=10000, ntrials = 20, verbose = True):
         
         if verbose:
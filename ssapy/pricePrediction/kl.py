@@ -0,0 +1,162 @@
+"""
+this is /ssapy/pricePrediction/kl.py
+
+Kullback-Leibler divergence between Gaussian mixtures (sklearn GaussianMixture,
+jointGMM, ...) for the SCPP convergence checks:
+
+    closed form KL between the Gaussian components,
+    the variational approximation (Hershey & Olsen 2007),
+    the matched bound approximation (Goldberger et al. 2003) and
+    a vectorized Monte Carlo estimate (log densities as score_samples, also
+    for marginals), optionally with a fixed seed so consecutive checks share
+    their random numbers.
+"""
+import numpy
+from scipy.special import logsumexp
+
+def gmmParams_(gmm, margIdx = None):
+    """
+    (weights, means, full covariances) of a fitted mixture of any covariance_type
+    (covariances_ or covars_ of older models), restricted to the goods margIdx
+    (int or list) if given.
+    """
+    w  = numpy.atleast_1d(numpy.asarray(gmm.weights_, dtype = numpy.float64))
+    mu = numpy.atleast_2d(numpy.asarray(gmm.means_, dtype = numpy.float64))
+    K, m = mu.shape
+
+    cov = getattr(gmm, 'covariances_', None)
+    if cov is None:
+        cov = gmm.covars_
+    cov = numpy.asarray(cov, dtype = numpy.float64)
+    ct  = getattr(gmm, 'covariance_type', 'full')
+    if ct == 'full':
+        cov = cov.reshape(K, m, m)
+    elif ct == 'tied':
+        cov = numpy.tile(cov.reshape(m, m), (K, 1, 1))
+    elif ct == 'diag':
+        cov = numpy.asarray([numpy.diag(c) for c in cov.reshape(K, m)])
+    else:
+        cov = cov.reshape(K, 1, 1)*numpy.eye(m)
+
+    if margIdx is not None:
+        idx = numpy.atleast_1d(margIdx)
+        mu  = mu[:,idx]
+        cov = cov[:,idx][:,:,idx]
+
+    return w, mu, cov
+
+def gaussKL(mu0, cov0, mu1, cov1):
+    """
+    Closed form KL(N(mu0,cov0) || N(mu1,cov1)) between every component of the
+    first (K0,m),(K0,m,m) and every component of the second (K1,m),(K1,m,m) set.
+
+    Returns (K0,K1) array.
+    """
+    mu0, mu1 = numpy.atleast_2d(mu0), numpy.atleast_2d(mu1)
+    m = mu0.shape[1]
+    cov0, cov1 = numpy.reshape(cov0, (-1, m, m)), numpy.reshape(cov1, (-1, m, m))
+
+    inv1 = numpy.linalg.inv(cov1)
+    logdet0 = numpy.linalg.slogdet(cov0)[1]
+    logdet1 = numpy.linalg.slogdet(cov1)[1]
+
+    tr   = numpy.einsum('bij,aji->ab', inv1, cov0)
+    diff = mu1[None,:,:] - mu0[:,None,:]
+    quad = numpy.einsum('abi,bij,abj->ab', diff, inv1, diff)
+
+    return 0.5*(tr + quad - m + logdet1[None,:] - logdet0[:,None])
+
+def variationalKL_(p, q):
+    w, mu, cov = p
+    v, nu, sig = q
+
+    kff = gaussKL(mu, cov, mu, cov)
+    kfg = gaussKL(mu, cov, nu, sig)
+
+    return numpy.dot(w, logsumexp(numpy.log(w)[None,:] - kff, axis = 1) -
+                        logsumexp(numpy.log(v)[None,:] - kfg, axis = 1))
+
+def matchedKL_(p, q):
+    w, mu, cov = p
+    v, nu, sig = q
+
+    cost = gaussKL(mu, cov, nu, sig) - numpy.log(v)[None,:]
+    match = numpy.argmin(cost, 1)
+
+    return numpy.dot(w, cost[numpy.arange(w.shape[0]), match] + numpy.log(w))
+
+def sampleParams_(p, nSamples, rs):
+    """
+    nSamples from the (untruncated) mixture p with RandomState rs.
+    """
+    w, mu, cov = p
+    comp = numpy.searchsorted(numpy.cumsum(w), rs.uniform(0, 1, nSamples)*numpy.sum(w), side = 'right')
+    comp = numpy.minimum(comp, w.shape[0] - 1)
+
+    z = rs.standard_normal((nSamples, mu.shape[1]))
+    chol = numpy.linalg.cholesky(cov)
+
+    return mu[comp] + numpy.einsum('nij,nj->ni', chol[comp], z)
+
+def logPdfParams_(p, X):
+    w, mu, cov = p
+    m = mu.shape[1]
+
+    chol = numpy.linalg.cholesky(cov)
+    logdet = 2.0*numpy.sum(numpy.log(numpy.diagonal(chol, axis1 = 1, axis2 = 2)), 1)
+
+    diff = X[None,:,:] - mu[:,None,:]
+    sol  = numpy.asarray([numpy.linalg.solve(c, d.T).T for c, d in zip(chol, diff)])
+    maha = numpy.sum(sol**2, 2)
+
+    logp = -0.5*(maha + m*numpy.log(2.0*numpy.pi) + logdet[:,None])
+
+    return logsumexp(numpy.log(w)[:,None] + logp, axis = 0)
+
+def mcKL_(p, q, nSamples, seed, samples):
+    if samples is None:
+        rs = numpy.random.RandomState(seed) if not isinstance(seed, numpy.random.RandomState) else seed
+        samples = sampleParams_(p, nSamples, rs)
+
+    return numpy.mean(logPdfParams_(p, samples) - logPdfParams_(q, samples))
+
+def gmmKL(f, g, method = 'variational', margIdx = None, nSamples = 1000, seed = None, samples = None):
+    """
+    KL(f || g) between two fitted Gaussian mixtures.
+
+    INPUTS
+    ------
+    f, g     := fitted mixtures (weights_, means_, covariances_, covariance_type)
+
+    method   := 'variational' - variational approximation, exact for single Gaussians
+                'matched'     - matched bound approximation, an upper bound when the
+                                mixtures are well separated
+                'mc'          - Monte Carlo estimate with nSamples samples of f
+
+    margIdx  := (int or list) KL between the marginals of these goods
+
+    seed     := (int or RandomState) of the Monte Carlo samples; a fixed seed reuses
+                the same random numbers so the estimates of consecutive checks differ
+                only through the models.
+
+    samples  := (2d array-like) samples of f to use instead of drawing them
+    """
+    p = gmmParams_(f, margIdx)
+    q = gmmParams_(g, margIdx)
+
+    if method == 'variational':
+        return variationalKL_(p, q)
+    elif method == 'matched':
+        return matchedKL_(p, q)
+    elif method == 'mc':
+        return mcKL_(p, q, nSamples, seed, samples)
+    else:
+        raise ValueError("gmmKL(...) - Unknown method {0}".format(method))
+
+def symmetricGmmKL(f, g, method = 'variational', margIdx = None, nSamples = 1000, seed = None):
+    """
+    KL(f || g) + KL(g || f), see gmmKL. With a fixed seed both directions use
+    the same underlying random numbers.
+    """
+    return gmmKL(f, g, method, margIdx, nSamples, seed) + \
+           gmmKL(g, f, method, margIdx, nSamples, seed)
@@ -10,6 +10,11 @@ import matplotlib.pyplot as plt
 import itertools
 import time
 
+from ssapy.util import expandArray
+from ssapy.pricePrediction.modelSelection import aicSelect
+from ssapy.pricePrediction.kl import gmmParams_
+from ssapy.pricePrediction.truncSample import truncGmmSample
+
 class igmm(object):
     """
     A wrapper to store independent mixtures for each dimension
@@ -26,12 +31,11 @@ class igmm(object):
             self.gmmlist = [sklearn.mixture.GaussianMixture(n_components    = kwargs.get('n_components',1),
                                               covariance_type = kwargs.get('covariance_type','diag'),
                                               random_state    = kwargs.get('random_state',None),
-                                              thresh           = kwargs.get('thresh', 1e-2),
-                                              min_covar       = kwargs.get('min_covar',1e-3),
-                                              n_iter          = kwargs.get('n_iter',100),
+                                              tol             = kwargs.get('thresh', 1e-2),
+                                              reg_covar       = kwargs.get('min_covar',1e-3),
+                                              max_iter        = kwargs.get('n_iter',100),
                                               n_init          = kwargs.get('n_init',1),
-                                              params          = kwargs.get('params','wmc'),
-                                              init_params     = kwargs.get('init_params','wmc')) for d in range(self.m)]
+                                              init_params     = kwargs.get('init_params','kmeans')) for d in range(self.m)]
             
     def sample(self,**kwargs):
         minPrice = kwargs.get('minPrice', self.minPrice)
@@ -45,14 +49,9 @@ class igmm(object):
         samples = numpy.zeros((n_samples,self.m))
         
         for d in range(self.m):
-            gmm = self.gmmlist[d]
-            cnt = 0
-            while cnt < n_samples:
-                s = gmm.sample(1)
-                if s > minPrice and s < maxPrice:
-                    samples[cnt,d] = s
-                    cnt += 1
-                     
+            w, mu, covs = gmmParams_(self.gmmlist[d])
+            samples[:,d] = truncGmmSample(w, mu, covs, n_samples, minPrice, maxPrice)[:,0]
+            
         return samples
     
     def d(self):
@@ -68,7 +67,17 @@ class igmm(object):
     
     def aicFit(self, X = None, compRange = numpy.arange(5,21), 
                min_covar = 0.1, n_iter = 100, n_init = 1, thresh = 0.01,
-               verbose = True):
+               verbose = True, scale = 1, 
+               pool = None, nProcs = 1, threads = False, patience = None):
+        """
+        Fit an independent mixture to each dimension of X by minimum AIC.
+        
+        X may be float64, float32 or (scaled) integer samples, see jointGMM.aicFit.
+        
+        pool, nProcs, threads and patience control concurrent fitting of
+        the candidates, see ssapy.pricePrediction.modelSelection.aicSelect.
+        """
+        X = expandArray(X, scale)
         
         if verbose:
             print('starting aicFit(...)')
@@ -78,6 +87,10 @@ class igmm(object):
             
         m = X.shape[1]
         
+        if self.gmmlist == None:
+            self.m = m
+            self.gmmlist = [None]*m
+        
         minAicList = []
         nCompList = []
         for d in range(m):
@@ -85,15 +98,14 @@ class igmm(object):
                 print('Fitting dimension {0}'.format(d))
             clfList = [sklearn.mixture.GaussianMixture(n_components    = c,
                                            covariance_type = 'diag',
-                                           min_covar       = min_covar,
-                                           thresh          = thresh,
-                                           n_iter          = n_iter,
+                                           reg_covar       = min_covar,
+                                           tol             = thresh,
+                                           max_iter        = n_iter,
                                            n_init          = n_init)\
                                            for c in compRange] 
                                        
-            [clf.fit(X[:,d]) for clf in clfList]
-            
-            aicList = [clf.aic(X) for clf in clfList]
+            clfList, aicList = aicSelect(clfList, X[:,[d]], pool = pool, nProcs = nProcs,
+                                         threads = threads, patience = patience)
         
             argMinAic = numpy.argmin(aicList)
             
@@ -0,0 +1,185 @@
+"""
+this is /ssapy/pricePrediction/margSurplus.py
+
+Exact expected surplus of bids under independent marginal histogram price
+predictions (margDistSCPP, the marginals of a dokHist or a list of
+(hist, binEdges) tuples). The price of a good is uniform within each bin
+(zero width bins are point masses), so per good
+
+    P(price <= bid)         - the cdf at the bid
+    E[price; price <= bid]  - the truncated expected cost
+
+are piecewise closed forms, evaluated for every bid of a batch at once.
+"""
+import numpy
+
+from ssapy.util import listBundles, bundles2codes, revenueTable
+from ssapy.util.revenue import isRevenueFunction
+
+def histBins(hist, binEdges, density = True):
+    """
+    (lower, upper, mass) of the bins of a marginal histogram. hist holds
+    densities per bin (as numpy.histogram(..., density = True), e.g. the
+    margDistSCPP data), the mass of a bin being its density times its width
+    (1 for zero width bins), or with density = False counts per bin, which
+    are the masses. The masses are normalized to sum to one.
+    """
+    hist     = numpy.atleast_1d(numpy.asarray(hist, dtype = numpy.float64))
+    binEdges = numpy.atleast_1d(numpy.asarray(binEdges, dtype = numpy.float64))
+
+    lower, upper = binEdges[:-1], binEdges[1:]
+
+    if density:
+        width = upper - lower
+        mass  = hist*numpy.where(width > 0, width, 1.0)
+    else:
+        mass  = hist
+
+    z = numpy.sum(mass)
+    if z <= 0.0:
+        raise ValueError("histBins(...) - histogram has no mass.")
+
+    return lower, upper, mass/z
+
+def dokHistBins(hist):
+    """
+    (lower, upper, mass) of the occupied bins of a 1d dokHist, the mass of a 
+    bin being its density times its width (1 for zero width bins) as in 
+    dokHist.density.
+    """
+    if hist.dim() != 1:
+        raise ValueError("dokHistBins(...) - hist.dim() = {0} != 1".format(hist.dim()))
+    
+    ranges = numpy.asarray([k[0] for k in hist.c.keys()], dtype = numpy.float64).reshape(-1,2)
+    counts = numpy.asarray(list(hist.c.values()), dtype = numpy.float64)
+    
+    width = ranges[:,1] - ranges[:,0]
+    if hist.isdensity:
+        mass = counts*numpy.where(width > 0, width, 1.0)
+    elif counts.shape[0]:
+        mass = counts/hist.counts_accum
+    else:
+        mass = counts
+    
+    return ranges[:,0], ranges[:,1], mass
+
+def margBins(pricePrediction):
+    """
+    List of (lower, upper, mass) bins, one per good, of a margDistSCPP (data),
+    a dokHist (its marginals, see dokHistBins) or a list of (hist, binEdges) tuples.
+    """
+    if hasattr(pricePrediction, 'marginal') and hasattr(pricePrediction, 'c'):
+        if pricePrediction.dim() == 1:
+            return [dokHistBins(pricePrediction)]
+        return [dokHistBins(pricePrediction.marginal(d)) for d in range(pricePrediction.dim())]
+
+    data = getattr(pricePrediction, 'data', pricePrediction)
+
+    return [histBins(hist, binEdges) for hist, binEdges in data]
+
+def binFraction_(bins, x):
+    """
+    Fraction of each bin at or below the prices x, shape x.shape + (nBins,).
+    """
+    lower, upper, mass = bins
+    x = numpy.asarray(x, dtype = numpy.float64)[...,None]
+
+    width = upper - lower
+    with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+        t = numpy.where(width > 0, numpy.clip((x - lower)/width, 0.0, 1.0), x >= lower)
+
+    return t
+
+def binCdf(bins, x):
+    """
+    P(price <= x) of the marginal bins (see histBins), broadcast over x.
+    """
+    return numpy.dot(binFraction_(bins, x), bins[2])
+
+def binPartialMean(bins, x):
+    """
+    Truncated expected cost E[price; price <= x] of the marginal bins,
+    broadcast over x.
+    """
+    lower, upper, mass = bins
+    t = binFraction_(bins, x)
+
+    return numpy.dot(t*(lower + 0.5*t*(upper - lower)), mass)
+
+def revenueCodes_(revenue, bundles, m):
+    """
+    Revenue of every bundle of m goods indexed by bundle code.
+    """
+    if isRevenueFunction(revenue):
+        return numpy.asarray(revenue.evaluate(numpy.arange(2**m)), dtype = numpy.float64)
+    elif bundles is None and not isinstance(revenue, dict):
+        return numpy.asarray(revenue, dtype = numpy.float64)
+
+    return numpy.asarray(revenueTable(bundles, revenue), dtype = numpy.float64)
+
+def margExpectedSurplus(pricePrediction, bundles, revenue, bids, ret = 'surplus'):
+    """
+    Expected surplus of bids when the closing prices are independent with the
+    marginal histograms of pricePrediction and a good is won when its price is
+    at or below its bid:
+
+        sum_bundles revenue(bundle) P(win exactly bundle) - sum_i E[price_i; price_i <= bids_i]
+
+    INPUTS
+    ------
+    pricePrediction := margDistSCPP, dokHist or list of (hist, binEdges), see margBins;
+                       or a list of bins already computed by margBins.
+
+    bundles         := (2d array-like) bundles (None for a revenue object, dict or table)
+
+    revenue         := revenue per bundle, bundleRevenueDict, revenue table or
+                       revenue object (ssapy.util.revenue)
+
+    bids            := (1d array-like, m) a bid vector or
+                       (2d array-like, (nBids, m)) a batch of candidate bid vectors
+
+    ret             := 'surplus' - expected surplus
+                       'all'     - (expected surplus, expected revenue, expected cost,
+                                    win probabilities (nBids, m))
+
+    OUTPUTS
+    -------
+    float for a single bid vector, (nBids,) array for a batch.
+    """
+    bids   = numpy.asarray(bids, dtype = numpy.float64)
+    single = bids.ndim == 1
+    bids   = numpy.atleast_2d(bids)
+    m      = bids.shape[1]
+
+    if isinstance(pricePrediction, list) and all(isinstance(b, tuple) and len(b) == 3 for b in pricePrediction):
+        bins = pricePrediction
+    else:
+        bins = margBins(pricePrediction)
+
+    if len(bins) != m:
+        raise ValueError("margExpectedSurplus(...) - {0} marginals != {1} goods".format(len(bins), m))
+
+    pwin = numpy.column_stack([binCdf(b, bids[:,i]) for i, b in enumerate(bins)])
+    cost = numpy.sum([binPartialMean(b, bids[:,i]) for i, b in enumerate(bins)], 0)
+
+    allBundles = listBundles(m)
+    rev = revenueCodes_(revenue, bundles, m)[bundles2codes(allBundles)]
+
+    pwin = numpy.clip(pwin, 0.0, 1.0)
+    with numpy.errstate(divide = 'ignore'):
+        logWin, logLose = numpy.log(pwin), numpy.log1p(-pwin)
+
+    # (nBids, nBundles) independent product over the bundle table
+    logp = numpy.where(allBundles[None,:,:], logWin[:,None,:], logLose[:,None,:]).sum(2)
+    expRev = numpy.dot(numpy.exp(logp), rev)
+
+    es = expRev - cost
+
+    if ret == 'surplus':
+        return es[0] if single else es
+    elif ret == 'all':
+        if single:
+            return es[0], expRev[0], cost[0], pwin[0]
+        return es, expRev, cost, pwin
+    else:
+        raise ValueError("margExpectedSurplus(...) - Unknown return type {0}".format(ret))
@@ -0,0 +1,109 @@
+"""
+this is /ssapy/pricePrediction/modelSelection.py
+
+Minimum AIC selection among candidate mixture models shared by the aicFit
+methods (jointGMM, hgmm, igmm, ssapy.pricePrediction.util.aicFit). Candidates
+are fit concurrently on a process or thread pool, optionally reusing the pool
+of the simulation (see ssapy.auctions.simulateAuctionStream(pool = ...)).
+"""
+import numpy
+import multiprocessing
+import multiprocessing.pool
+
+def aicFitWorker_(args):
+    clf, X = args
+
+    clf.fit(X)
+
+    return clf, clf.aic(X)
+
+def aicSelect(clfList, X, pool = None, nProcs = 1, threads = False, patience = None):
+    """
+    Fit every unfitted mixture in clfList to X and score it by AIC.
+
+    INPUTS
+    ------
+    clfList  := (list) unfitted sklearn.mixture.GaussianMixture candidates, e.g.
+                one per number of components in increasing order.
+
+    X        := (2d array-like) samples
+
+    pool     := pool with a map method (multiprocessing.Pool or ThreadPool) the
+                candidates are fit on; it is not closed.
+
+    nProcs   := (int) if pool is None and nProcs > 1 a pool of nProcs workers is
+                created for the fit.
+
+    threads  := (bool) that pool is a ThreadPool instead of a process pool.
+
+    patience := (int) stop fitting candidates once AIC has risen for patience
+                consecutive candidates (None: fit every candidate). With a pool
+                the candidates are fit in rounds of one candidate per worker and
+                the cutoff is checked after each round.
+
+    OUTPUTS
+    -------
+    (clfList, aicList) - the fitted candidates and their AIC, truncated to the
+                         candidates fit if the cutoff was reached.
+    """
+    ownPool = pool is None and nProcs > 1 and len(clfList) > 1
+    if ownPool:
+        if threads:
+            pool = multiprocessing.pool.ThreadPool(min(nProcs, len(clfList)))
+        else:
+            pool = multiprocessing.Pool(min(nProcs, len(clfList)))
+
+    if pool is None:
+        roundSize = 1
+    elif patience is None:
+        roundSize = max(len(clfList), 1)
+    else:
+        roundSize = max(getattr(pool, '_processes', nProcs), 1)
+
+    fitted, aicList = [], []
+    try:
+        for start in range(0, len(clfList), roundSize):
+            args = [(clf, X) for clf in clfList[start:start + roundSize]]
+
+            if pool is None:
+                results = [aicFitWorker_(a) for a in args]
+            else:
+                results = pool.map(aicFitWorker_, args)
+
+            for clf, aic in results:
+                fitted.append(clf)
+                aicList.append(aic)
+
+            if patience is not None and risingRun_(aicList) >= patience:
+                break
+    finally:
+        if ownPool:
+            pool.close()
+            pool.join()
+
+    if patience is not None:
+        n = cutoff_(aicList, patience)
+        fitted, aicList = fitted[:n], aicList[:n]
+
+    return fitted, aicList
+
+def risingRun_(aicList):
+    """
+    Number of consecutive increases of AIC at the end of aicList.
+    """
+    d = numpy.diff(aicList) > 0
+    if not numpy.any(~d):
+        return d.shape[0]
+    return d.shape[0] - 1 - numpy.flatnonzero(~d)[-1]
+
+def cutoff_(aicList, patience):
+    """
+    Number of candidates the serial search would have fit: up to the first
+    candidate ending a run of patience consecutive increases.
+    """
+    run = 0
+    for i in range(1, len(aicList)):
+        run = run + 1 if aicList[i] > aicList[i-1] else 0
+        if run >= patience:
+            return i + 1
+    return len(aicList)
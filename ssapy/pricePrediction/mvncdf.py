@@ -79,8 +79,15 @@ a wrapper for scipy.stats.kde.mvndst
 import numpy as np
 import scipy
 import scipy.stats
+from scipy.special import ndtr, ndtri
 #from scipy.stats import kde
 
+# the fortran mvndst wrapper moved from scipy.stats.kde.mvn to scipy.stats._mvn
+try:
+    from scipy.stats import _mvn as mvn
+except ImportError:
+    from scipy.stats.kde import mvn
+
 informcode = {0: 'normal completion with ERROR < EPS',
               1: '''completion with ERROR > EPS and MAXPTS function values used;
                     increase MAXPTS to decrease ERROR;''',
@@ -156,7 +163,7 @@ def mvstdnormcdf(lower, upper, corrcoef, **kwds):
     upper = np.array(upper)
     corrcoef = np.array(corrcoef)
     
-    correl = np.zeros(n*(n-1)/2.0)  #dtype necessary?
+    correl = np.zeros(n*(n-1)//2)
     
     if (lower.ndim != 1) or (upper.ndim != 1):
         raise ValueError('can handle only 1D bounds')
@@ -165,14 +172,12 @@ def mvstdnormcdf(lower, upper, corrcoef, **kwds):
     if n==2 and corrcoef.size==1:
         correl = corrcoef
         #print 'case scalar rho', n
-    elif corrcoef.ndim == 1 and len(corrcoef) == n*(n-1)/2.0:
+    elif corrcoef.ndim == 1 and len(corrcoef) == n*(n-1)//2:
         #print 'case flat corr', corrcoeff.shape
         correl = corrcoef
     elif corrcoef.shape == (n,n):
         #print 'case square corr',  correl.shape
-        for ii in range(n):
-            for jj in range(ii):
-                correl[ jj + ((ii-2)*(ii-1))/2] = corrcoef[ii,jj]
+        correl = packCorrel_(corrcoef)
     else:
         raise ValueError('corrcoef has incorrect dimension')
 
@@ -182,7 +187,7 @@ def mvstdnormcdf(lower, upper, corrcoef, **kwds):
 
     lowinf = np.isneginf(lower)
     uppinf = np.isposinf(upper)
-    infin = 2.0*np.ones(n)
+    infin = 2*np.ones(n, dtype = int)
     
     np.putmask(infin,lowinf,0)# infin.putmask(0,lowinf)
     np.putmask(infin,uppinf,1) #infin.putmask(1,uppinf)
@@ -196,7 +201,7 @@ def mvstdnormcdf(lower, upper, corrcoef, **kwds):
     #print lower,',',upper,',',infin,',',correl
     #print correl.shape
     #print kwds.items()
-    error, cdfvalue, inform = scipy.stats.kde.mvn.mvndst(lower,upper,infin,correl,**kwds)
+    error, cdfvalue, inform = mvn.mvndst(lower,upper,infin,correl,**kwds)
     if inform:
         print('something wrong', informcode[inform], error)
     return cdfvalue
@@ -257,6 +262,127 @@ def mvnormcdf(lower, upper, mu, cov, **kwds):
     return mvstdnormcdf(lower, upper, corr, **kwds)
 
 
+def packCorrel_(corr):
+    """
+    Strictly lower triangular correlations stacked by rows, the CORREL
+    layout of mvndst: CORREL(J + ((I-2)*(I-1))/2) = corr(I,J) for J < I (1-based).
+    """
+    corr = np.asarray(corr)
+    return corr[np.tril_indices(corr.shape[0], -1)]
+
+class mvnRect(object):
+    """
+    Rectangle probabilities P(lower <= X <= upper) of a set of multivariate
+    normal components N(means[k], covs[k]) for many boxes at once.
+
+    The standardization of every component (standard deviations, packed
+    correlations for mvndst and the Cholesky factor) is computed once on
+    construction and reused by every call.
+
+    method = 'genz' integrates each (box, component) with mvndst (as mvnormcdf),
+    method = 'qmc' uses Genz's separation of variables transform on one shared,
+    randomly shifted Sobol point set for every box and component: the estimates
+    are deterministic given seed and smooth in the box limits, which suits
+    comparing the win probabilities of many bids.
+    """
+    def __init__(self, means, covs, nPoints = 1024, seed = 0):
+        self.means = np.atleast_2d(np.asarray(means, dtype = np.float64))
+        K, m = self.means.shape
+        self.covs  = np.asarray(covs, dtype = np.float64).reshape(K, m, m)
+
+        self.stdev  = np.sqrt(np.diagonal(self.covs, axis1 = 1, axis2 = 2))
+        corr        = self.covs/self.stdev[:,:,None]/self.stdev[:,None,:]
+        self.correl = [packCorrel_(c) for c in corr]
+        self.chol   = np.linalg.cholesky(self.covs)
+
+        self.nPoints = nPoints
+        self.seed    = seed
+        self.points_ = None
+
+    def points(self):
+        """
+        The shared quasi random point set, shape (nPoints, m-1).
+        """
+        if self.points_ is None:
+            m = self.means.shape[1]
+            if m == 1:
+                self.points_ = np.zeros((1,0))
+            else:
+                try:
+                    from scipy.stats import qmc
+                    self.points_ = qmc.Sobol(m - 1, scramble = True, seed = self.seed).random(self.nPoints)
+                except ImportError:
+                    self.points_ = np.random.RandomState(self.seed).uniform(size = (self.nPoints, m - 1))
+        return self.points_
+
+    def __call__(self, lower, upper, method = 'qmc', **kwds):
+        """
+        lower, upper := (nBoxes, m) box limits (1d for a single box), may contain +/- inf
+
+        returns (nBoxes, K) probabilities
+        """
+        lower = np.atleast_2d(np.asarray(lower, dtype = np.float64))
+        upper = np.atleast_2d(np.asarray(upper, dtype = np.float64))
+        lower, upper = np.broadcast_arrays(lower, upper)
+
+        if method == 'genz':
+            return self.genz_(lower, upper, **kwds)
+        elif method == 'qmc':
+            return self.qmc_(lower, upper)
+        else:
+            raise ValueError("mvnRect - Unknown method {0}".format(method))
+
+    def genz_(self, lower, upper, **kwds):
+        B, m = lower.shape
+        K = self.means.shape[0]
+
+        if not 'maxpts' in kwds and m > 2:
+            kwds['maxpts'] = 10000*m
+
+        prob = np.zeros((B, K))
+        for k in range(K):
+            lo = (lower - self.means[k])/self.stdev[k]
+            up = (upper - self.means[k])/self.stdev[k]
+
+            lowinf = np.isneginf(lo)
+            uppinf = np.isposinf(up)
+            infin  = 2*np.ones((B, m), dtype = int)
+            infin[lowinf] = 0
+            infin[uppinf] = 1
+            infin[lowinf & uppinf] = -1
+
+            for b in range(B):
+                error, prob[b,k], inform = mvn.mvndst(lo[b], up[b], infin[b], self.correl[k], **kwds)
+
+        return prob
+
+    def qmc_(self, lower, upper):
+        B, m = lower.shape
+        K = self.means.shape[0]
+
+        u = self.points()
+        N = u.shape[0]
+
+        prob = np.zeros((B, K))
+        for k in range(K):
+            L  = self.chol[k]
+            lo = lower - self.means[k]
+            up = upper - self.means[k]
+
+            f = np.ones((B, N))
+            y = np.zeros((B, N, m))
+            for i in range(m):
+                shift = np.dot(y[:,:,:i], L[i,:i])
+                d = ndtr((lo[:,i,None] - shift)/L[i,i])
+                e = ndtr((up[:,i,None] - shift)/L[i,i])
+                f *= e - d
+                if i < m - 1:
+                    y[:,:,i] = ndtri(np.clip(d + u[:,i]*(e - d), 1e-16, 1 - 1e-16))
+
+            prob[:,k] = np.mean(f, 1)
+
+        return prob
+
 if __name__ == "__main__":
 
     lower,upper,corrcoef = [0.0,0.0],[1.0,1.0],[0.99]
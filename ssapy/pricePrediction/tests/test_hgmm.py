@@ -0,0 +1,34 @@
+import unittest
+import numpy
+
+from ssapy.pricePrediction.hgmm import hgmm
+
+class test_hgmm(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        X = numpy.vstack((numpy.random.normal(0.5, 1, (300,2)), numpy.random.normal(20, 3, (300,2))))
+        
+        self.clf = hgmm(n_components = 2, random_state = 0)
+        self.clf.fit(X)
+        self.clf.p0 = 0.3
+        
+    def test_sample(self):
+        s = self.clf.sample(n_samples = 20000)
+        self.assertEqual(s.shape, (20000, 2))
+        
+        zero = numpy.all(s == 0, 1)
+        self.assertAlmostEqual(numpy.mean(zero), 0.3, delta = 0.015)
+        self.assertTrue(numpy.all(s[~zero] > 0))
+        
+        # a fixed random state reproduces the draw
+        numpy.testing.assert_array_equal(self.clf.sample(n_samples = 20000), s)
+        
+        s = self.clf.sample(n_samples = 1000, maxPrice = 10, random_state = 1)
+        self.assertTrue(numpy.all(s <= 10))
+        self.assertTrue(self.clf.sampleStats_['accept'] < 1.0)
+        
+        self.clf.p0 = 1.0
+        numpy.testing.assert_array_equal(self.clf.sample(n_samples = 10), numpy.zeros((10,2)))
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -33,6 +33,164 @@ class test_jointGMM(unittest.TestCase):
         numpy.testing.assert_equal(expectedSurplus_(bundleRevenueDict, bids, samples), 
                                    3.5,'test_expetedSurplus failed.',True)
         
+    def test_aicFitCompactDtype(self):
+        """
+        Fitting scaled int16 samples (prices in cents) should give the
+        same model as fitting the float64 prices.
+        """
+        numpy.random.seed(0)
+        X = numpy.vstack((numpy.random.normal(10,1,(200,2)),
+                          numpy.random.normal(30,2,(200,2))))
+        X = numpy.round(X,2)
+        
+        gmm64 = jointGMM(random_state = 0)
+        gmm64.aicFit(X = X, compRange = [1,2,3], verbose = False)
+        
+        gmm16 = jointGMM(random_state = 0)
+        gmm16.aicFit(X = (X*100).astype(numpy.int16), scale = 100, 
+                     compRange = [1,2,3], verbose = False)
+        
+        self.assertEqual(gmm16.n_components, gmm64.n_components)
+        numpy.testing.assert_allclose(numpy.sort(gmm16.means_,0), 
+                                      numpy.sort(gmm64.means_,0), rtol = 1e-3)
+        
+    def test_aicFitIncremental(self):
+        """
+        Refitting a new sample of the same distribution warm started from the
+        previous fit finds the same model as the full aicFit search while
+        fitting only a window of component counts.
+        """
+        numpy.random.seed(0)
+        def draw(n):
+            return numpy.vstack([numpy.random.multivariate_normal(m, numpy.eye(3)*s, n)
+                                 for m,s in [([10,10,10],1),([30,20,10],4),([20,35,25],2),([40,40,40],3)]])
+
+        compRange = numpy.arange(2,12)
+
+        prev = jointGMM(random_state = 0, min_covar = 0.1)
+        prev.aicFit(X = draw(300), compRange = compRange, verbose = False)
+
+        X = draw(300)
+
+        full = jointGMM(random_state = 0, min_covar = 0.1)
+        clf, aicFull, r = full.aicFit(X = X, compRange = compRange, verbose = False)
+
+        inc = jointGMM(random_state = 0, min_covar = 0.1)
+        clf, aicInc, r = inc.aicFitIncremental(X = X, compRange = compRange, prev = prev, verbose = False)
+
+        self.assertEqual(inc.n_components, full.n_components)
+        self.assertLess(len(r), len(compRange))
+        numpy.testing.assert_allclose(numpy.min(aicInc), numpy.min(aicFull), rtol = 1e-3)
+
+        # a too small previous model: the window widens until aic gets worse
+        small = jointGMM(random_state = 0, n_components = 1)
+        small.fit(X)
+        clf, aicInc, r = small.aicFitIncremental(X = X, compRange = compRange, verbose = False)
+
+        self.assertGreaterEqual(small.n_components, 4)
+        self.assertGreater(aicInc[-1], numpy.min(aicInc))
+
+        # with patience 2 the widening goes on past the first increase of aic
+        small = jointGMM(random_state = 0, n_components = 1)
+        small.fit(X)
+        clf, aicPat, rPat = small.aicFitIncremental(X = X, compRange = compRange, verbose = False, patience = 2)
+
+        self.assertEqual(len(rPat), len(r) + 1)
+        self.assertGreater(aicPat[-1], aicPat[-2])
+        self.assertGreater(aicPat[-2], numpy.min(aicPat))
+
+        # the window fit on a thread pool matches the serial fit
+        clf, aicInc, r = inc.aicFitIncremental(X = X, compRange = compRange, prev = prev, verbose = False)
+        clf, aicThr, rThr = jointGMM(random_state = 0, min_covar = 0.1).\
+            aicFitIncremental(X = X, compRange = compRange, prev = prev, verbose = False, nProcs = 2, threads = True)
+
+        numpy.testing.assert_array_equal(rThr, r)
+        numpy.testing.assert_allclose(aicThr, aicInc)
+
+    def test_onlineFit(self):
+        """
+        Online em over blocks approaches the batch fit of all samples,
+        the refinement pass is one exact batch em iteration.
+        """
+        numpy.random.seed(0)
+        def draw(n):
+            return numpy.vstack([numpy.random.multivariate_normal(m, numpy.eye(3)*s, n)
+                                 for m,s in [([10,10,10],1),([30,20,10],4),([20,35,25],2)]])
+        blocks = [draw(100) for i in range(20)]
+        X = numpy.vstack(blocks)
+
+        for covariance_type in ['full', 'diag']:
+            batch = jointGMM(n_components = 3, random_state = 0, covariance_type = covariance_type).fit(X)
+
+            online = jointGMM(n_components = 3, random_state = 0, covariance_type = covariance_type)
+            online.onlineFit(iter(blocks))
+
+            self.assertEqual(online.nBlocks_, 20)
+            self.assertEqual(online.nSamples_, X.shape[0])
+            self.assertAlmostEqual(online.score(X), batch.score(X), places = 2)
+            numpy.testing.assert_allclose(numpy.sort(online.means_,0), numpy.sort(batch.means_,0), atol = 0.2)
+
+            online.onlineFit([], refineBlocks = blocks)
+            self.assertGreaterEqual(online.score(X), batch.score(X) - 1e-4)
+
+        # compact (scaled integer) blocks
+        compact = jointGMM(n_components = 3, random_state = 0)
+        compact.onlineFit([numpy.round(b*100).astype(numpy.int32) for b in blocks], scale = 100)
+        numpy.testing.assert_allclose(numpy.sort(compact.means_,0), numpy.sort(online.means_,0), atol = 0.2)
+
+    def test_margCdfPdf(self):
+        """
+        Broadcast marginal cdf/pdf match the per component scipy.stats.norm sums
+        for every covariance type.
+        """
+        from scipy.stats import norm
+        numpy.random.seed(0)
+        X = numpy.random.rand(300,3)*50
+        xx = numpy.linspace(-5,55,7)
+
+        for covariance_type in ['full', 'diag', 'tied', 'spherical']:
+            gmm = jointGMM(n_components = 3, covariance_type = covariance_type, random_state = 0).fit(X)
+            w, mu, var = gmm.margParams_()
+
+            cdf = numpy.zeros((xx.shape[0],3))
+            pdf = numpy.zeros((xx.shape[0],3))
+            for j in range(3):
+                for k in range(3):
+                    cdf[:,j] += w[k]*norm.cdf(xx, mu[k,j], numpy.sqrt(var[k,j]))
+                    pdf[:,j] += w[k]*norm.pdf(xx, mu[k,j], numpy.sqrt(var[k,j]))
+
+                numpy.testing.assert_allclose(gmm.margCdf(xx, j), cdf[:,j])
+                self.assertAlmostEqual(gmm.margPdf(xx[3], j), pdf[3,j])
+
+            numpy.testing.assert_allclose(gmm.margCdf(xx[:,None], [0,1,2]), cdf)
+            numpy.testing.assert_allclose(gmm.margPdf(xx[:,None], numpy.arange(3)), pdf)
+            numpy.testing.assert_allclose(gmm.margCdf(xx[:3], [0,1,2]), numpy.diag(cdf[:3]))
+
+            self.assertTrue(gmm.margParams_() is gmm.margParams_())
+
+        with self.assertRaises(ValueError):
+            gmm.margCdf(1.0, 3)
+
+    def test_bundleProb(self):
+        """
+        Sample free bundle win probabilities match the frequencies of samples.
+        """
+        import sklearn.mixture
+        numpy.random.seed(0)
+        gmm = jointGMM(n_components = 3, random_state = 0).fit(numpy.random.rand(1000,3)*50)
+
+        bids = [20.,30.,25.]
+        bundles = listBundles(3)
+        p = gmm.bundleProb(bundles, bids)
+
+        self.assertAlmostEqual(numpy.sum(p), 1.0)
+        self.assertAlmostEqual(p[-1], gmm.cdf(-numpy.inf, bids), places = 3)
+
+        samples = sklearn.mixture.GaussianMixture.sample(gmm, 100000)[0]
+        won = samples <= bids
+        freq = [numpy.mean(numpy.all(won == b, 1)) for b in bundles.astype(bool)]
+        numpy.testing.assert_allclose(p, freq, atol = 5e-3)
+
 #    def test_sample(self):
 #        gmm = jointGMM()
 #        gmm.means_ = [[ 48.41402471,  30.5908699 ],
@@ -116,25 +274,31 @@ class test_jointGMM(unittest.TestCase):
         jgmm = jointGMM(n_components = 2)
         jgmm.weights_ = weights
         jgmm.means_ = means
-        jgmm.covars_ = covars
+        jgmm.covariances_ = covars
+        jgmm.precisions_cholesky_ = numpy.asarray([numpy.linalg.inv(numpy.linalg.cholesky(c)).T for c in covars])
         
         N = 100
-        xmin = 0
+        xmin = -10
         xmax = 30
         xx, ds = numpy.linspace(xmin, xmax, N, retstep = True)
-    
-        p = numpy.zeros((N,N))
         
-        c_fnc = numpy.zeros((N,N))
+        # midpoint rule on a 16x finer grid, summed into the cells below each grid point
+        nSub = 16
+        h = ds/nSub
+        mid = numpy.arange(xmin + 0.5*h, xmax, h)[:(N-1)*nSub]
+        X1, X2 = numpy.meshgrid(mid, mid, indexing = 'ij')
+        p = numpy.exp(jgmm.score_samples(numpy.column_stack((X1.ravel(), X2.ravel())))).reshape(X1.shape)*h*h
+        p = p.reshape(N-1, nSub, N-1, nSub).sum(axis = (1,3))
+        
         c_apprx = numpy.zeros((N,N))
+        c_apprx[1:,1:] = numpy.cumsum(numpy.cumsum(p, 0), 1)
         
+        c_fnc = numpy.zeros((N,N))
         for i, x1 in enumerate(xx):
             for j, x2 in enumerate(xx):
-                p[i,j] = numpy.exp(jgmm.score(numpy.atleast_2d([x1,x2])))*ds*ds
-                c_apprx[i,j] = numpy.sum(p[:i,:j])
                 c_fnc[i,j] = jgmm.cdf(-numpy.inf,[x1,x2])
                 
-        viz = True  
+        viz = False
         if viz:
             import matplotlib.pyplot as plt
             plt.figure()
@@ -147,7 +311,7 @@ class test_jointGMM(unittest.TestCase):
             plt.colorbar()
             plt.show()
             
-        numpy.testing.assert_array_almost_equal(c_fnc, c_apprx, err_msg = "approximate and analytical cdf don't match" )
+        numpy.testing.assert_array_almost_equal(c_fnc, c_apprx, decimal = 5, err_msg = "approximate and analytical cdf don't match" )
         
         
         
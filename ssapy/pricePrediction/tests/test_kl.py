@@ -0,0 +1,62 @@
+import unittest
+import numpy
+import sklearn.mixture
+
+from ssapy.pricePrediction.kl import gaussKL, gmmKL, symmetricGmmKL
+from ssapy.pricePrediction.util import apprxJointGmmKL, apprxMargKL
+
+class test_kl(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        X = numpy.vstack([numpy.random.multivariate_normal(m, numpy.eye(3)*s, 300)
+                          for m,s in [([10,10,10],1),([30,20,10],4),([20,35,25],2)]])
+        self.f = sklearn.mixture.GaussianMixture(3, random_state = 0).fit(X)
+        self.g = sklearn.mixture.GaussianMixture(3, random_state = 0, covariance_type = 'diag').\
+                    fit(X + numpy.random.normal(0.3, 0.5, X.shape))
+
+    def test_gaussKL(self):
+        """
+        1d closed form log(s1/s0) + (s0^2 + (m0-m1)^2)/(2 s1^2) - 1/2
+        """
+        kl = gaussKL([[1.0]], [[[4.0]]], [[0.0], [2.0]], [[[1.0]], [[9.0]]])
+        numpy.testing.assert_allclose(kl, [[numpy.log(0.5) + 5.0/2 - 0.5,
+                                            numpy.log(1.5) + 5.0/18 - 0.5]])
+
+    def test_approximations(self):
+        for method in ['variational', 'matched', 'mc']:
+            self.assertAlmostEqual(gmmKL(self.f, self.f, method, seed = 0), 0.0)
+
+        mc = gmmKL(self.f, self.g, 'mc', nSamples = 50000, seed = 0)
+        for method in ['variational', 'matched']:
+            self.assertAlmostEqual(gmmKL(self.f, self.g, method), mc, places = 2)
+
+        # marginals
+        mc = gmmKL(self.f, self.g, 'mc', margIdx = 1, nSamples = 50000, seed = 0)
+        self.assertAlmostEqual(gmmKL(self.f, self.g, margIdx = 1), mc, places = 2)
+
+        with self.assertRaises(ValueError):
+            gmmKL(self.f, self.g, 'exact')
+
+    def test_seed(self):
+        """
+        A fixed seed reuses the samples, samples of f can be given.
+        """
+        kl = symmetricGmmKL(self.f, self.g, 'mc', seed = 1)
+        self.assertEqual(symmetricGmmKL(self.f, self.g, 'mc', seed = 1), kl)
+        self.assertEqual(apprxJointGmmKL(self.f, self.g, verbose = False, seed = 1), kl)
+
+        samples = self.f.sample(1000)[0]
+        numpy.testing.assert_allclose(gmmKL(self.f, self.g, 'mc', samples = samples),
+                                      numpy.mean(self.f.score_samples(samples) - self.g.score_samples(samples)))
+
+    def test_apprxMargKL(self):
+        f = [sklearn.mixture.GaussianMixture(1).fit(numpy.random.normal(0, 1, (200,1))) for i in range(2)]
+        g = [sklearn.mixture.GaussianMixture(1).fit(numpy.random.normal(1, 1, (200,1))) for i in range(2)]
+
+        kl = apprxMargKL(f, g, method = 'variational')
+        exact = sum(gaussKL(a.means_, a.covariances_, b.means_, b.covariances_)[0,0] +
+                    gaussKL(b.means_, b.covariances_, a.means_, a.covariances_)[0,0] for a, b in zip(f, g))
+        numpy.testing.assert_allclose(kl, exact)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import numpy
+
+from ssapy import listBundles, msListRevenue, dokHist
+from ssapy.util import revenueTable
+from ssapy.pricePrediction.margSurplus import histBins, binCdf, binPartialMean, margExpectedSurplus
+
+class test_margSurplus(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        self.m = 3
+        self.binEdges = numpy.arange(0, 51, 2.0)
+        self.data = [(numpy.random.randint(0, 20, self.binEdges.shape[0] - 1), self.binEdges) 
+                     for i in range(self.m)]
+        
+        self.bundles = listBundles(self.m)
+        self.revenue = msListRevenue(self.bundles, numpy.asarray([40., 30., 25.]), 2)
+        
+    def sample(self, n):
+        samples = numpy.zeros((n, self.m))
+        for i, (hist, binEdges) in enumerate(self.data):
+            lower, upper, mass = histBins(hist, binEdges)
+            b = numpy.random.choice(mass.shape[0], n, p = mass)
+            samples[:,i] = numpy.random.uniform(lower[b], upper[b])
+        return samples
+        
+    def test_bins(self):
+        bins = histBins([1, 0, 3], [0, 1, 2, 4])
+        numpy.testing.assert_allclose(binCdf(bins, [-1, 0.5, 1.5, 3, 5]), [0, 1./14, 1./7, 4./7, 1])
+        # 1/7*0.5 + 6/7*3 (the bin [2,4] is half below 3 with mean 2.5)
+        numpy.testing.assert_allclose(binPartialMean(bins, [0, 3, 10]), [0, 1./14 + 3./7*2.5, 1./14 + 6./7*3])
+        
+        # counts are masses whatever the bin width
+        lower, upper, mass = histBins([1, 0, 3], [0, 1, 2, 4], density = False)
+        numpy.testing.assert_allclose(mass, [0.25, 0, 0.75])
+        
+    def test_monteCarlo(self):
+        """
+        The exact expected surplus agrees with the sample average for a batch of bids.
+        """
+        bids = numpy.random.uniform(0, 50, (5, self.m))
+        samples = self.sample(200000)
+        
+        table = revenueTable(self.bundles, self.revenue)
+        es, rev, cost, pwin = margExpectedSurplus(self.data, self.bundles, self.revenue, bids, ret = 'all')
+        for k, b in enumerate(bids):
+            won = samples <= b
+            mc  = numpy.mean(table[numpy.dot(won, 2**numpy.arange(self.m)[::-1])] - numpy.sum(samples*won, 1))
+            self.assertAlmostEqual(es[k], mc, delta = 0.15)
+            numpy.testing.assert_allclose(pwin[k], numpy.mean(won, 0), atol = 0.005)
+            
+            self.assertAlmostEqual(margExpectedSurplus(self.data, None, table, b), es[k])
+            
+    def test_dokHist(self):
+        """
+        dokHist marginals (including the zero width bin at 0) give the costs of expected_cost.
+        """
+        hist = dokHist(m = 2)
+        hist.upcount([0, 10], 3)
+        hist.upcount([10.5, 4], 5)
+        hist.upcount([20, 0], 2)
+        
+        bundles = listBundles(2)
+        revenue = msListRevenue(bundles, [30., 10.], 1)
+        
+        es, rev, cost, pwin = margExpectedSurplus(hist, bundles, revenue, [[11, 5], [0, 0]], ret = 'all')
+        numpy.testing.assert_allclose(pwin, [[0.8, 0.7], [0.3, 0.2]])
+        numpy.testing.assert_allclose(cost, [0.5*10.5 + 0.5*3.5, 0.0])
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import numpy
+import multiprocessing.pool
+import sklearn.mixture
+
+from ssapy.pricePrediction.modelSelection import aicSelect, cutoff_
+from ssapy.pricePrediction.jointGMM import jointGMM
+from ssapy.pricePrediction.margGMM import igmm
+from ssapy.pricePrediction.util import aicFit
+
+class test_modelSelection(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        self.X = numpy.vstack((numpy.random.normal(10,1,(200,2)),
+                               numpy.random.normal(30,2,(200,2))))
+
+    def candidates(self, compRange = range(1,7)):
+        return [sklearn.mixture.GaussianMixture(n_components = c, random_state = 0)
+                for c in compRange]
+
+    def test_concurrent(self):
+        """
+        Process pools, thread pools and a given pool select the same models as the serial fit.
+        """
+        clfs, aic = aicSelect(self.candidates(), self.X)
+
+        for kwargs in [{'nProcs': 2}, {'nProcs': 2, 'threads': True}]:
+            c, a = aicSelect(self.candidates(), self.X, **kwargs)
+            numpy.testing.assert_allclose(a, aic)
+
+        pool = multiprocessing.pool.ThreadPool(2)
+        c, a = aicSelect(self.candidates(), self.X, pool = pool)
+        numpy.testing.assert_allclose(a, aic)
+
+        # the pool is left open for the caller
+        self.assertEqual(pool.map(abs, [-1]), [1])
+        pool.close()
+        pool.join()
+
+    def test_patience(self):
+        self.assertEqual(cutoff_([5, 4, 3, 4, 3, 4, 5, 6], 2), 7)
+        self.assertEqual(cutoff_([5, 4, 3, 2], 1), 4)
+
+        clfs, aic = aicSelect(self.candidates(), self.X)
+        n = cutoff_(aic, 1)
+
+        c, a = aicSelect(self.candidates(), self.X, patience = 1)
+        self.assertEqual(len(a), n)
+        numpy.testing.assert_allclose(a, aic[:n])
+
+        # rounds of two candidates give the same truncation
+        c, a = aicSelect(self.candidates(), self.X, patience = 1, nProcs = 2, threads = True)
+        numpy.testing.assert_allclose(a, aic[:n])
+
+    def test_aicFit(self):
+        serial = jointGMM(random_state = 0)
+        s, aicSerial, r = serial.aicFit(X = self.X, compRange = [1,2,3,4], verbose = False)
+
+        gmm = jointGMM(random_state = 0)
+        s, aic, r = gmm.aicFit(X = self.X, compRange = [1,2,3,4], verbose = False,
+                               nProcs = 2, threads = True, patience = 1)
+        self.assertEqual(gmm.n_components, 2)
+        self.assertEqual(list(r), [1,2,3])
+        numpy.testing.assert_allclose(aic, aicSerial[:3])
+
+        m = igmm()
+        minAic, nComp = m.aicFit(X = self.X, compRange = [1,2,3], verbose = False, nProcs = 2)
+        self.assertEqual(nComp, [2,2])
+
+        clf, aic, r = aicFit(self.X[:,0], compRange = [1,2,3], minCovar = 0.1,
+                             verbose = False, nProcs = 2, threads = True)
+        self.assertEqual(clf.n_components, 2)
+
+if __name__ == "__main__":
+    unittest.main()
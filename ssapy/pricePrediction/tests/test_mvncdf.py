@@ -0,0 +1,46 @@
+import unittest
+import numpy
+
+from ssapy.pricePrediction.mvncdf import mvstdnormcdf, mvnormcdf, mvnRect, packCorrel_
+
+class test_mvncdf(unittest.TestCase):
+    def test_mvstdnormcdf(self):
+        """
+        Orthant probabilities with known closed forms.
+        """
+        corr = [[1.0, 0, 0.5],[0,1,0],[0.5,0,1]]
+        self.assertAlmostEqual(mvstdnormcdf([-numpy.inf]*3, [0.0,0.0,0.0], corr, abseps = 1e-8), 1.0/6, places = 5)
+        self.assertAlmostEqual(mvstdnormcdf([-numpy.inf]*2, [0.0,0.0], 0.5), 1.0/3)
+
+        numpy.testing.assert_equal(packCorrel_(numpy.arange(16).reshape(4,4)), [4, 8, 9, 12, 13, 14])
+
+    def test_mvnRect(self):
+        rs = numpy.random.RandomState(0)
+        K, m = 3, 4
+        means = rs.rand(K,m)*10
+        A = rs.randn(K,m,m)
+        covs = numpy.einsum('kij,klj->kil', A, A) + numpy.eye(m)
+
+        lower = rs.rand(10,m)*5
+        upper = lower + rs.rand(10,m)*8
+        lower[:,0] = -numpy.inf
+        upper[:,1] = numpy.inf
+
+        rect = mvnRect(means, covs, nPoints = 4096)
+
+        genz = rect(lower, upper, 'genz', abseps = 1e-6, maxpts = 100000)
+        ref  = [[mvnormcdf(l, u, mu, c, abseps = 1e-6, maxpts = 100000) for mu, c in zip(means, covs)]
+                for l, u in zip(lower, upper)]
+        numpy.testing.assert_allclose(genz, ref, atol = 1e-5)
+
+        qmc = rect(lower, upper, 'qmc')
+        numpy.testing.assert_allclose(qmc, genz, atol = 1e-3)
+
+        # the shared point set makes the estimate deterministic
+        numpy.testing.assert_equal(rect(lower, upper), qmc)
+
+        with self.assertRaises(ValueError):
+            rect(lower, upper, 'mc')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import numpy
+import sklearn.mixture
+from scipy.stats import truncnorm
+
+from ssapy.pricePrediction.truncSample import truncGmmSample, boxProb
+from ssapy.pricePrediction.jointGMM import jointGMM
+from ssapy.pricePrediction.util import drawGMM, drawJointGMM
+
+class test_truncSample(unittest.TestCase):
+    def setUp(self):
+        self.w    = numpy.asarray([0.7, 0.3])
+        self.mu   = numpy.asarray([[-4., 1.], [10., 12.]])
+        self.covs = numpy.asarray([[[4., 1.5], [1.5, 2.]], [[9., 0.], [0., 4.]]])
+        
+    def test_boxProb(self):
+        rs = numpy.random.RandomState(0)
+        for k in range(2):
+            X = rs.multivariate_normal(self.mu[k], self.covs[k], 200000)
+            mc = numpy.mean(numpy.all((X >= 0) & (X <= 50), 1))
+            self.assertAlmostEqual(boxProb(self.mu[k:k+1], self.covs[k:k+1], numpy.zeros(2), 50*numpy.ones(2))[0], 
+                                   mc, delta = 0.005)
+        
+    def test_gibbs(self):
+        """
+        The first component only accepts ~2% of its draws; Gibbs and rejection
+        sampling of the truncated mixture agree.
+        """
+        g, stats = truncGmmSample(self.w, self.mu, self.covs, 20000, 0, 50, 0, minAccept = 0.1, ret = 'all')
+        r, rstats = truncGmmSample(self.w, self.mu, self.covs, 20000, 0, 50, 1, method = 'rejection', ret = 'all')
+        
+        self.assertEqual(list(stats['gibbs']), [0])
+        self.assertEqual(len(rstats['gibbs']), 0)
+        self.assertAlmostEqual(stats['observedAccept'], stats['componentAccept'][1], delta = 0.02)
+        self.assertTrue(rstats['observedAccept'] < 0.5)
+        self.assertTrue(stats['accept'] < 0.4)
+        
+        self.assertTrue(numpy.all((g >= 0) & (g <= 50)))
+        numpy.testing.assert_allclose(g.mean(0), r.mean(0), atol = 0.15)
+        numpy.testing.assert_allclose(numpy.cov(g.T), numpy.cov(r.T), atol = 0.5)
+        
+    def test_univariate(self):
+        """
+        A single diagonal component is an exact truncated normal.
+        """
+        s = truncGmmSample([1.0], [[-3.0]], [[[4.0]]], 50000, 0, numpy.inf, 0)
+        self.assertAlmostEqual(s.mean(), truncnorm.mean(1.5, numpy.inf, -3, 2), delta = 0.02)
+        
+    def test_jointGMM(self):
+        numpy.random.seed(0)
+        X = numpy.vstack((numpy.random.normal(1, 1, (300,2)), numpy.random.normal(20, 3, (300,2))))
+        gmm = jointGMM(n_components = 2, random_state = 0)
+        gmm.fit(X)
+        
+        s = gmm.sample(n_samples = 1000)
+        self.assertEqual(s.shape, (1000, 2))
+        self.assertTrue(numpy.all(s >= 0))
+        self.assertTrue(0.0 < gmm.sampleStats_['accept'] < 1.0)
+        numpy.testing.assert_array_equal(gmm.sample(n_samples = 1000), s)
+        
+        self.assertTrue(numpy.all(gmm.sampleMarg(100) >= 0))
+        
+        d = drawJointGMM(gmm, 100, 0, 50)
+        self.assertEqual(d.shape, (100, 2))
+        
+        clf = sklearn.mixture.GaussianMixture(1).fit(numpy.random.normal(2, 3, (300,1)))
+        d = drawGMM(clf, 100)
+        self.assertEqual(d.shape, (100, 1))
+        self.assertTrue(numpy.all((d > 0) & (d < 50)))
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+this is /ssapy/pricePrediction/truncSample.py
+
+Sampling of Gaussian mixtures truncated to the box of valid prices
+[minPrice, maxPrice]^m (jointGMM.sample, hgmm.sample, util.drawGMM, ...).
+
+Plain rejection of whole mixture draws slows down without bound when
+components sit at the edge of the box (e.g. low demand goods near a zero
+price). Instead
+
+    1. the number of samples of each component is drawn from the truncated
+       mixture weights w_k P_k(box), P_k(box) being the probability of the
+       box under component k (its rejection acceptance rate),
+    2. components with acceptance >= minAccept are sampled by batched
+       rejection, the others by a Gibbs sampler of exact univariate
+       truncated normal draws (one independent chain per sample, nBurn
+       sweeps; a single sweep is exact for diagonal covariances).
+
+The expected and observed acceptance rates are reported with the samples.
+"""
+import numpy
+from scipy.special import ndtr
+from scipy.stats import truncnorm
+from sklearn.utils import check_random_state
+
+from ssapy.pricePrediction.mvncdf import mvnRect
+
+def boxBounds_(lower, upper, m):
+    lower = numpy.broadcast_to(numpy.asarray(lower, dtype = numpy.float64), (m,)).copy()
+    upper = numpy.broadcast_to(numpy.asarray(upper, dtype = numpy.float64), (m,)).copy()
+
+    if numpy.any(lower > upper):
+        raise ValueError("truncGmmSample(...) - lower > upper")
+
+    return lower, upper
+
+def isDiag_(cov):
+    return numpy.all(cov == numpy.diag(numpy.diagonal(cov)))
+
+def boxProb(means, covs, lower, upper):
+    """
+    Probability of the box lower <= x <= upper under each component
+    (means (K,m), full covariances (K,m,m)), the acceptance rate of
+    rejection sampling from that component. Diagonal components are a
+    product of univariate probabilities, the others are integrated by
+    mvndst (see ssapy.pricePrediction.mvncdf.mvnRect).
+    """
+    means = numpy.atleast_2d(means)
+    K, m  = means.shape
+    covs  = numpy.reshape(covs, (K, m, m))
+
+    p = numpy.zeros(K)
+    full = []
+    for k in range(K):
+        if isDiag_(covs[k]):
+            sd = numpy.sqrt(numpy.diagonal(covs[k]))
+            p[k] = numpy.prod(ndtr((upper - means[k])/sd) - ndtr((lower - means[k])/sd))
+        else:
+            full.append(k)
+
+    if full:
+        p[full] = mvnRect(means[full], covs[full])(lower, upper, 'genz')[0]
+
+    return numpy.clip(p, 0.0, 1.0)
+
+def truncNormal(mu, sd, lower, upper, rs = None):
+    """
+    Exact draws of N(mu, sd^2) truncated to [lower, upper], all arguments
+    broadcast against each other.
+    """
+    rs = check_random_state(rs)
+
+    mu, sd = numpy.asarray(mu, dtype = numpy.float64), numpy.asarray(sd, dtype = numpy.float64)
+
+    return truncnorm.rvs((lower - mu)/sd, (upper - mu)/sd, loc = mu, scale = sd, random_state = rs)
+
+def rejectionSample_(mean, cov, n, lower, upper, accept, rs, maxBatch = 100000):
+    """
+    n draws of N(mean, cov) inside the box by batched rejection,
+    returns (samples, number of draws made, number of them accepted).
+    """
+    chol = numpy.linalg.cholesky(cov)
+
+    samples, nFilled, nAccepted, nDrawn = [], 0, 0, 0
+    while nFilled < n:
+        batch = int(min(maxBatch, numpy.ceil(1.2*(n - nFilled)/max(accept, 1e-3)) + 10))
+
+        s = mean + numpy.dot(rs.standard_normal((batch, mean.shape[0])), chol.T)
+        s = s[numpy.all((s >= lower) & (s <= upper), 1)]
+
+        samples.append(s[:n - nFilled])
+        nFilled   += samples[-1].shape[0]
+        nAccepted += s.shape[0]
+        nDrawn    += batch
+
+    return numpy.vstack(samples), nDrawn, nAccepted
+
+def gibbsSample_(mean, cov, n, lower, upper, nBurn, rs):
+    """
+    n draws of N(mean, cov) truncated to the box, each the state of an
+    independent Gibbs chain after nBurn sweeps of exact univariate truncated
+    normal conditionals, started at the mean projected into the box.
+    """
+    m = mean.shape[0]
+    prec = numpy.linalg.inv(cov)
+
+    sd = 1.0/numpy.sqrt(numpy.diagonal(prec))
+
+    if isDiag_(cov):
+        nBurn = 1
+
+    x = numpy.tile(numpy.clip(mean, lower, upper), (n,1))
+    for sweep in range(nBurn):
+        for i in range(m):
+            # conditional mean of x_i given the other goods
+            d = x - mean
+            d[:,i] = 0.0
+            mu = mean[i] - numpy.dot(d, prec[i])/prec[i,i]
+
+            x[:,i] = truncNormal(mu, sd[i], lower[i], upper[i], rs)
+
+    return x
+
+def truncGmmSample(weights, means, covs, n, lower, upper, random_state = None,
+                   minAccept = 0.01, nBurn = 20, method = 'auto', ret = 'samples'):
+    """
+    n samples of the Gaussian mixture (weights (K,), means (K,m), full
+    covariances (K,m,m)) truncated to the box lower <= x <= upper.
+
+    INPUTS
+    ------
+    lower, upper := (float or (m,) array) the box, may be infinite.
+
+    random_state := None, int or RandomState (as sklearn)
+
+    minAccept    := (float) components accepting fewer of their draws than
+                    this are sampled by Gibbs instead of rejection. Batched
+                    rejection stays cheaper than nBurn Gibbs sweeps down to
+                    acceptance rates of about a percent.
+
+    nBurn        := (int) Gibbs sweeps per sample.
+
+    method       := 'auto' (see minAccept), 'rejection' or 'gibbs' for every component.
+
+    ret          := 'samples' - (n,m) samples
+                    'all'     - (samples, stats) with stats a dict of
+                                'accept'         - acceptance rate of plain rejection
+                                                   from the mixture, sum_k w_k P_k(box)
+                                'componentAccept'- P_k(box) per component
+                                'observedAccept' - accepted/drawn over the rejection
+                                                   batches (nan if there were none)
+                                'gibbs'          - components sampled by Gibbs
+    """
+    rs = check_random_state(random_state)
+
+    w     = numpy.atleast_1d(numpy.asarray(weights, dtype = numpy.float64))
+    means = numpy.atleast_2d(numpy.asarray(means, dtype = numpy.float64))
+    K, m  = means.shape
+    covs  = numpy.reshape(numpy.asarray(covs, dtype = numpy.float64), (K, m, m))
+
+    lower, upper = boxBounds_(lower, upper, m)
+
+    pBox = boxProb(means, covs, lower, upper)
+    accept = numpy.dot(w, pBox)
+    if not accept > 0.0:
+        raise ValueError("truncGmmSample(...) - the mixture has no mass in [{0}, {1}]".format(lower, upper))
+
+    if method == 'auto':
+        gibbs = pBox < minAccept
+    elif method == 'rejection':
+        gibbs = numpy.zeros(K, dtype = bool)
+    elif method == 'gibbs':
+        gibbs = numpy.ones(K, dtype = bool)
+    else:
+        raise ValueError("truncGmmSample(...) - Unknown method {0}".format(method))
+
+    counts = rs.multinomial(n, w*pBox/numpy.sum(w*pBox))
+
+    samples = numpy.zeros((n, m))
+    nAccepted, nDrawn, start = 0, 0, 0
+    for k in numpy.flatnonzero(counts):
+        if gibbs[k]:
+            s = gibbsSample_(means[k], covs[k], counts[k], lower, upper, nBurn, rs)
+        else:
+            s, drawn, accepted = rejectionSample_(means[k], covs[k], counts[k], lower, upper, pBox[k], rs)
+            nAccepted += accepted
+            nDrawn    += drawn
+
+        samples[start:start + counts[k]] = s
+        start += counts[k]
+
+    # components were filled in blocks
+    samples = samples[rs.permutation(n)]
+
+    if ret == 'samples':
+        return samples
+    elif ret == 'all':
+        return samples, {'accept'          : accept,
+                         'componentAccept' : pBox,
+                         'observedAccept'  : nAccepted/float(nDrawn) if nDrawn else numpy.nan,
+                         'gibbs'           : numpy.flatnonzero(gibbs & (counts > 0))}
+    else:
+        raise ValueError("truncGmmSample(...) - Unknown return type {0}".format(ret))
@@ -3,6 +3,9 @@ import matplotlib.pyplot as plt
 import numpy
 from scipy.stats import norm
 from ssapy.pricePrediction.jointGMM import jointGMM
+from ssapy.pricePrediction.modelSelection import aicSelect
+from ssapy.pricePrediction.kl import symmetricGmmKL, gmmParams_
+from ssapy.pricePrediction.truncSample import truncGmmSample
 
 from ssapy.agents import agentFactory
 from ssapy.strategies import straightMU,averageMU,straightMU8
@@ -12,40 +15,32 @@ import time
 import os
 import itertools
 
-def apprxMargKL(clf1, clf2, nSamples = 1000):
-    
+def apprxMargKL(clf1, clf2, nSamples = 1000, method = 'mc', seed = None):
+    """
+    Sum over goods of the symmetric KL divergence between the marginal
+    mixtures clf1[i] and clf2[i], see ssapy.pricePrediction.kl.gmmKL.
+    """
     kl = 0
-    for idx, c1 in enumerate(clf1):
-        c2 = clf2[idx]
-        samples1 = c1.sample(nSamples)
-        samples2 = c2.sample(nSamples)
-        f1 = c1.eval(samples1)[0]
-        g1 = c2.eval(samples1)[0]
-        f2 = c1.eval(samples2)[0]
-        g2 = c2.eval(samples2)[0]
-        d1 = numpy.mean(f1-g1)
-        d2 = numpy.mean(f2-g2)
-        kl += (d1 + d2)
+    for c1, c2 in zip(clf1, clf2):
+        kl += symmetricGmmKL(c1, c2, method = method, nSamples = nSamples, seed = seed)
     return kl
 
-def apprxJointGmmKL(clf1, clf2, nSamples = 1000, verbose = True):
-    
+def apprxJointGmmKL(clf1, clf2, nSamples = 1000, verbose = True, method = 'mc', seed = None):
+    """
+    Symmetric KL divergence between two joint mixtures, by default a Monte Carlo
+    estimate with nSamples (untruncated) samples of each; see ssapy.pricePrediction.kl.gmmKL
+    for the closed form approximations (method = 'variational' or 'matched') and seed.
+    """
     if verbose:
         print('Approximating symmetric Kl-div with {0} samples'.format(nSamples))
         start = time.time()
-    samples1 = clf1.sample(n_samples = nSamples)
-    samples2 = clf2.sample(n_samples = nSamples)
-    f1 = clf1.eval(samples1)[0]
-    g1 = clf2.eval(samples1)[0]
-    f2 = clf1.eval(samples2)[0]
-    g2 = clf2.eval(samples2)[0]
-    d1 = numpy.mean(f1 - g1)
-    d2 = numpy.mean(f2 - g2)
+        
+    kl = symmetricGmmKL(clf1, clf2, method = method, nSamples = nSamples, seed = seed)
     
     if verbose:
         print('Approximated sym kl-div with {0} samples in {1} seconds'.format(nSamples, time.time() - start))
 
-    return d1 + d2
+    return kl
     
 def pltMargFromJoint(**kwargs):
     clf      = kwargs.get('clf')
@@ -123,19 +118,32 @@ def plotMargGMM(**kwargs):
     
 #    fig.remove()
     
-def aicFit(X, compRange = range(1,6), minCovar = 9, covarType = 'full', verbose = True):
+def aicFit(X, compRange = range(1,6), minCovar = 9, covarType = 'full', verbose = True,
+           pool = None, nProcs = 1, threads = False, patience = None):
+    """
+    Minimum AIC mixture among one candidate per number of components in compRange.
+    
+    pool, nProcs, threads and patience control concurrent fitting of
+    the candidates, see ssapy.pricePrediction.modelSelection.aicSelect.
+    """
     if verbose:
         print('starting aicFit(...)')
         print('compRange = {0}'.format(compRange))
         print('minCovar  = {0}'.format(minCovar))
         start = time.time()
         
-    clfList = [mixture.GMM(n_components = c, min_covar = minCovar, \
-                           covariance_type  = covarType) for c in compRange]
+    clfList = [mixture.GaussianMixture(n_components = c, reg_covar = minCovar, \
+                                       covariance_type  = covarType) for c in compRange]
+    
+    # 1d samples of a single good are one feature
+    X = numpy.asarray(X)
+    if X.ndim == 1:
+        X = X[:,numpy.newaxis]
     
-    [clf.fit(X) for clf in clfList]
+    clfList, aicList = aicSelect(clfList, X, pool = pool, nProcs = nProcs, 
+                                 threads = threads, patience = patience)
     
-    aicList = [clf.aic(X) for clf in clfList]
+    compRange = compRange[:len(clfList)]
     
     argMinAic = numpy.argmin(aicList)
     
@@ -144,25 +152,22 @@ def aicFit(X, compRange = range(1,6), minCovar = 9, covarType = 'full', verbose
 
     return clfList[argMinAic], aicList, compRange
 
-def drawGMM(clf, nSamples = 8, minPrice = 0, maxPrice = 50):
-    
-    samples = []
-#    for i in xrange(nSamples):
-    while len(samples) < nSamples:
-        s = clf.sample(1)[0]
-        if s < maxPrice and s > minPrice:
-            samples.append(s)
-    samples = numpy.atleast_2d(samples)     
-    return samples
+def drawGMM(clf, nSamples = 8, minPrice = 0, maxPrice = 50, **kwargs):
+    """
+    nSamples of the 1d mixture clf restricted to (minPrice, maxPrice), 
+    see ssapy.pricePrediction.truncSample.truncGmmSample for the kwargs.
+    """
+    w, mu, covs = gmmParams_(clf)
+    
+    return truncGmmSample(w, mu, covs, nSamples, minPrice, maxPrice, **kwargs)
 
-def drawJointGMM(clf, nSamples = 8, minPrice = 0, maxPrice = 50):
-    samples = []
-    while len(samples) < nSamples:
-        s = clf.sample(1)[0]
-        if ~numpy.any(s > maxPrice) and ~numpy.any( s < minPrice):
-            samples.append(s)
-    samples = numpy.atleast_2d(samples)
-    return samples
+def drawJointGMM(clf, nSamples = 8, minPrice = 0, maxPrice = 50, **kwargs):
+    """
+    nSamples of the mixture clf restricted to [minPrice, maxPrice] in every good.
+    """
+    w, mu, covs = gmmParams_(clf)
+    
+    return truncGmmSample(w, mu, covs, nSamples, minPrice, maxPrice, **kwargs)
 
 def simulateAuctionMargGMM( **kwargs ):
     agentType  = kwargs.get('agentType')
@@ -15,10 +15,8 @@ def averageMU(bundles, revenue, pricePrediction, nSamples, verbose = False):
     if verbose:
         print("averageMU - Drawing {0} samples.".format(nSamples))
 
-    bundleView = numpy.atleast_2d(bundles)
-    
     samples = pricePrediction.sample(n_samples = nSamples)
-    accum = numpy.zeros(bundleView.shape[1], dtype = 'float')
+    accum = numpy.zeros(samples.shape[1], dtype = 'float')
     
     #accumulate sum of marginal utility
     for sample in samples:
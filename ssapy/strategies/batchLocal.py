@@ -0,0 +1,186 @@
+import numpy
+
+from ssapy.util import wonCodes, goodBit, codes2bundles, revenueTable
+
+def jointLocalBatchUpdate(tables, bids, targetBid, samples):
+    """
+    jointLocalUpdate for K problems sharing one sample set.
+
+    INPUTS
+    ------
+    tables     := (2d array-like; shape = (K, 2^m)) revenue of each problem
+                    indexed by bundle code (see ssapy.util.revenueTable)
+
+    bids       := (2d array-like; shape = (K, m)) current bids of each problem
+
+    targetBid  := (int) the (zero-indexed) bid to be updated.
+
+    samples    := (2d array-like; shape = (nSamples, m)) price samples
+
+    OUTPUTS
+    -------
+    newBids    := (1d array; shape = (K,)) the new bid of each problem for the target good
+    """
+    codes = wonCodes(samples, bids)
+    bit   = goodBit(bids.shape[1], targetBid)
+
+    posRev = numpy.take_along_axis(tables, (codes | bit).astype(numpy.intp), 1)
+    negRev = numpy.take_along_axis(tables, (codes & ~bit).astype(numpy.intp), 1)
+
+    return numpy.mean(posRev - negRev, 1)
+
+def condLocalBatchUpdate(tables, bids, targetBid, samples, eps = 1.0):
+    """
+    condLocalUpdate for K problems sharing one sample set,
+    see jointLocalBatchUpdate for the inputs.
+    """
+    m     = bids.shape[1]
+    codes = wonCodes(samples, bids)
+    bit   = goodBit(m, targetBid)
+
+    rev   = numpy.take_along_axis(tables, codes.astype(numpy.intp), 1)
+    jWon  = (codes & bit) != 0
+
+    normWon  = numpy.sum(jWon, 1, dtype = numpy.float64)
+    normLost = samples.shape[0] - normWon
+
+    revWon  = numpy.sum(numpy.where(jWon, rev, 0), 1)
+    revLost = numpy.sum(numpy.where(jWon, 0, rev), 1)
+
+    # sum of revenue over all bundles with/without the target good
+    pos = (numpy.arange(2**m) & (1 << (m - 1 - targetBid))) != 0
+
+    return (revWon  + eps*numpy.sum(tables[:,pos],1))/(normWon  + 2*eps) -\
+           (revLost + eps*numpy.sum(tables[:,~pos],1))/(normLost + 2*eps)
+
+def margLocalBatchUpdate(tables, bids, targetBid, samples):
+    """
+    margLocalUpdate for K problems sharing one sample set,
+    see jointLocalBatchUpdate for the inputs.
+
+    Goods are treated as independent with marginal probability of winning
+    estimated from the samples.
+    """
+    m = bids.shape[1]
+
+    pwin = numpy.zeros(bids.shape)
+    for goodIdx in range(m):
+        pwin[:,goodIdx] = numpy.mean(samples[:,goodIdx][None,:] <= bids[:,goodIdx][:,None], 1)
+
+    # probability of every bundle of the other goods, shape (K, 2^m)
+    bundles = codes2bundles(numpy.arange(2**m), m)
+    p = numpy.where(bundles[None,:,:], pwin[:,None,:], 1.0 - pwin[:,None,:])
+    p[:,:,targetBid] = 1.0
+    p = numpy.prod(p, 2)
+
+    pos = bundles[:,targetBid]
+    neg = numpy.flatnonzero(pos) - (1 << (m - 1 - targetBid))
+
+    return numpy.sum((tables[:,pos] - tables[:,neg])*p[:,pos], 1)
+
+def localBatch_(update, bundles, revenues, initialBids, samples,
+                maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids', **kwargs):
+    """
+    Run coordinate updates for K problems together. A problem stops updating
+    once the Euclidean distance between its iterations is less than tol, just
+    as when it is solved on its own.
+    """
+    newBids = numpy.atleast_2d(initialBids).astype(numpy.float64)
+    samples = numpy.atleast_2d(samples)
+    K, m    = newBids.shape
+
+    tables = revenueTable(bundles, revenues)
+    if tables.ndim == 1:
+        tables = numpy.tile(tables, (K,1))
+
+    if tables.shape[0] != K:
+        raise ValueError("localBatch_(...) - {0} revenue functions != {1} initial bids".\
+                         format(tables.shape[0],K))
+
+    if m != samples.shape[1]:
+        raise ValueError("localBatch_(...) - m = {0} != samples.shape[1] = {1}".\
+                         format(m, samples.shape[1]))
+
+    converged = numpy.zeros(K, dtype = bool)
+    nItr      = numpy.zeros(K, dtype = int)
+    d         = numpy.zeros(K)
+
+    for itr in range(maxItr):
+        active = numpy.flatnonzero(~converged)
+        if active.shape[0] == 0:
+            break
+
+        activeTables = tables[active]
+        activeBids   = newBids[active]
+        oldBids      = activeBids.copy()
+
+        for gIdx in range(m):
+            activeBids[:,gIdx] = update(activeTables, activeBids, gIdx, samples, **kwargs)
+
+        newBids[active]   = activeBids
+        d[active]         = numpy.linalg.norm(oldBids - activeBids, axis = 1)
+        nItr[active]      = itr + 1
+        converged[active] = d[active] <= tol
+
+        if verbose:
+            print('Iteration {0}: {1} of {2} problems converged'.\
+                  format(itr + 1, numpy.count_nonzero(converged), K))
+
+    if ret == 'bids':
+        return newBids
+    elif ret == 'all':
+        return newBids, converged, nItr, d
+    else:
+        raise ValueError("Unknown Return String {0}".format(ret))
+
+def jointLocalBatch(bundles, revenues, initialBids, samples,
+                    maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids'):
+    """
+    Run jointLocal for K revenue functions (e.g. K valuations) against the
+    same set of samples as one vectorized solve.
+
+    INPUTS
+    ------
+    bundles     := (2d array-like) List of bundles
+
+    revenues    := (2d array-like; shape = (K, nBundles)) revenue of each problem
+                    (1:1 correspondence with bundles along axis 1)
+
+    initialBids := (2d array-like; shape = (K, m)) initial bids of each problem
+
+    samples     := (2d array-like; shape = (nSamples x nGoods)) samples shared by all problems
+
+    maxItr, tol, verbose, ret := as jointLocal(...), applied per problem.
+
+    OUTPUTS
+    -------
+    bids         := (2d array; shape = (K, m)) the bids of each problem
+
+    ONLY RETURNED IF ret == 'all'
+    converged    := (1d bool array) convergence flag of each problem
+
+    itr          := (1d int array) iterations performed for each problem
+
+    d            := (1d array) Euclidean distance between the last two iterations
+                    of each problem
+    """
+    return localBatch_(jointLocalBatchUpdate, bundles, revenues, initialBids, samples,
+                       maxItr, tol, verbose, ret)
+
+def condLocalBatch(bundles, revenues, initialBids, samples,
+                   maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids', eps = 1.0):
+    """
+    Run condLocal for K revenue functions against the same set of samples,
+    see jointLocalBatch.
+    """
+    return localBatch_(condLocalBatchUpdate, bundles, revenues, initialBids, samples,
+                       maxItr, tol, verbose, ret, eps = eps)
+
+def margLocalBatch(bundles, revenues, initialBids, samples,
+                   maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids'):
+    """
+    Run margLocal for K revenue functions against the same set of samples,
+    see jointLocalBatch.
+    """
+    return localBatch_(margLocalBatchUpdate, bundles, revenues, initialBids, samples,
+                       maxItr, tol, verbose, ret)
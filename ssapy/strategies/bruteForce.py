@@ -1,12 +1,21 @@
 from ssapy.pricePrediction.jointGMM import expectedSurplus_
+from ssapy.util import codes2bundles, revenueTable
+from ssapy.util.revenue import isRevenueFunction, codeRevenue
 import numpy
 import itertools
+import multiprocessing
 
-def bruteForceS( bundleRevenueDict,  evalSamples = None, min=0.0, max=50.0, step=1.0, ret='bid'):
+from ssapy.strategies.coordAscent import coordAscentS
+
+def bruteForceGridS( bundleRevenueDict,  evalSamples = None, min=0.0, max=50.0, step=1.0, ret='bid', verbose = False):
+    """
+    Exhaustive search over every bid on the grid arange(min, max+1, step)^m.
+    Reference implementation of bruteForceS.
+    """
     m = evalSamples.shape[1]
-    
+
     xx = numpy.arange(min,max+1.0,step)
-    
+
     maxSurplus = -numpy.float('inf')
     bid = None
     for c in itertools.product(xx,repeat=m):
@@ -14,10 +23,234 @@ def bruteForceS( bundleRevenueDict,  evalSamples = None, min=0.0, max=50.0, step
         if es > maxSurplus:
             bid = numpy.atleast_1d(c)
             maxSurplus = es
-            print(bid)
-            print(maxSurplus)
+            if verbose:
+                print(bid)
+                print(maxSurplus)
+
+    if ret == 'bid':
+        return bid
+    elif ret == 'all':
+        return bid, maxSurplus
+
+def gridCandidates_(xx, prices):
+    """
+    Grid bids which win a different set of samples for one good.
+    Expected surplus only changes when a bid crosses a sample price, so only
+    the smallest grid bid winning each distinct set is kept.
+
+    Returns the candidate bids and for each sample the index of the first
+    candidate winning it (len(candidates) if none does).
+    """
+    sortedPrices = numpy.sort(prices)
+    nWon = numpy.searchsorted(sortedPrices, xx, side = 'right')
+
+    keep = numpy.ones(xx.shape[0], dtype = bool)
+    keep[1:] = nWon[1:] != nWon[:-1]
+
+    candidates = xx[keep]
+
+    return candidates, numpy.searchsorted(candidates, prices, side = 'left')
+
+class pruneSearch_(object):
+    """
+    Depth first search over the candidate bids of goods 0..m-3 with the
+    last (up to) two goods evaluated as one block for every prefix.
+
+    A prefix is pruned if no completion can beat the best surplus so far:
+    for each sample the best subset of the remaining goods (at that sample's
+    prices) bounds the surplus of any remaining bids.
+    """
+    def __init__(self, table, samples, candidates, firstWon, lowerBound = -numpy.inf):
+        self.table      = table
+        self.samples    = samples
+        self.candidates = candidates
+        self.firstWon   = firstWon
+        self.n, self.m  = samples.shape
+        self.blockSize  = 2 if self.m >= 2 else 1
+
+        self.bestSurplus = -numpy.inf
+        self.bestBid     = None
+
+        # surplus of a known grid bid, prefixes bounded strictly below it are pruned
+        self.lowerBound  = lowerBound
+
+        self.freeCodes = []
+        self.freeCost  = []
+        for d in range(self.m + 1):
+            freeCodes = numpy.arange(2**(self.m - d))
+            self.freeCodes.append(freeCodes)
+            self.freeCost.append(numpy.dot(samples[:,d:], codes2bundles(freeCodes, self.m - d).T.astype(float)))
+
+    def revenue(self, codes):
+        return codeRevenue(self.table, codes)
+
+    def upperBound(self, d, codes, cost):
+        """
+        Upper bound on the surplus of every prefix, codes and cost shape (nPrefix, n).
+        """
+        rev = self.revenue(codes[:,:,None] | self.freeCodes[d][None,None,:])
+        return numpy.sum(numpy.max(rev - self.freeCost[d][None,:,:], 2) - cost, 1)/self.n
+
+    def search(self, d, codes, cost, prefix, firstIdx = None):
+        """
+        goods 0..d-1 are fixed by prefix with won codes and cost per sample.
+        """
+        if d == self.m - self.blockSize:
+            self.block(codes, cost, prefix)
+            return
+
+        bit   = 1 << (self.m - 1 - d)
+        price = self.samples[:,d]
+
+        candIdx = numpy.arange(self.candidates[d].shape[0]) if firstIdx is None \
+                    else numpy.atleast_1d(firstIdx)
+
+        # bound every candidate for good d at once
+        won = self.firstWon[d][None,:] <= candIdx[:,None]
+
+        newCodes = codes[None,:] | (won*bit)
+        newCost  = cost[None,:] + won*price[None,:]
+
+        bound = self.upperBound(d + 1, newCodes, newCost)
+
+        for i, c in enumerate(candIdx):
+            if bound[i] <= self.bestSurplus or bound[i] < self.lowerBound:
+                continue
+
+            self.search(d + 1, newCodes[i], newCost[i], prefix + [self.candidates[d][c]])
+
+    def block(self, codes, cost, prefix):
+        """
+        Expected surplus of every combination of candidates for the last
+        blockSize goods given the prefix, via (2d) cumulative sums over the
+        samples binned by their first winning candidate.
+        """
+        m = self.m
+
+        if self.blockSize == 1:
+            bit = 1 << 0
+            v0  = self.revenue(codes) - cost
+            v1  = self.revenue(codes | bit) - cost - self.samples[:,m-1]
+
+            C = self.candidates[m-1].shape[0]
+
+            gain = numpy.cumsum(numpy.bincount(self.firstWon[m-1], v1 - v0, C + 1)[:C])
+            es   = (numpy.sum(v0) + gain)/self.n
+
+            best = numpy.argmax(es)
+            if es[best] > self.bestSurplus:
+                self.bestSurplus = es[best]
+                self.bestBid     = numpy.atleast_1d(prefix + [self.candidates[m-1][best]])
+            return
+
+        ba, bb = 1 << 1, 1 << 0
+        pa, pb = self.samples[:,m-2], self.samples[:,m-1]
+
+        v00 = self.revenue(codes) - cost
+        v10 = self.revenue(codes | ba) - cost - pa
+        v01 = self.revenue(codes | bb) - cost - pb
+        v11 = self.revenue(codes | ba | bb) - cost - pa - pb
+
+        ta, tb = self.firstWon[m-2], self.firstWon[m-1]
+        Ca, Cb = self.candidates[m-2].shape[0], self.candidates[m-1].shape[0]
+
+        A = numpy.cumsum(numpy.bincount(ta, v10 - v00, Ca + 1)[:Ca])
+        B = numpy.cumsum(numpy.bincount(tb, v01 - v00, Cb + 1)[:Cb])
+
+        D = numpy.bincount(ta*(Cb + 1) + tb, v11 - v10 - v01 + v00, (Ca + 1)*(Cb + 1))
+        D = numpy.cumsum(numpy.cumsum(D.reshape(Ca + 1, Cb + 1)[:Ca,:Cb], 0), 1)
+
+        es = (numpy.sum(v00) + A[:,None] + B[None,:] + D)/self.n
+
+        # first maximum in (a,b) lexicographic order
+        i, k = numpy.unravel_index(numpy.argmax(es), es.shape)
+        if es[i,k] > self.bestSurplus:
+            self.bestSurplus = es[i,k]
+            self.bestBid     = numpy.atleast_1d(prefix + [self.candidates[m-2][i], self.candidates[m-1][k]])
+
+def pruneSearchWorker_(args):
+    table, samples, candidates, firstWon, firstIdx, lowerBound = args
+
+    s = pruneSearch_(table, samples, candidates, firstWon, lowerBound)
+    n = samples.shape[0]
+    s.search(0, numpy.zeros(n, dtype = int), numpy.zeros(n), [], firstIdx)
+
+    return s.bestSurplus, s.bestBid
+
+def bruteForceS( bundleRevenueDict,  evalSamples = None, min=0.0, max=50.0, step=1.0, ret='bid',
+                 verbose = False, nProcs = 1):
+    """
+    The bid on the grid arange(min, max+1, step)^m maximizing expected surplus
+    (expectedSurplus_) over evalSamples - the same optimum as exhaustive search
+    (bruteForceGridS) without enumerating the grid.
+
+    Per good only the grid bids at distinct sample price breakpoints are considered,
+    prefixes of bids whose surplus upper bound does not exceed the best bid found are
+    skipped and the last two goods are evaluated as one vectorized block.
+    Ties are broken as in the exhaustive search (first in grid order).
+
+    INPUTS
+    ------
+    bundleRevenueDict := dict keyed by tuple(bundle), revenue table indexed by
+                         bundle code (ssapy.util.revenueTable) or revenue object
+
+    evalSamples       := (2d array-like) price samples
+
+    min, max, step    := the bid grid
+
+    ret               := 'bid' or 'all' -> (bid, expected surplus)
+
+    nProcs            := (int) number of processes, the candidates for the first
+                         good are split among them.
+    """
+    evalSamples = numpy.atleast_2d(evalSamples).astype(numpy.float64)
+    m = evalSamples.shape[1]
+
+    if isinstance(bundleRevenueDict, dict):
+        table = revenueTable(None, bundleRevenueDict)
+    elif isRevenueFunction(bundleRevenueDict) and m <= 20:
+        table = bundleRevenueDict.evaluate(numpy.arange(2**m))
+    else:
+        table = bundleRevenueDict
+
+    xx = numpy.arange(min,max+1.0,step)
+
+    candidates, firstWon = zip(*[gridCandidates_(xx, evalSamples[:,j]) for j in range(m)])
+
+    if verbose:
+        print('bruteForceS - {0} candidate bids instead of {1}'.\
+              format(numpy.prod([c.shape[0] for c in candidates]), xx.shape[0]**m))
+
+    # a good grid bid to prune against: coordinate ascent rounded down to the grid
+    lowerBound = -numpy.inf
+    if m > 2:
+        bid = coordAscentS(table, numpy.zeros(m), evalSamples)
+        bid = xx[numpy.clip(numpy.searchsorted(xx, bid, side = 'right') - 1, 0, xx.shape[0] - 1)]
+        lowerBound = expectedSurplus_(table, bid, evalSamples)
+
+    if nProcs > 1 and m > 2:
+        chunks = numpy.array_split(numpy.arange(candidates[0].shape[0]), nProcs)
+        args   = [(table, evalSamples, candidates, firstWon, list(c), lowerBound) 
+                  for c in chunks if c.shape[0]]
+
+        pool = multiprocessing.Pool(nProcs)
+        results = pool.map(pruneSearchWorker_, args)
+        pool.close()
+        pool.join()
+
+        # first chunk wins ties
+        maxSurplus, bid = results[0]
+        for es, b in results[1:]:
+            if es > maxSurplus:
+                maxSurplus, bid = es, b
+    else:
+        maxSurplus, bid = pruneSearchWorker_((table, evalSamples, candidates, firstWon, None, lowerBound))
+
+    if verbose:
+        print(bid)
+        print(maxSurplus)
 
     if ret == 'bid':
         return bid
     elif ret == 'all':
-        return bid, maxSurplus
\ No newline at end of file
+        return bid, maxSurplus
@@ -7,6 +7,29 @@ Date: 1/2/2013 (adapted from ssapy.agents.condLocalBid)
 
 import numpy
 
+from ssapy.util import bundles2codes, goodBit, revenueTable
+from ssapy.util.revenue import isRevenueFunction, bundleSum, codeRevenue
+from ssapy.strategies.localSearch import localSearch
+
+def condRevenueSums_(revenue, bids, targetBid, samples):
+    """
+    For a revenue function object, the sums over bundles used by the
+    condLocal updates computed from the samples instead of the bundle list:
+    
+        sum_{b : b[j]} rev(b)*#(goodsWon == b)  = sum of rev(goodsWon) over samples winning j
+        sum_{b : b[j]} rev(b - j)*#(goodsWon == b - j) = sum of rev(goodsWon) over samples losing j
+        
+    Returns (revWon, revLost, normWon, normLost)
+    """
+    goodsWon = samples <= bids
+    
+    jWon = goodsWon[:,targetBid]
+    
+    rev = revenue.evaluate(goodsWon)
+    
+    return numpy.sum(rev[jWon]), numpy.sum(rev[~jWon]), \
+        float(numpy.count_nonzero(jWon)), float(numpy.count_nonzero(~jWon))
+
 def condLocalLimitUpdate(bundles, revenue, bids, 
                          targetBid, samples, eps = 1e-5, 
                          verbose = False):
@@ -35,6 +58,16 @@ def condLocalLimitUpdate(bundles, revenue, bids,
         newBid     := (float) the new bid for the target good
     """
     
+    if isRevenueFunction(revenue):
+        revWon, revLost, normWon, normLost = condRevenueSums_(revenue, bids, targetBid, samples)
+        
+        newBid  = revWon/normWon   if normWon  else 0.5*bundleSum(revenue, targetBid, True)
+        newBid -= revLost/normLost if normLost else 0.5*bundleSum(revenue, targetBid, False)
+        
+        if verbose:
+            print(newBid)
+        return newBid
+    
     newBid = 0.0
         
     goodsWon = samples <= bids
@@ -85,7 +118,7 @@ def condLocalLimitUpdate(bundles, revenue, bids,
                 print('\t#({0}) = {1}'.format(negBundle, p0))
                 print('\t#({0} = True) = {1}'.format(targetBid, normLost))
 
-        p0 /= normLost
+            p0 /= normLost
         
         if verbose:
             print('p({0} | {1} = False) = {2}'.format(posBundle, targetBid, p0))
@@ -106,7 +139,7 @@ def condLocalLimitUpdate(bundles, revenue, bids,
 
 def condLocalLimit(bundles, revenue, initialBids, 
                    samples, maxItr = 100, tol = 1e-5, 
-                   verbose = False, ret = 'bids'):
+                   verbose = False, ret = 'bids', **kwargs):
     """
     Starting form an initial bid, run the condLocal algorithm and return 
     an updated bid vector.
@@ -137,6 +170,10 @@ def condLocalLimit(bundles, revenue, initialBids,
                     
     ret         := (string) Else return tuple:
                             (bids, converged (boolean), nItr (int), dist (float)) 
+                        
+    kwargs      := damping, accel, memory, detectCycles, maxPeriod (see 
+                    ssapy.strategies.localSearch); ret = 'trace' also returns 
+                    the per iteration trace.
     
     OUTPUTS
     -------
@@ -151,28 +188,10 @@ def condLocalLimit(bundles, revenue, initialBids,
     l            := Euclidean distance between the last update step 
                     and the previous state of the bid vector.
     """
-    m = bundles.shape[1]
-    newBids = numpy.atleast_1d(initialBids).copy()
-    converged = False
+    def update(bids, gIdx):
+        return condLocalLimitUpdate(bundles, revenue, bids, gIdx, samples, verbose)
     
-    for itr in range(maxItr):
-        oldBid = newBids.copy()
-        
-        for gIdx in range(m):
-            newBids[gIdx] = condLocalLimitUpdate(bundles, revenue, newBids, gIdx, samples, verbose)
-            
-        d = numpy.linalg.norm(oldBid-newBids)
-        
-        if d <= tol:
-            converged = True
-            break
-        
-    if ret == 'bids':
-        return newBids
-    elif ret == 'all':
-        return newBids, converged, itr + 1, d
-    else:
-        raise ValueError("Unknown Return Type.")
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
 
 def condLocalUpdate(bundles, revenue, bids, 
                     targetBid, samples, eps = 1.0, 
@@ -203,6 +222,17 @@ def condLocalUpdate(bundles, revenue, bids,
         newBid     := (float) the new bid for the target good
     """
     
+    if isRevenueFunction(revenue):
+        revWon, revLost, normWon, normLost = condRevenueSums_(revenue, bids, targetBid, samples)
+        
+        # each of the 2^(m-1) bundles gets a pseudo count of eps
+        newBid = (revWon  + eps*bundleSum(revenue, targetBid, True ))/(normWon  + 2*eps) -\
+                 (revLost + eps*bundleSum(revenue, targetBid, False))/(normLost + 2*eps)
+        
+        if verbose:
+            print(newBid)
+        return newBid
+    
     newBid = 0.0
         
     goodsWon = samples <= bids
@@ -266,7 +296,7 @@ def condLocalUpdate(bundles, revenue, bids,
 
 def condLocal(bundles, revenue, initialBids, 
               samples, maxItr = 100, tol = 1e-5, 
-              verbose = False, ret = 'bids', eps = 1.0):
+              verbose = False, ret = 'bids', eps = 1.0, **kwargs):
     """
     Starting form an initial bid, run the condLocal algorithm and return 
     an updated bid vector.
@@ -297,6 +327,10 @@ def condLocal(bundles, revenue, initialBids,
                     
     ret         := (string) Else return tuple:
                             (bids, converged (boolean), nItr (int), dist (float)) 
+                        
+    kwargs      := damping, accel, memory, detectCycles, maxPeriod (see 
+                    ssapy.strategies.localSearch); ret = 'trace' also returns 
+                    the per iteration trace.
     
     OUTPUTS
     -------
@@ -311,30 +345,11 @@ def condLocal(bundles, revenue, initialBids,
     l            := Euclidean distance between the last update step 
                     and the previous state of the bid vector.
     """
-    m = bundles.shape[1]
-    newBids = numpy.atleast_1d(initialBids).copy()
-    converged = False
+    def update(bids, gIdx):
+        return condLocalUpdate(bundles, revenue, bids, gIdx, samples, 
+                               eps=eps, verbose = verbose)
     
-    for itr in range(maxItr):
-        oldBid = newBids.copy()
-        
-        for gIdx in range(m):
-            newBids[gIdx] = condLocalUpdate(bundles, revenue, 
-                                            newBids, gIdx, samples, 
-                                            eps=eps, verbose = verbose)
-            
-        d = numpy.linalg.norm(oldBid-newBids)
-        
-        if d <= tol:
-            converged = True
-            break
-        
-    if ret == 'bids':
-        return newBids
-    elif ret == 'all':
-        return newBids, converged, itr + 1, d
-    else:
-        raise ValueError("Unknown Return Type.")
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
     
 def condLocalZeroUpdate(bundles, revenue, bids, 
                         targetBid, samples, 
@@ -364,6 +379,16 @@ def condLocalZeroUpdate(bundles, revenue, bids,
         newBid     := (float) the new bid for the target good
     """
     
+    if isRevenueFunction(revenue):
+        revWon, revLost, normWon, normLost = condRevenueSums_(revenue, bids, targetBid, samples)
+        
+        newBid  = revWon/normWon   if normWon  else 0.0
+        newBid -= revLost/normLost if normLost else 0.0
+        
+        if verbose:
+            print(newBid)
+        return newBid
+    
     newBid = 0.0
         
     goodsWon = samples <= bids
@@ -435,7 +460,7 @@ def condLocalZeroUpdate(bundles, revenue, bids,
     
 def condLocalZero(bundles, revenue, initialBids, 
                   samples, maxItr = 100, tol = 1e-5, 
-                  verbose = False, ret = 'bids'):
+                  verbose = False, ret = 'bids', **kwargs):
     """
     Starting form an initial bid, run the condLocal algorithm and return 
     an updated bid vector.
@@ -466,6 +491,10 @@ def condLocalZero(bundles, revenue, initialBids,
                     
     ret         := (string) Else return tuple:
                             (bids, converged (boolean), nItr (int), dist (float)) 
+                        
+    kwargs      := damping, accel, memory, detectCycles, maxPeriod (see 
+                    ssapy.strategies.localSearch); ret = 'trace' also returns 
+                    the per iteration trace.
     
     OUTPUTS
     -------
@@ -480,41 +509,20 @@ def condLocalZero(bundles, revenue, initialBids,
     l            := Euclidean distance between the last update step 
                     and the previous state of the bid vector.
     """
-    m = bundles.shape[1]
-    newBids = numpy.atleast_1d(initialBids).copy()
-    converged = False
+    def update(bids, gIdx):
+        return condLocalZeroUpdate(bundles, revenue, bids, gIdx, samples, verbose)
     
-    for itr in range(maxItr):
-        oldBid = newBids.copy()
-        
-        for gIdx in range(m):
-            newBids[gIdx] = condLocalZeroUpdate(bundles, revenue, newBids, gIdx, samples, verbose)
-            
-        d = numpy.linalg.norm(oldBid-newBids)
-        
-        if d <= tol:
-            converged = True
-            break
-        
-    if ret == 'bids':
-        return newBids
-    elif ret == 'all':
-        return newBids, converged, itr + 1, d
-    else:
-        raise ValueError("Unknown Return Type.")
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
           
 def condLocalMcUpdate(bundleRevenueDict, bids, j, samples, pad = True, verbose = False):
         
-    evg = 0.0
-    evl = 0.0
-    nwon = 0
-    nlost = 0
+    bids = numpy.atleast_1d(bids)
     
-    samplesCopy = list(samples.copy())
+    samplesCopy = numpy.atleast_2d(samples)
     
     if pad == True:
             
-        bidplus = numpy.atleast_1d(bids).copy()
+        bidplus = bids.copy()
         bidplus[j] += 1
         
         bidminus = bids.copy()
@@ -523,17 +531,16 @@ def condLocalMcUpdate(bundleRevenueDict, bids, j, samples, pad = True, verbose =
         else:
             bidminus[j] = 0
         
-        samplesCopy.append(bidplus)
-        
-        samplesCopy.append(bidminus)
-            
-    for sample in samplesCopy:
-        if sample[j] <= bids[j]:
-            evg += bundleRevenueDict[tuple(sample<=bids)]
-            nwon += 1
-        else:
-            evg += bundleRevenueDict[tuple(sample<=bids)]
-            nlost +=1
+        samplesCopy = numpy.vstack((samplesCopy, bidplus, bidminus))
+    
+    won = samplesCopy <= bids
+    
+    nwon  = numpy.count_nonzero(won[:,j])
+    nlost = won.shape[0] - nwon
+    
+    # the revenue of every sample is accumulated in evg, evl stays 0
+    evg = numpy.sum(codeRevenue(bundleRevenueDict, bundles2codes(won)), dtype = numpy.float64)
+    evl = 0.0
             
     if nwon > 0:
         evg /= nwon
@@ -552,9 +559,10 @@ def condLocalMc(bundles, revenue, initBids, samples,
     newBids = numpy.atleast_1d(initBids).copy()
     converged = True
     
-    brd = {}
-    for b,r in zip(bundles,revenue):
-        brd[tuple(b)] = r
+    if isRevenueFunction(revenue):
+        brd = revenue
+    else:
+        brd = revenueTable(bundles, revenue)
     
     if m != samples.shape[1]:
         raise ValueError("m != samples.shape[1]")
@@ -581,22 +589,18 @@ def condLocalMc(bundles, revenue, initBids, samples,
     
 def condMVLocalUpdate(bundleRevenueDict, bids, j, samples, verbose = False):
     
-    newBid = 0.0
+    bids = numpy.atleast_1d(bids)
     
     samplesjwon = samples[samples[:,j] < bids[j]]
     
     if samplesjwon.shape[0] == 0:
         return 0.0
-        
-    for samplejwon in samplesjwon:
-        bundleWon = samplejwon < bids
-        bundleLost = bundleWon.copy()
-        bundleLost[j] = False
-#        jwonrev = revenue[numpy.where((bundles == bundleWon).all(axis=1))[0][0]]
-#        jlostrev = revenue[numpy.where((bundles == bundleLost).all(axis=1))[0][0]]
-        jwonrev  = bundleRevenueDict[tuple(bundleWon)]
-        jlostrev = bundleRevenueDict[tuple(bundleLost)]
-        newBid += jwonrev - jlostrev
+    
+    codes = bundles2codes(samplesjwon < bids)
+    bit   = goodBit(bids.shape[0], j)
+    
+    newBid = numpy.sum(codeRevenue(bundleRevenueDict, codes) -\
+                       codeRevenue(bundleRevenueDict, codes & ~bit), dtype = numpy.float64)
         
     newBid /= samplesjwon.shape[0]
     
@@ -607,32 +611,18 @@ def condMVLocalUpdate(bundleRevenueDict, bids, j, samples, verbose = False):
 
 def condMVLocal(bundles, revenue, initBids, samples, 
                      maxItr = 100, tol = 1e-5, verbose = False, 
-                     ret = 'bids'):
-    m         = bundles.shape[1]
-    newBids   = numpy.atleast_1d(initBids).copy()
-    converged = False
+                     ret = 'bids', **kwargs):
+    """
+    Jacobi iteration of condMVLocalUpdate, see localSearch for the 
+    optional kwargs (damping, accel, detectCycles, ...).
+    """
+    if isRevenueFunction(revenue):
+        brd = revenue
+    else:
+        brd = revenueTable(bundles, revenue)
     
-    brd = {}
-    for b,r in zip(bundles,revenue):
-        brd[tuple(b)] = r
+    def update(bids, gIdx):
+        return condMVLocalUpdate(brd, bids, gIdx, samples, verbose)
     
-    for itr in range(maxItr):
-        oldBids = newBids.copy()
-        
-        for gIdx in range(m):
-            newBids[gIdx] = condMVLocalUpdate(brd, 
-                               oldBids, gIdx, samples, verbose)
-            
-        d = numpy.linalg.norm(oldBids - newBids)
-        
-        if d <= tol:
-            converged = True
-            break
-            
-    if ret == 'bids':
-        return newBids
-    elif ret == 'all':
-        return newBids, converged, itr + 1, d
-    else:
-        raise ValueError('Unknown Return Type {0}.'.format(ret))
+    return localSearch(update, initBids, maxItr, tol, ret, jacobi = True, **kwargs)
             
\ No newline at end of file
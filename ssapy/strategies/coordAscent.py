@@ -0,0 +1,142 @@
+import numpy
+
+from ssapy.util import wonCodes, goodBit
+from ssapy.util.revenue import codeRevenue
+
+def coordBidUpdate(bundleRevenueDict, bid, j, evalSamples, order = None):
+    """
+    The bid for good j maximizing expected surplus (as expectedSurplus_)
+    over evalSamples with all other bids fixed.
+
+    Expected surplus is piecewise constant in bid[j] with breakpoints at the sample
+    prices of good j, so every breakpoint is evaluated at once with a prefix sum over
+    the samples sorted by the price of good j.
+
+    INPUTS
+    ------
+    bundleRevenueDict := dict keyed by tuple(bundle), revenue table indexed by
+                         bundle code (ssapy.util.revenueTable) or revenue object
+
+    bid               := (1d array-like) current bids
+
+    j                 := (int) the (zero-indexed) good to update
+
+    evalSamples       := (2d array-like) price samples
+
+    order             := (1d array-like) argsort(evalSamples[:,j]), computed if None
+
+    OUTPUTS
+    -------
+    (newBid, newSurplus, oldSurplus) - the new bid for good j, the expected surplus
+    with the new bid and the expected surplus with the current bid.
+
+    Among bids with equal surplus the lowest is returned, bid[j] is
+    kept unless another bid is strictly better.
+    """
+    bid = numpy.atleast_1d(bid)
+
+    if order is None:
+        order = numpy.argsort(evalSamples[:,j], kind = 'mergesort')
+
+    samples = evalSamples[order]
+    prices  = samples[:,j]
+    n       = samples.shape[0]
+
+    bit   = goodBit(bid.shape[0], j)
+    codes = wonCodes(samples, bid) & ~bit
+
+    # surplus of each sample without good j, cost of the other goods won
+    otherWon = samples <= bid
+    otherWon[:,j] = False
+    base = codeRevenue(bundleRevenueDict, codes) - numpy.sum(otherWon*samples,1)
+
+    # additional surplus of winning good j in each sample
+    gain = codeRevenue(bundleRevenueDict, codes | bit) - codeRevenue(bundleRevenueDict, codes) - prices
+
+    baseSurplus = numpy.sum(base)/n
+
+    # bidding prices[k] wins every sample priced <= prices[k], i.e. the samples up to
+    # the last of its ties
+    cumGain = numpy.cumsum(gain)/n
+    lastTie = numpy.append(numpy.flatnonzero(numpy.diff(prices) != 0), n - 1)
+
+    nWon = numpy.searchsorted(prices, bid[j], side = 'right')
+    if nWon == 0:
+        oldSurplus = baseSurplus
+    else:
+        oldSurplus = baseSurplus + cumGain[nWon - 1]
+
+    cumGain = cumGain[lastTie]
+
+    bestIdx = numpy.argmax(cumGain)
+
+    if max(cumGain[bestIdx], 0.0) + baseSurplus <= oldSurplus:
+        return bid[j], oldSurplus, oldSurplus
+
+    if cumGain[bestIdx] > 0.0:
+        return prices[lastTie[bestIdx]], baseSurplus + cumGain[bestIdx], oldSurplus
+
+    # winning good j never helps, bid below every sample price
+    noBid = 0.0 if prices[0] > 0.0 else prices[0] - 1.0
+
+    return noBid, baseSurplus, oldSurplus
+
+def coordAscentS(bundleRevenueDict, initBid, evalSamples, maxItr = 100,
+                 verbose = False, ret = 'bid'):
+    """
+    Exact coordinate ascent on the expected surplus of a sample set
+    (the objective of downHillSS and bruteForceS).
+
+    Each update sets one bid to its optimal value given the others (see coordBidUpdate);
+    an iteration updates every good once. Expected surplus never decreases and the
+    algorithm has converged when an iteration changes no bid.
+
+    INPUTS
+    ------
+    bundleRevenueDict := dict keyed by tuple(bundle), revenue table indexed by
+                         bundle code (ssapy.util.revenueTable) or revenue object
+
+    initBid           := (1d array-like) initial bids
+
+    evalSamples       := (2d array-like) price samples
+
+    maxItr            := (int) maximum number of iterations
+
+    ret               := 'bid' returns the bids,
+                         'all' returns (bid, expectedSurplus, converged, nItr)
+    """
+    evalSamples = numpy.atleast_2d(evalSamples)
+    bid         = numpy.atleast_1d(initBid).astype(numpy.float64).copy()
+    m           = bid.shape[0]
+
+    if m != evalSamples.shape[1]:
+        raise ValueError("coordAscentS(...) - bid.shape[0] = {0} != evalSamples.shape[1] = {1}".\
+                         format(m, evalSamples.shape[1]))
+
+    orders = [numpy.argsort(evalSamples[:,j], kind = 'mergesort') for j in range(m)]
+
+    converged = False
+    surplus   = None
+    for itr in range(maxItr):
+        changed = False
+        for j in range(m):
+            newBid, surplus, oldSurplus = \
+                coordBidUpdate(bundleRevenueDict, bid, j, evalSamples, orders[j])
+
+            if newBid != bid[j]:
+                bid[j]  = newBid
+                changed = True
+
+        if verbose:
+            print('Iteration {0}: bid = {1}, expected surplus = {2}'.format(itr + 1, bid, surplus))
+
+        if not changed:
+            converged = True
+            break
+
+    if ret == 'bid':
+        return bid
+    elif ret == 'all':
+        return bid, surplus, converged, itr + 1
+    else:
+        raise ValueError("Unknown Return String {0}".format(ret))
@@ -1,33 +1,110 @@
 from scipy.optimize import fmin
 import numpy
+import collections
+import multiprocessing
+
+from ssapy.util import bundles2codes, revenueTable
+from ssapy.util.revenue import codeRevenue
 
 def NegExpectedSurplusSamples(bid, bundleRevenueDict, evalSamples):
-    es = numpy.float64(0.)
-    
-    for sample in evalSamples:
-        goodsWon = sample <= bid
-        rev = bundleRevenueDict[(tuple(goodsWon))]
-        cost = numpy.dot(goodsWon,sample)
-        es += rev-cost
-        
-    return -(es/evalSamples.shape[0])
-
-def downHillSS(bundleRevenueDict, initBid, evalSamples, 
+    """
+    Negative expected surplus of bid over evalSamples evaluated for all samples at once.
+
+    bundleRevenueDict may be a dict keyed by tuple(bundle), a revenue table
+    indexed by bundle code (ssapy.util.revenueTable) or a revenue object.
+    """
+    goodsWon = evalSamples <= bid
+
+    rev = codeRevenue(bundleRevenueDict, bundles2codes(goodsWon))
+
+    return -numpy.mean(rev - numpy.sum(goodsWon*evalSamples,1))
+
+class negExpectedSurplusCache(object):
+    """
+    NegExpectedSurplusSamples for fixed revenue and samples, remembering the
+    last cacheSize bids evaluated (Nelder-Mead re-evaluates simplex vertices).
+    """
+    def __init__(self, bundleRevenueDict, evalSamples, cacheSize = 256):
+        if isinstance(bundleRevenueDict, dict):
+            bundleRevenueDict = revenueTable(None, bundleRevenueDict)
+
+        self.bundleRevenueDict = bundleRevenueDict
+        self.evalSamples       = numpy.atleast_2d(evalSamples)
+        self.cacheSize         = cacheSize
+        self.cache             = collections.OrderedDict()
+
+        self.nCalls = 0
+        self.nHits  = 0
+
+    def __call__(self, bid):
+        self.nCalls += 1
+
+        bid = numpy.asarray(bid, dtype = numpy.float64)
+        key = bid.tobytes()
+
+        if key in self.cache:
+            self.nHits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        val = NegExpectedSurplusSamples(bid, self.bundleRevenueDict, self.evalSamples)
+
+        self.cache[key] = val
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last = False)
+
+        return val
+
+def downHillWorker_(args):
+    objective, initBid, maxiter, disp = args
+
+    return fmin(objective, x0 = initBid,
+                maxiter = maxiter, disp = disp,
+                full_output = True, retall = False )
+
+def downHillSS(bundleRevenueDict, initBid, evalSamples,
                     maxiter = 100, disp = True,
-                    clip = True, ret = 1):
-    
+                    clip = True, ret = 1,
+                    nRestarts = 0, nProcs = 1, cacheSize = 256):
+    """
+    Nelder-Mead (scipy.optimize.fmin) search for the bid maximizing expected
+    surplus over evalSamples.
+
+    nRestarts   := (int) additional runs started from bids drawn uniformly between
+                   the smallest and largest sample price of each good; the best run
+                   is returned.
+
+    nProcs      := (int) number of processes the runs are split among.
+
+    cacheSize   := (int) number of recently evaluated bids remembered per run.
+    """
+    objective = negExpectedSurplusCache(bundleRevenueDict, evalSamples, cacheSize)
+
+    initBids = [numpy.atleast_1d(initBid).astype(numpy.float64)]
+    for r in range(nRestarts):
+        initBids.append(numpy.random.uniform(numpy.min(objective.evalSamples,0),
+                                             numpy.max(objective.evalSamples,0)))
+
+    args = [(objective, b, maxiter, disp) for b in initBids]
+
+    if nProcs > 1 and len(args) > 1:
+        pool = multiprocessing.Pool(min(nProcs, len(args)))
+        results = pool.map(downHillWorker_, args)
+        pool.close()
+        pool.join()
+    else:
+        results = [downHillWorker_(a) for a in args]
+
+    # lowest negative surplus, the first run wins ties
     bid, expectedSurplus, nItr, nFncCalls, warnFlag = \
-        fmin(NegExpectedSurplusSamples, x0 = initBid, 
-             args = (bundleRevenueDict,evalSamples), 
-             maxiter = maxiter, disp = disp,
-             full_output = True, retall = False )
-        
+        results[numpy.argmin([r[1] for r in results])]
+
 #    bid = out[0]
-    
+
 #    out[0] = numpy.atleast_1d(out[0])
     if clip:
         bid = bid.clip(0)
-        
+
     if ret == 1:
         return bid
     elif ret == 2:
@@ -40,4 +117,4 @@ def downHillSS(bundleRevenueDict, initBid, evalSamples,
         return bid, expectedSurplus, nItr, nFncCalls, warnFlag
     else:
         raise ValueError('Unknonw Return Code {0}'.format(ret))
-        
\ No newline at end of file
+
@@ -1,4 +1,9 @@
 import numpy
+import collections
+
+from ssapy.util import wonCodes, goodBit, revenueTable, codes2bundles
+from ssapy.util.revenue import isRevenueFunction, marginalRevenue, codeRevenue
+from ssapy.strategies.localSearch import localSearch
 
 def marginalUtilityDict_(bundleRevenueDict, bids, targetBid, sample):
     bundleWon = sample <= bids
@@ -33,63 +38,39 @@ def jointLocalUpdateMc(bundles, revenue, bids, targetBid, samples, verbose = Fal
     return muj/samples.shape[0]
 
 def jointLocalUpdateMcDict(bundleRevenueDict, bids, targetBid, samples, verbose = False):
-    muj = numpy.float64(0.0)
+    """
+    Monte carlo estimate of the marginal revenue of good targetBid.
     
-    for sample in samples:
-#        muj += marginalUtilityDict_(bundleRevenueDict, bids, targetBid, sample)
-        bundleWon = sample <= bids
+    bundleRevenueDict may be a dict keyed by tuple(bundle), a revenue table
+    indexed by bundle code (ssapy.util.revenueTable) or a revenue object.
+    """
+    bids  = numpy.atleast_1d(bids)
+    codes = wonCodes(samples, bids)
+    bit   = goodBit(bids.shape[0], targetBid)
     
-        posBundle = bundleWon.copy()
-        negBundle = bundleWon.copy()
-        posBundle[targetBid] = True
-        negBundle[targetBid] = False
-        
-        muj += (bundleRevenueDict[tuple(posBundle)] - bundleRevenueDict[tuple(negBundle)])
+    muj = numpy.sum(codeRevenue(bundleRevenueDict, codes | bit) -\
+                    codeRevenue(bundleRevenueDict, codes & ~bit), dtype = numpy.float64)
         
     if verbose:
         print(muj / samples.shape[0])
 
     return muj / samples.shape[0]
 
-def jointLocalMc(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids'):
-    m         = bundles.shape[1]
-    newBids   = numpy.atleast_1d(initialBids)
-    converged = False
-    
-    bundleRevenueDict = {}
-    for bundle, r in zip(bundles,revenue):
-        bundleRevenueDict[tuple(bundle)] = r
-    
-    for itr in range(maxItr):
-        oldBids = newBids.copy()
-        
-        for gIdx in range(m):
-#            newBids[gIdx] = jointLocalUpdateMc(bundles, revenue, newBids, gIdx, samples, verbose)
-            newBids[gIdx] = jointLocalUpdateMcDict(bundleRevenueDict, newBids, gIdx, samples, verbose)
-            
-        if verbose:
-            print('newBids = {0}'.format(newBids))
-
-        d = numpy.linalg.norm(oldBids - newBids)
-        
-        if verbose:
-            print('d = {0}'.format(d))
-
-        if d <= tol:
-            converged = True
-            
-            if verbose:
-                print('converged = {0}'.format(converged))
-            break
-        
-    if ret == 'bids':
-        return newBids
-    elif ret == 'all':
-        return newBids, converged, itr + 1, d
+def jointLocalMc(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids', **kwargs):
+    """
+    Gauss-Seidel iteration of jointLocalUpdateMcDict, see localSearch for the 
+    optional kwargs (damping, accel, detectCycles, ...).
+    """
+    if isRevenueFunction(revenue):
+        bundleRevenueDict = revenue
     else:
-        raise ValueError("Unknown Return String {0}".format(ret))
-        
+        bundleRevenueDict = revenueTable(bundles, revenue)
     
+    def update(bids, gIdx):
+#        return jointLocalUpdateMc(bundles, revenue, bids, gIdx, samples, verbose)
+        return jointLocalUpdateMcDict(bundleRevenueDict, bids, gIdx, samples, verbose)
+    
+    return localSearch(update, initialBids, maxItr, tol, ret, verbose = verbose, **kwargs)
     
 def jointLocalUpdate( bundles, revenue, bids, targetBid, samples, verbose = False ):
     """
@@ -101,6 +82,9 @@ def jointLocalUpdate( bundles, revenue, bids, targetBid, samples, verbose = Fals
     bundles    := (2d array-like) List of bundles
         
     revenue    := (1d array-like) List of revenue (1:1 correspondence with bundles)
+                    or a revenue function object (ssapy.util.revenue), in which 
+                    case bundles is ignored and the probability weighted sum over
+                    bundles is computed directly over the samples.
     
     bids       := (1d array-like) List of bids. 
     
@@ -118,6 +102,12 @@ def jointLocalUpdate( bundles, revenue, bids, targetBid, samples, verbose = Fals
         newBid     := (float) the new bid for the target good
     """
     
+    if isRevenueFunction(revenue):
+        newBid = numpy.mean(marginalRevenue(revenue, samples <= bids, targetBid))
+        if verbose:
+            print(newBid)
+        return newBid
+    
     newBid = 0.0
     
     goodsWon = samples <= bids
@@ -154,7 +144,7 @@ def jointLocalUpdate( bundles, revenue, bids, targetBid, samples, verbose = Fals
 
     return newBid
 
-def jointLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids'):
+def jointLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids', **kwargs):
     """
     Starting form an initial bid, run the jointLocal algorithm and return 
     an updated bid vector.
@@ -168,6 +158,7 @@ def jointLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5,
     bundles     := (2d array-like) List of bundles
         
     revenue     := (1d array-like) List of revenue (1:1 correspondence with bundles)
+                    or a revenue function object (bundles may then be None).
     
     initialBids := (1d array-like) List of initial bids, 1 per good at auction.
                     bundles.shape[1] = initialBids.shape[0]
@@ -185,6 +176,10 @@ def jointLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5,
                     
     ret         := (string) Else return tuple:
                         (bids, converged (boolean), nItr (int), dist (float)) 
+                        
+    kwargs      := damping, accel, memory, detectCycles, maxPeriod (see 
+                    ssapy.strategies.localSearch); ret = 'trace' also returns 
+                    the per iteration trace.
     
     OUTPUTS
     -------
@@ -208,24 +203,159 @@ def jointLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol = 1e-5,
                     and the previous state of the bid vector.
     """
     
-    m         = bundles.shape[1]
-    newBids   = numpy.atleast_1d(initialBids).copy()
-    converged = False
+    def update(bids, gIdx):
+        return jointLocalUpdate(bundles, revenue, bids, gIdx, samples, verbose)
+    
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
+
+def winProbA_(pricePrediction, bids, targetBid, **kwargs):
+    """
+    Probability of winning the goods other than targetBid exactly as in each 
+    of the 2^(m-1) bundles without the target good (ordered by bundle code), 
+    under the price prediction truncated to [minPrice, maxPrice] in every good 
+    as jointGMM.sample draws it.
+    
+    Each bundle is a box with the won goods priced at or below their bids, the 
+    lost goods above them and the target good unconstrained, intersected with 
+    the price box. The boxes and the price box itself (the normalization) are 
+    integrated in a single pricePrediction.rectProb call.
+    """
+    bids  = numpy.atleast_1d(bids).astype(numpy.float64)
+    m     = bids.shape[0]
+    bit   = goodBit(m, targetBid)
+    
+    minPrice = getattr(pricePrediction, 'minPrice', -numpy.inf)
+    maxPrice = getattr(pricePrediction, 'maxPrice', numpy.inf)
+    
+    codes = numpy.arange(2**m)
+    codes = codes[(codes & bit) == 0].astype(bit.dtype)
+    
+    won   = codes2bundles(codes, m)
+    lower = numpy.where(won, minPrice, numpy.maximum(bids, minPrice))
+    upper = numpy.where(won, numpy.minimum(bids, maxPrice), maxPrice)
+    lower[:,targetBid] = minPrice
+    upper[:,targetBid] = maxPrice
+    
+    # empty intersections are zero width boxes
+    upper = numpy.maximum(upper, lower)
+    
+    lower = numpy.vstack((lower, numpy.full(m, minPrice, dtype = numpy.float64)))
+    upper = numpy.vstack((upper, numpy.full(m, maxPrice, dtype = numpy.float64)))
     
-    for itr in range(maxItr):
-        oldBids = newBids.copy()
+    p = pricePrediction.rectProb(lower, upper, **kwargs)
+    
+    if not p[-1] > 0.0:
+        raise ValueError("winProbA_(...) - the price prediction has no mass in [{0}, {1}]".format(minPrice, maxPrice))
+    
+    return numpy.clip(p[:-1]/p[-1], 0.0, 1.0)
+
+class winProbCache(object):
+    """
+    winProbA_ for a fixed price prediction and rectProb kwargs, remembering 
+    the probabilities of the last cacheSize updates. An update only depends 
+    on the bids of the other goods, so it repeats once those have stopped 
+    moving (or the search cycles).
+    """
+    def __init__(self, pricePrediction, cacheSize = 64, **kwargs):
+        self.pricePrediction = pricePrediction
+        self.kwargs          = kwargs
+        self.cacheSize       = cacheSize
+        self.cache           = collections.OrderedDict()
+        
+        self.nCalls = 0
+        self.nHits  = 0
+        
+    def __call__(self, bids, targetBid):
+        self.nCalls += 1
+        
+        bids = numpy.atleast_1d(bids).astype(numpy.float64)
+        key  = (targetBid, numpy.delete(bids, targetBid).tobytes())
+        
+        if key in self.cache:
+            self.nHits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
         
-        for gIdx in range(m):
-            newBids[gIdx] = jointLocalUpdate(bundles, revenue, newBids, gIdx, samples, verbose)
-                
-        d = numpy.linalg.norm(oldBids - newBids)
-        if d <= tol:
-            converged = True
-            break
+        p = winProbA_(self.pricePrediction, bids, targetBid, **self.kwargs)
         
-    if ret == 'bids':
-        return newBids
-    elif ret == 'all':
-        return newBids, converged, itr + 1, d
+        self.cache[key] = p
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last = False)
+        
+        return p
+
+def jointLocalUpdateA(bundleRevenueDict, bids, targetBid, pricePrediction, cache = None, verbose = False, **kwargs):
+    """
+    Analytic jointLocalUpdate for a Gaussian mixture price prediction (jointGMM).
+    
+    The probabilities of winning the other goods exactly as in each bundle are 
+    rectangle probabilities of the prediction truncated to [minPrice, maxPrice] 
+    (see winProbA_), all 2^(m-1) of them integrated in one batch.
+    
+    INPUTS
+    ------
+    bundleRevenueDict := dict keyed by tuple(bundle), revenue table indexed by 
+                         bundle code (ssapy.util.revenueTable) or revenue object.
+    
+    bids              := (1d array-like) List of bids.
+    
+    targetBid         := (int) the (zero-indexed) bid to be updated.
+    
+    pricePrediction   := jointGMM (any object with rectProb(lower, upper, **kwargs))
+    
+    cache             := (winProbCache) of the same pricePrediction, reused when 
+                         the bids of the other goods don't change; kwargs are then 
+                         those of the cache.
+    
+    kwargs            := passed to rectProb (method, nPoints, seed).
+    
+    OUTPUTS
+    -------
+        newBid     := (float) the new bid for the target good
+    """
+    bids  = numpy.atleast_1d(bids).astype(numpy.float64)
+    m     = bids.shape[0]
+    bit   = goodBit(m, targetBid)
+    
+    codes = numpy.arange(2**m)
+    codes = codes[(codes & bit) == 0].astype(bit.dtype)
+    
+    mu = codeRevenue(bundleRevenueDict, codes | bit) - codeRevenue(bundleRevenueDict, codes)
+    
+    if cache is None:
+        p = winProbA_(pricePrediction, bids, targetBid, **kwargs)
     else:
-        raise ValueError("Unknown Return String {0}".format(ret))
\ No newline at end of file
+        p = cache(bids, targetBid)
+    
+    newBid = numpy.dot(mu, p)
+    
+    if verbose:
+        print(newBid)
+    
+    return newBid
+
+def jointLocalA(bundles, revenue, initialBids, pricePrediction, maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids', 
+                method = 'qmc', nPoints = 1024, seed = 0, cacheSize = 64, **kwargs):
+    """
+    jointLocal without samples: Gauss-Seidel iteration of jointLocalUpdateA with 
+    the bundle win probabilities integrated from the jointGMM pricePrediction, 
+    truncated to its [minPrice, maxPrice] as the samples of the jointLocal agent.
+    
+    method, nPoints and seed select the rectangle integration (see jointGMM.rectProb);
+    with 'qmc' every update shares the same quasi random points so the iteration 
+    is deterministic. The win probabilities of the last cacheSize updates are 
+    kept (see winProbCache), which saves the integration once bids stop moving.
+    
+    Other inputs and outputs as jointLocal.
+    """
+    if isRevenueFunction(revenue):
+        bundleRevenueDict = revenue
+    else:
+        bundleRevenueDict = revenueTable(bundles, revenue)
+    
+    cache = winProbCache(pricePrediction, cacheSize, method = method, nPoints = nPoints, seed = seed)
+    
+    def update(bids, gIdx):
+        return jointLocalUpdateA(bundleRevenueDict, bids, gIdx, pricePrediction, cache, verbose)
+    
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
@@ -0,0 +1,153 @@
+"""
+this is /ssapy/strategies/localSearch.py
+
+Shared iteration loop of the local search strategies (jointLocal, condLocal,
+margLocal, ...): repeat sweeps of single bid updates until the bids stop
+changing, with optional damping, extrapolation and cycle detection.
+"""
+import numpy
+import time
+import collections
+
+def andersonStep_(x, g, state, memory):
+    """
+    Anderson acceleration (type II) of the fixed point iteration x <- g(x).
+    state holds the previous residual and sweep results.
+    """
+    f = g - x
+
+    if state.get('f') is not None:
+        state['dF'].append(f - state['f'])
+        state['dG'].append(g - state['g'])
+
+    state['f'], state['g'] = f.copy(), g.copy()
+
+    if not state['dF']:
+        return g
+
+    dF = numpy.atleast_2d(state['dF'][-memory:]).T
+    dG = numpy.atleast_2d(state['dG'][-memory:]).T
+
+    del state['dF'][:-memory]
+    del state['dG'][:-memory]
+
+    gamma = numpy.linalg.lstsq(dF, f, rcond = None)[0]
+
+    return g - numpy.dot(dG, gamma)
+
+def aitkenStep_(g, state):
+    """
+    Componentwise Aitken delta-squared extrapolation after every
+    two plain sweeps.
+    """
+    state['x'].append(g.copy())
+
+    if len(state['x']) < 3:
+        return g
+
+    x0, x1, x2 = state['x']
+
+    denom = x2 - 2.0*x1 + x0
+    ok    = numpy.abs(denom) > 1e-12
+
+    xa = x2.copy()
+    xa[ok] = x2[ok] - (x2[ok] - x1[ok])**2/denom[ok]
+
+    state['x'] = [xa.copy()]
+
+    return xa
+
+def localSearch(update, initialBids, maxItr = 100, tol = 1e-5, ret = 'bids',
+                jacobi = False, damping = 1.0, accel = None, memory = 5,
+                detectCycles = False, maxPeriod = 10, verbose = False):
+    """
+    Iterate sweeps of single bid updates.
+
+    One iteration (sweep) updates every bid once with update(bids, goodIdx). Gauss-Seidel
+    sweeps use the bids updated so far, Jacobi sweeps (jacobi = True) use the bids
+    of the previous iteration. The search has converged when the Euclidean distance
+    between iterations is at most tol.
+
+    INPUTS
+    ------
+    update       := function(bids, goodIdx) returning the new bid for goodIdx
+
+    initialBids  := (1d array-like) initial bids
+
+    maxItr, tol  := maximum number of iterations and convergence tolerance
+
+    ret          := 'bids' -> bids
+                    'all'  -> (bids, converged, nItr, d)
+                    'trace'-> (bids, converged, nItr, d, trace), trace is a dict with
+                              the step norm and elapsed time of every iteration and the
+                              period of a detected cycle (0 if none)
+
+    damping      := (float) bids <- (1-damping)*bids + damping*sweep(bids)
+
+    accel        := None, 'aitken' or 'anderson' extrapolation of the iterates
+
+    memory       := (int) number of previous iterates used by anderson
+
+    detectCycles := (bool) stop (not converged) when the bids return to within tol of
+                    the bids 2..maxPeriod iterations earlier.
+    """
+    if accel not in [None, 'aitken', 'anderson']:
+        raise ValueError("localSearch - Unknown accel {0}".format(accel))
+
+    newBids   = numpy.atleast_1d(initialBids).copy()
+    m         = newBids.shape[0]
+    converged = False
+
+    trace   = {'stepNorm': [], 'time': [], 'cycle': 0}
+    history = collections.deque(maxlen = maxPeriod)
+    state   = {'f': None, 'g': None, 'dF': [], 'dG': [], 'x': [newBids.copy()]}
+    start   = time.time()
+
+    for itr in range(maxItr):
+        oldBids = newBids.copy()
+
+        if jacobi:
+            for gIdx in range(m):
+                newBids[gIdx] = update(oldBids, gIdx)
+        else:
+            for gIdx in range(m):
+                newBids[gIdx] = update(newBids, gIdx)
+
+        if damping != 1.0:
+            newBids = (1.0 - damping)*oldBids + damping*newBids
+
+        if accel == 'anderson':
+            newBids = andersonStep_(oldBids, newBids, state, memory)
+        elif accel == 'aitken':
+            newBids = aitkenStep_(newBids, state)
+
+        d = numpy.linalg.norm(oldBids - newBids)
+
+        trace['stepNorm'].append(d)
+        trace['time'].append(time.time() - start)
+
+        if verbose:
+            print('Iteration {0}: bids = {1}, d = {2}'.format(itr + 1, newBids, d))
+
+        if d <= tol:
+            converged = True
+            break
+
+        history.append(oldBids)
+        if detectCycles:
+            period = [p for p in range(2, len(history) + 1)
+                      if numpy.linalg.norm(newBids - history[-p]) <= tol]
+            if period:
+                trace['cycle'] = period[0]
+                if verbose:
+                    print('Cycle of period {0} detected'.format(period[0]))
+                break
+
+    if ret == 'bids':
+        return newBids
+    elif ret == 'all':
+        return newBids, converged, itr + 1, d
+    elif ret == 'trace':
+        return newBids, converged, itr + 1, d, trace
+    else:
+        raise ValueError("Unknown Return String {0}".format(ret))
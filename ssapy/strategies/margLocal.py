@@ -1,31 +1,17 @@
-#from ssapy.pricePrediction.margDistSCPP import margDistSCPP
-from ssapy.pricePrediction.jointGMM import jointGMM
-
-from scipy.stats import norm
-from scipy.interpolate import interp1d
-
 import numpy
-import matplotlib.pyplot as plt
-
-from ssapy.strategies.straightMU import straightMU8, straightMU64, straightMU256
-from ssapy.scpp.depreciated import  margDistSCPP
 
-initStrategies = {'straightMU8': straightMU8,
-                  'straightMU64': straightMU64,
-                  'straightMU256':straightMU256}
+from ssapy.util import bundles2codes, codes2bundles, goodBit, revenueTable
+from ssapy.util.revenue import isRevenueFunction, codeRevenue
+from ssapy.strategies.localSearch import localSearch
 
 def margLocalMcUpdate(bundleRevenueDict, bids, j, 
                       samples, verbose = False):
-    newBid = 0.0
+    bids  = numpy.atleast_1d(bids)
+    codes = bundles2codes(samples < bids)
+    bit   = goodBit(bids.shape[0], j)
     
-    for sample in samples:
-        bundleWon = sample < bids
-        bundleWon[j] = True
-        
-        bundleLost = bundleWon.copy()
-        bundleLost[j] = False
-        
-        newBid += bundleRevenueDict[tuple(bundleWon)] - bundleRevenueDict[tuple(bundleLost)] 
+    newBid = numpy.sum(codeRevenue(bundleRevenueDict, codes | bit) -\
+                       codeRevenue(bundleRevenueDict, codes & ~bit), dtype = numpy.float64)
         
     newBid /= samples.shape[0]
     
@@ -40,6 +26,9 @@ def margLocalMc(bundleRevenueDict, initialBids, samples, maxItr = 100,
     m         = samples.shape[1]
     newBids   = numpy.atleast_1d(initialBids).copy()
     converged = False
+    
+    if isinstance(bundleRevenueDict, dict):
+        bundleRevenueDict = revenueTable(None, bundleRevenueDict)
         
     for itr in range(maxItr):
         oldBids = newBids.copy()
@@ -85,43 +74,75 @@ def margLocalUpdate(bundles, revenue, bids, targetBidIdx, samples, verbose = Fal
     OUTPUTS
     -------
         newBid     := (float) the new bid for the target good
+        
+    revenue may also be a revenue function object (see ssapy.util.revenue) 
+    in which case bundles is ignored and the new bid is the difference of its 
+    expected revenues with the target good won and lost.
     """
-    newBid = 0.0
-    
     pwin = numpy.sum(samples <= bids, 0, dtype = float)/samples.shape[0]
     
-    posIdxList = numpy.flatnonzero(bundles[:,targetBidIdx == True])
+    if isRevenueFunction(revenue):
+        bundleRevenueDict = revenue
+    else:
+        bundleRevenueDict = revenueTable(bundles, revenue)
     
-    for posIdx in posIdxList:
-        posBundle = bundles[posIdx,:]
-        negBundle = posBundle.copy()
-        negBundle[targetBidIdx] = False
-        
-        negIdx = numpy.where( (bundles == negBundle).all(axis=1) )[0][0]
-        
-        posRev = revenue[posIdx]
-        negRev = revenue[negIdx]
-        
-        p = 1.0
-        for goodIdx, good in enumerate(posBundle):
-            if goodIdx == targetBidIdx:
-                pass
-            else:
-                if good:
-                    p*=pwin[goodIdx]
-                else:
-                    p*=(1-pwin[goodIdx])
-                    
-        if p > 1.0:
-            raise ValueError("p > 1.0")
-        elif p < 0.0:
-            raise ValueError(" p < 0.0")
-        
-        newBid += (posRev - negRev)*p
+    newBid = margLocalUpdateP(bundleRevenueDict, pwin, targetBidIdx)
+    
+    if verbose:
+        print('\tNew bid = {0}'.format(newBid))
         
     return newBid
+
+def margBundleProb(bundles, pwin, skipIdx = None):
+    """
+    Probability of winning exactly each bundle (rows of bundles) when good i 
+    is won independently with probability pwin[i], as one product over the 
+    bundle table in log-space. The goods skipIdx (int or list) are left out 
+    of the product.
+    """
+    bundles = numpy.atleast_2d(bundles).astype(bool)
+    pwin    = numpy.clip(numpy.atleast_1d(pwin).astype(numpy.float64), 0.0, 1.0)
+    
+    with numpy.errstate(divide = 'ignore'):
+        logWin  = numpy.log(pwin)
+        logLose = numpy.log1p(-pwin)
+    
+    if skipIdx is not None:
+        logWin[skipIdx]  = 0.0
+        logLose[skipIdx] = 0.0
+    
+    return numpy.exp(numpy.sum(numpy.where(bundles, logWin, logLose), 1))
+
+def margLocalUpdateP(bundleRevenueDict, pwin, targetBidIdx):
+    """
+    Marginal local update of good targetBidIdx given the probabilities pwin 
+    of winning each good: the expected difference in revenue with the target 
+    good won and lost, the other goods won independently.
+    
+    bundleRevenueDict may be a revenue table indexed by bundle code 
+    (ssapy.util.revenueTable), a dict keyed by tuple(bundle) or a revenue object.
+    """
+    pwin = numpy.atleast_1d(pwin).astype(numpy.float64)
+    
+    if isRevenueFunction(bundleRevenueDict):
+        pwin = pwin.copy()
+        pwin[targetBidIdx] = 1.0
+        posRev = bundleRevenueDict.expectedRevenue(pwin)
+        pwin[targetBidIdx] = 0.0
+        negRev = bundleRevenueDict.expectedRevenue(pwin)
+        return posRev - negRev
+    
+    m     = pwin.shape[0]
+    bit   = goodBit(m, targetBidIdx)
+    codes = numpy.arange(2**m).astype(bit.dtype)
+    codes = codes[(codes & bit) == 0]
+    
+    p = margBundleProb(codes2bundles(codes, m), pwin, targetBidIdx)
+    
+    return numpy.dot(p, codeRevenue(bundleRevenueDict, codes | bit) -\
+                        codeRevenue(bundleRevenueDict, codes))
         
-def margLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol= 1e-5, verbose = True, ret = 'bids'):
+def margLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol= 1e-5, verbose = True, ret = 'bids', **kwargs):
     """
     Starting form an initial bid, run the margLocal algorithm and return 
     an updated bid vector.
@@ -152,7 +173,11 @@ def margLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol= 1e-5, v
     
     ret         := (string) If ret == 'bids' just return the new bid vector
                             Else if ret == 'all' return tuple:
-                            (bids, converged (boolean), nItr (int), dist (float)) 
+                            (bids, converged (boolean), nItr (int), dist (float))
+
+    kwargs      := damping, accel, memory, detectCycles, maxPeriod (see
+                    ssapy.strategies.localSearch); ret = 'trace' also returns
+                    the per iteration trace.
     OUTPUTS
     -------
     obids        := (1d array-like) A list of bids - one for each good.
@@ -165,192 +190,49 @@ def margLocal(bundles, revenue, initialBids, samples, maxItr = 100, tol= 1e-5, v
     l            := Euclidean distance between the last update step 
                     and the previous state of the bid vector.
     """
-    m = bundles.shape[1]
-    newBids = numpy.atleast_1d(initialBids).copy()
-    converged = False
+    def update(bids, gIdx):
+        return margLocalUpdate(bundles,revenue, bids, gIdx, samples, verbose)
     
-    for itr in range(maxItr):
-        oldBid = newBids.copy()
-        for gIdx in range(m):
-            newBids[gIdx] = margLocalUpdate(bundles,revenue, newBids, gIdx, samples, verbose)
-            
-        d = numpy.linalg.norm(oldBid-newBids)
-        
-        if d <= tol:
-            converged = True
-            break
-        
-    if ret == 'bids':
-        return newBids
-    else:
-        return newBids, converged, itr + 1, d
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
     
     
-def margLocalA(**kwargs):
+def margWinProb(pricePrediction, bids):
     """
-    Marg Local Analytic - computes probabilities analytically.
+    Marginal probability of winning each good with bids, P(price[i] <= bids[i]),
+    from the marginal cdf of a price prediction (jointGMM.margCdf or 
+    margDistSCPP.bidCdf).
     """
-    pricePrediction = kwargs.get('pricePrediction')
-    if pricePrediction == None:
-        raise KeyError("Must specify pricePrediction")
-    
-    bundles = kwargs.get('bundles')
-    if bundles == None:
-        raise KeyError("Must specify bundles")
-            
-    valuation = kwargs.get('valuation')
-    if valuation == None:
-        raise KeyError("Must specify valuation")
-    
-    
-    verboseOut = kwargs.get('verboseOut', False)
+    bids = numpy.atleast_1d(bids).astype(numpy.float64)
     
-    verbose  = kwargs.get('verbose', True)
-    
-    vis = kwargs.get('vis', False)
-    
-    n_itr = kwargs.get('n_itr',100)
+    if hasattr(pricePrediction, 'margCdf'):
+        return numpy.atleast_1d(pricePrediction.margCdf(bids, numpy.arange(bids.shape[0])))
+    elif hasattr(pricePrediction, 'bidCdf'):
+        return numpy.atleast_1d(pricePrediction.bidCdf(bids))
+    else:
+        raise ValueError("margWinProb(...) - pricePrediction has no marginal cdf (margCdf or bidCdf).")
+
+def margLocalA(bundles, revenue, initialBids, pricePrediction, maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids', **kwargs):
+    """
+    Marg Local Analytic - margLocal with the probabilities of winning each good 
+    taken from the marginal cdf of the price prediction (see margWinProb) 
+    instead of samples.
     
-    tol = kwargs.get('tol',1e-3)
+    INPUTS
+    ------
+    pricePrediction := jointGMM, margDistSCPP or any object with margCdf(x, margIdx)
+                       or bidCdf(bids).
     
-    initialBid = kwargs.get('initialBid')
-    if initialBid == None:
-        initSS = kwargs.get('initStrategy','straightMU8')
-        initialStrategy = initStrategies[initSS]
-#        bids = initialStrategy( pricePrediction = pricePrediction,
-#                                bundles         = bundles,
-#                                valuation       = valuation )
-        bids = initialStrategy( bundles, valuation, pricePrediction, verbose)
+    Other inputs and outputs as margLocal.
+    """
+    if isRevenueFunction(revenue):
+        bundleRevenueDict = revenue
     else:
-        bids = initialBid
-    
-    if verbose:
-        print('initial bid = {0}'.format(bids))
-
-    if isinstance(pricePrediction,margDistSCPP):
-        cdf = []
-        for hist,binEdges in pricePrediction.data:
-            p = hist / numpy.float(numpy.dot(hist, numpy.diff(binEdges)))
-            c = numpy.hstack((0,numpy.cumsum(p*numpy.diff(binEdges),dtype=numpy.float)))
-            f = interp1d(binEdges,c,'linear')
-            cdf.append(f)
-            
-    if vis or verboseOut:
-        bidList = [bids]
+        bundleRevenueDict = revenueTable(bundles, revenue)
     
-    converged = False
-    for itr in range(n_itr):
-        if verbose:
-            print('itr = {0}, bid = {0}'.format(itr, bids))
-
-        prevBid = bids.copy()
-        
-        for bidIdx in range(bids.shape[0]):
-            if verbose:
-                print('\tbidIdx = {0}'.format(bidIdx))
-            newBid = 0.0
-            
-            otherGoods = numpy.delete(numpy.arange(bids.shape[0]),bidIdx)
-            
-            for bundleIdx, bundle in enumerate(bundles):
-                val = valuation[bundleIdx]
-                
-                if verbose:
-                    print('\t\tbundle = {0}'.format(bundle))
-                    print('\t\tval = {0}'.format(val))
-
-                p = 1.0
-                
-                if isinstance(pricePrediction, jointGMM):
-                    for og in otherGoods:
-                        if bundle[og] == True:
-                            
-                            p *= pricePrediction.margCdf(x = bids[og], margIdx = og)
-                            if verbose:
-                                print('\t\t\t p*=cdf({0})'.format(bids[og]))
-                                print('\t\t\tp = {0}'.format(p))
-                        else:
-                            p *= (1- pricePrediction.margCdf(x = bids[og], margIdx = og))
-                            if verbose:
-                                print('\t\t\tp*=(1-cdf({0}))'.format(bids[og]))
-                                print('\t\t\tp = {0}'.format(p))
-
-                elif isinstance(pricePrediction, margDistSCPP):
-                    for og in otherGoods:
-                        if verbose:
-                            print('\t\t\tother good = {0}'.format(og))
-
-                        if bids[og] > pricePrediction.data[og][1][-1]:
-                            if verbose:
-                                print('\t\t\tbids[og] > pricePredicton.data[og][1][-1]')
-                            pass
-                            
-                        elif bids[og] < pricePrediction.data[og][1][0]:
-                            if verbose:
-                                print('\t\t\tbids[og] < pricePrediction.data[og][1][0]')
-                            p *= 1e-8
-                        elif bundle[og] == True:
-                            if verbose:
-                                print('\t\t\tbundle[og] == {0}'.format(bundle[og]))
-                                print('\t\t\tcdf = {0}'.format(cdf[og](bids[og])))
-                            p*=cdf[og](bids[og])
-                        else:    
-                            if verbose:
-                                print('\t\t\tbundle[og] == {0}'.format(bundle[og]))
-                                print('\t\t\t(1-cdf) = {0}'.format((1 - cdf[og](bids[og]))))
-                            p*=(1-cdf[og](bids[og]))
-                            
-                        if verbose:
-                            print('\t\t\tp = {0}'.format(p))
-
-                if bundle[bidIdx] == True:
-                    newBid += (val*p)
-                else:
-                    newBid -= (val*p)
-                    
-                if verbose:
-                    print('\t\tnewBid = {0}'.format(newBid))
-
-            bids[bidIdx] = newBid
-            
-            if verboseOut or vis:
-                bidList.append(bids)
-            
-        sse = numpy.dot(prevBid - bids, prevBid - bids)
-        
+    def update(bids, gIdx):
+        newBid = margLocalUpdateP(bundleRevenueDict, margWinProb(pricePrediction, bids), gIdx)
         if verbose:
-            print('')
-            print('Iteration = {0}'.format(itr))
-            print('prevBid   = {0}'.format(prevBid))
-            print('newBid    = {0}'.format(bids))
-            print('sse       = {0}'.format(sse))
-
-        if sse <= tol:
-            converged = True
-            if verbose:
-                print('sse = {0} < tol = {1}'.format(sse, tol))
-                print('converged = True')
-
-            break
-                
-            
-    if vis:
-        bidList = numpy.atleast_2d(bidList)
-        plt.plot(bidList[:-1,0],bidList[:-1,1],'bo-',markerfacecolor=None)
-        plt.plot(bidList[-1,0], bidList[-1,1],'ro')
-        plt.show()
-        
-        
-    if verboseOut:
-        return bids, bidList, converged
-    else:
-        return bids
-                            
-                        
-                
-                
-                
-        
+            print('\tNew bid = {0}'.format(newBid))
+        return newBid
     
-                       
-    
\ No newline at end of file
+    return localSearch(update, initialBids, maxItr, tol, ret, **kwargs)
@@ -0,0 +1,117 @@
+"""
+this is /ssapy/strategies/multiStart.py
+
+Run a local search strategy (jointLocal, condLocal, margLocal, ...) from
+several initial bids sharing one block of samples and keep the bid with the
+highest expected surplus on a separate set of evaluation samples.
+"""
+import numpy
+import multiprocessing
+
+from ssapy.strategies.strategyFactory import strategyFactory
+from ssapy.strategies.jointLocal import jointLocal, jointLocalMc
+from ssapy.strategies.condLocal import condLocal, condLocalLimit, condLocalZero,\
+    condLocalMc, condMVLocal
+from ssapy.strategies.margLocal import margLocal
+from ssapy.pricePrediction.jointGMM import expectedSurplus_
+from ssapy.util import revenueTable
+from ssapy.util.revenue import isRevenueFunction
+
+localStrategies = {'jointLocal'     : jointLocal,
+                   'jointLocalMc'   : jointLocalMc,
+                   'condLocal'      : condLocal,
+                   'condLocalLimit' : condLocalLimit,
+                   'condLocalZero'  : condLocalZero,
+                   'condLocalMc'    : condLocalMc,
+                   'condMVLocal'    : condMVLocal,
+                   'margLocal'      : margLocal}
+
+def multiStartWorker_(args):
+    localStrategy, bundles, revenue, initBids, samples, maxItr, tol = args
+
+    return localStrategy(bundles, revenue, initBids, samples,
+                         maxItr = maxItr, tol = tol, verbose = False, ret = 'bids')
+
+def multiStartLocal(bundles, revenue, pricePrediction, samples, evalSamples,
+                    localStrategy = 'jointLocal', seeds = ('straightMU8', 'targetPrice8'),
+                    nPerturb = 2, perturbScale = None, nProcs = 1,
+                    maxItr = 100, tol = 1e-5, verbose = False, ret = 'bids'):
+    """
+    INPUTS
+    ------
+    bundles         := (2d array-like) List of bundles (None for a revenue object)
+
+    revenue         := (1d array-like) List of revenue or a revenue function object
+
+    pricePrediction := price prediction used by the seed strategies
+
+    samples         := (2d array-like) samples shared by every local search run
+
+    evalSamples     := (2d array-like) held out samples the results are compared on
+
+    localStrategy   := (string or function) local search strategy, a key of
+                       localStrategies or any function with the signature of jointLocal
+
+    seeds           := (list) strategy names (see strategyFactory) and/or initial
+                       bid vectors to start from
+
+    nPerturb        := (int) additional starts from the first seed perturbed with
+                       gaussian noise of standard deviation perturbScale
+                       (default: the standard deviation of the samples per good)
+
+    nProcs          := (int) number of processes the runs are split among
+
+    ret             := 'bids' returns the best bid,
+                       'all' returns (bestBid, bestSurplus, bids, surplus) with the
+                       result and held out expected surplus of every start
+    """
+    samples     = numpy.atleast_2d(samples)
+    evalSamples = numpy.atleast_2d(evalSamples)
+
+    if isinstance(localStrategy, str):
+        try:
+            localStrategy = localStrategies[localStrategy]
+        except KeyError:
+            raise KeyError("multiStartLocal - Unknown local strategy {0}".format(localStrategy))
+
+    initBids = []
+    for seed in seeds:
+        if isinstance(seed, str):
+            initBids.append(numpy.atleast_1d(strategyFactory(seed)(bundles, revenue, pricePrediction)))
+        else:
+            initBids.append(numpy.atleast_1d(seed).astype(numpy.float64))
+
+    if perturbScale is None:
+        perturbScale = numpy.std(samples, 0)
+
+    for p in range(nPerturb):
+        initBids.append((initBids[0] + numpy.random.normal(0, 1, initBids[0].shape)*perturbScale).clip(0))
+
+    args = [(localStrategy, bundles, revenue, b, samples, maxItr, tol) for b in initBids]
+
+    if nProcs > 1 and len(args) > 1:
+        pool = multiprocessing.Pool(min(nProcs, len(args)))
+        bids = pool.map(multiStartWorker_, args)
+        pool.close()
+        pool.join()
+    else:
+        bids = [multiStartWorker_(a) for a in args]
+
+    bids = numpy.atleast_2d(bids)
+
+    revFnc = revenue if isRevenueFunction(revenue) else revenueTable(bundles, revenue)
+
+    surplus = numpy.asarray([expectedSurplus_(revFnc, b, evalSamples) for b in bids])
+
+    best = numpy.argmax(surplus)
+
+    if verbose:
+        for b0, b, es in zip(initBids, bids, surplus):
+            print('{0} -> {1}: expected surplus = {2}'.format(b0, b, es))
+
+    if ret == 'bids':
+        return bids[best]
+    elif ret == 'all':
+        return bids[best], surplus[best], bids, surplus
+    else:
+        raise ValueError("Unknown Return String {0}".format(ret))
@@ -15,15 +15,22 @@ import numpy
 from ssapy.util import marginalUtility
 
 def straightMV(bundles, revenue, pricePrediction, verbose = False):
-    b = numpy.atleast_2d(bundles)
-    rev = numpy.atleast_1d(revenue)
+    """
+    revenue may be a dense revenue vector (one entry per bundle) or an
+    implicit revenue function such as marketSchedule.scheduleRevenue,
+    in which case bundles is not used.
+    """
     pp = numpy.atleast_1d(pricePrediction)
     
-    n_goods = bundles.shape[1]
+    if not hasattr(revenue,'marginalUtility'):
+        bundles = numpy.atleast_2d(bundles)
+        revenue = numpy.atleast_1d(revenue)
+    
+    n_goods = pp.shape[0]
     marginalValueBid = numpy.zeros(n_goods,dtype=numpy.float64)
     for goodIdx in range(n_goods):
         marginalValueBid[goodIdx] = \
-                marginalUtility(b,rev,pp,goodIdx)
+                marginalUtility(bundles,revenue,pp,goodIdx)
                                  
     if verbose:
         print(marginalValueBid)
@@ -5,9 +5,9 @@ from .targetMU import targetMU8,targetMU64,targetMU256
 from .targetMV import targetMV
 from .targetMVS import targetMVS
 from .targetPrice import targetPrice8, targetPrice64, targetPrice256
-from .jointLocal import jointLocal, jointLocalMc
+from .jointLocal import jointLocal, jointLocalMc, jointLocalA
 from .condLocal import condLocal, condMVLocal
-from .margLocal import margLocal
+from .margLocal import margLocal, margLocalA
 
 def strategyFactory(ss = None):
     """
@@ -50,12 +50,16 @@ def strategyFactory(ss = None):
         return jointLocal
     elif ss == 'jointLocalMc':
         return jointLocalMc
+    elif ss == 'jointLocalA':
+        return jointLocalA
     elif ss == 'condLocal':
         return condLocal
     elif ss == 'condLocalGreater':
         return condMVLocal
     elif ss == 'margLocal':
         return margLocal
+    elif ss == 'margLocalA':
+        return margLocalA
     else:
         return ValueError('Unknown Strategy Type {0}.'.format(ss))
     
@@ -9,27 +9,26 @@ def targetMV(bundles, revenue, pricePrediction, verbose = False):
     2) for all goods in optimal bundle, bid marginal utility for that good.
     """
     
-    b = numpy.atleast_2d(bundles)
-    
-    rev = numpy.atleast_1d(revenue)
-    
     pp = numpy.atleast_1d(pricePrediction)
     
+    if not hasattr(revenue,'acq'):
+        bundles = numpy.atleast_2d(bundles)
+        revenue = numpy.atleast_1d(revenue)
     
-    [optBundle, optSurplus] = acq(b, rev, pp)
+    [optBundle, optSurplus] = acq(bundles, revenue, pp)
                                   
     
     if verbose:
         print("optBundle  = {0}".format(optBundle))
         print("optSurplus = {0}".format(optSurplus))
 
-    n_goods = bundles.shape[1]
+    n_goods = pp.shape[0]
     bid = numpy.zeros(n_goods, dtype = numpy.float)
     
     for goodIdx, good in enumerate(optBundle):
         if good:
-            bid[goodIdx] = marginalUtility(bundles, valuation, 
-                                           pricePrediction, goodIdx)
+            bid[goodIdx] = marginalUtility(bundles, revenue, 
+                                           pp, goodIdx)
             
     if verbose:
         print("bid = {0}".format(bid))
@@ -15,14 +15,17 @@ import numpy
 from ssapy.util import acq
 
 def targetPrice(bundles, revenue, pricePrediction, verbose = False):
-    bundleView  = numpy.atleast_2d(bundles)
-    revenueView = numpy.atleast_1d(revenue)
     ppView      = numpy.atleast_1d(pricePrediction)
     
     if verbose:
         print("Computing bid via targetPrice strategy.")
+        
+    # implicit revenue functions (e.g. scheduleRevenue) need no bundles
+    if not hasattr(revenue,'acq'):
+        bundles = numpy.atleast_2d(bundles)
+        revenue = numpy.atleast_1d(revenue)
 
-    optBundle = acq(bundleView, revenueView, ppView, verbose)[0]
+    optBundle = acq(bundles, revenue, ppView, verbose)[0]
 
     bid = ppView.copy()
     bid[~optBundle] = 0.0
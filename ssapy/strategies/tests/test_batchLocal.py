@@ -0,0 +1,53 @@
+import unittest
+import numpy
+
+from ssapy.strategies.batchLocal import jointLocalBatch, condLocalBatch, margLocalBatch
+from ssapy.strategies.jointLocal import jointLocal
+from ssapy.strategies.condLocal import condLocal
+from ssapy.strategies.margLocal import margLocal
+from ssapy import listBundles, msListRevenue, msRandomValueVector, msScheduleRevenue
+
+class test_batchLocal(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        self.m = 4
+        self.K = 8
+        self.bundles = listBundles(self.m)
+        
+        self.valuations = [msRandomValueVector(0, 50, self.m) for k in range(self.K)]
+        self.revenues = numpy.atleast_2d([msListRevenue(self.bundles, v, l) 
+                                          for v, l in self.valuations])
+        
+        self.samples  = numpy.random.rand(500,self.m)*50
+        self.initBids = numpy.random.rand(self.K,self.m)*50
+        
+    def test_jointLocalBatch(self):
+        bids, converged, nItr, d = jointLocalBatch(self.bundles, self.revenues, 
+                                                   self.initBids, self.samples, ret = 'all')
+        
+        for k in range(self.K):
+            b, c, n, dk = jointLocal(self.bundles, self.revenues[k], self.initBids[k], 
+                                     self.samples, ret = 'all')
+            numpy.testing.assert_allclose(bids[k], b)
+            self.assertEqual(converged[k], c)
+            self.assertEqual(nItr[k], n)
+            
+    def test_condLocalBatch(self):
+        bids = condLocalBatch(self.bundles, self.revenues, self.initBids, self.samples, 
+                              maxItr = 10, eps = 0.5)
+        
+        for k in range(self.K):
+            b = condLocal(self.bundles, self.revenues[k], self.initBids[k], 
+                          self.samples, maxItr = 10, eps = 0.5)
+            numpy.testing.assert_allclose(bids[k], b)
+            
+    def test_margLocalBatch(self):
+        bids = margLocalBatch(self.bundles, self.revenues, self.initBids, self.samples)
+        
+        for k, (v, l) in enumerate(self.valuations):
+            b = margLocal(None, msScheduleRevenue(v, l), self.initBids[k], 
+                          self.samples, verbose = False)
+            numpy.testing.assert_allclose(bids[k], b)
+            
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import numpy
+
+from ssapy.strategies.bruteForce import bruteForceS, bruteForceGridS
+from ssapy import listBundles, msListRevenue, msRandomValueVector, msScheduleRevenue
+
+class test_bruteForce(unittest.TestCase):
+    def test_bruteForceS(self):
+        """
+        The pruned search must find the bid of the exhaustive grid search.
+        """
+        numpy.random.seed(0)
+        for m in [1,2,3]:
+            v, l = msRandomValueVector(0, 50, m)
+            bundles = listBundles(m)
+            revenue = msListRevenue(bundles, v, l)
+            
+            bundleRevenueDict = dict((tuple(b),r) for b,r in zip(bundles,revenue))
+            
+            samples = numpy.round(numpy.random.rand(100,m)*40)/2
+            
+            bid, es = bruteForceGridS(bundleRevenueDict, samples, 0, 20, 1, 'all')
+            
+            pbid, pes = bruteForceS(bundleRevenueDict, samples, 0, 20, 1, 'all')
+            numpy.testing.assert_equal(pbid, bid)
+            numpy.testing.assert_allclose(pes, es)
+            
+            numpy.testing.assert_equal(bruteForceS(msScheduleRevenue(v, l), samples, 0, 20, 1, nProcs = 2), bid)
+            
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy
+
+from ssapy.strategies.coordAscent import coordAscentS
+from ssapy.pricePrediction.jointGMM import expectedSurplus_
+from ssapy import listBundles, msListRevenue, msRandomValueVector
+from ssapy.util import revenueTable
+
+class test_coordAscent(unittest.TestCase):
+    def test_expectedSurplus(self):
+        """
+        Same samples as test_jointGMM.test_expectedSurplus, v = [45,20], l = 1.
+        Bidding 30 for good 1 always wins it at an average price of 25,
+        good 2 adds nothing: bid = [30,0] with surplus 45 - 25 = 20.
+        """
+        samples = numpy.zeros((1000,2))
+        samples[:100,:] = numpy.asarray([20,15])
+        samples[100:500,:] = numpy.asarray([20,20])
+        samples[500:600,:] = numpy.asarray([30,15])
+        samples[600:,:] = numpy.asarray([30,20])
+        
+        bundles = listBundles(2)
+        revenue = msListRevenue(bundles, [45,20], 1)
+        
+        bundleRevenueDict = dict((tuple(b),r) for b,r in zip(bundles,revenue))
+        
+        bid, es, converged, nItr = coordAscentS(bundleRevenueDict, [25.,25.], samples, ret = 'all')
+        
+        self.assertTrue(converged)
+        numpy.testing.assert_allclose(es, expectedSurplus_(bundleRevenueDict, bid, samples))
+        numpy.testing.assert_allclose(es, 20.)
+        numpy.testing.assert_equal(bid, [30.,0.])
+        
+    def test_coordinateOptimal(self):
+        """
+        No single bid can be improved at the returned bids.
+        """
+        numpy.random.seed(0)
+        m = 3
+        bundles = listBundles(m)
+        
+        for trial in range(5):
+            v, l = msRandomValueVector(0, 50, m)
+            table = revenueTable(bundles, msListRevenue(bundles, v, l))
+            samples = numpy.round(numpy.random.rand(200,m)*50)
+            
+            bid, es, converged, nItr = coordAscentS(table, numpy.random.rand(m)*50, samples, ret = 'all')
+            
+            self.assertTrue(converged)
+            numpy.testing.assert_allclose(es, expectedSurplus_(table, bid, samples))
+            
+            for j in range(m):
+                for x in numpy.arange(-1,52,0.5):
+                    b = bid.copy()
+                    b[j] = x
+                    self.assertLessEqual(expectedSurplus_(table, b, samples), es + 1e-9)
+                    
+if __name__ == "__main__":
+    unittest.main()
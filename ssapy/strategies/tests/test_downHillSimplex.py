@@ -0,0 +1,41 @@
+import unittest
+import numpy
+
+from ssapy.strategies.downHillSimplex import downHillSS, NegExpectedSurplusSamples,\
+    negExpectedSurplusCache
+from ssapy.pricePrediction.jointGMM import expectedSurplus_
+from ssapy import msDictRevenue, msRandomValueVector
+
+class test_downHillSimplex(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        self.m = 3
+        v, l = msRandomValueVector(0, 50, self.m)
+        self.bundleRevenueDict = msDictRevenue(v, l)
+        self.samples = numpy.random.rand(500,self.m)*50
+        
+    def test_objective(self):
+        objective = negExpectedSurplusCache(self.bundleRevenueDict, self.samples, cacheSize = 2)
+        
+        for bid in numpy.random.rand(10,self.m)*50:
+            es = expectedSurplus_(self.bundleRevenueDict, bid, self.samples)
+            numpy.testing.assert_allclose(NegExpectedSurplusSamples(bid, self.bundleRevenueDict, self.samples), -es)
+            numpy.testing.assert_allclose(objective(bid), -es)
+            numpy.testing.assert_allclose(objective(bid), -es)
+            
+        self.assertEqual(objective.nCalls, 20)
+        self.assertEqual(objective.nHits, 10)
+        self.assertEqual(len(objective.cache), 2)
+        
+    def test_restarts(self):
+        initBid = numpy.random.rand(self.m)*50
+        
+        bid, negEs = downHillSS(self.bundleRevenueDict, initBid, self.samples, disp = False, ret = 2)
+        
+        rbid, rnegEs = downHillSS(self.bundleRevenueDict, initBid, self.samples, disp = False, ret = 2,
+                                  nRestarts = 3, nProcs = 2)
+        
+        self.assertLessEqual(rnegEs, negEs)
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy
+
+from ssapy.strategies.jointLocal import jointLocal, jointLocalA, jointLocalUpdate, jointLocalUpdateA,\
+    winProbCache
+from ssapy.pricePrediction.jointGMM import jointGMM
+from ssapy.util import listBundles, revenueTable
+from ssapy import msListRevenue
+
+class test_jointLocalA(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        # the first component puts visible mass below minPrice = 0
+        X = numpy.vstack((numpy.random.multivariate_normal([1,2,0.5], [[4,1,0],[1,4,1],[0,1,4]], 300),
+                          numpy.random.multivariate_normal([15,12,8], numpy.eye(3)*6, 300)))
+        
+        self.gmm = jointGMM(n_components = 2, random_state = 0)
+        self.gmm.fit(X)
+        
+        # the draws the jointLocal agent bids against
+        self.samples = self.gmm.sample(n_samples = 200000)
+        
+        self.bundles = listBundles(3)
+        self.revenue = msListRevenue(self.bundles, numpy.asarray([35., 25., 18.]), 2)
+        
+    def test_update(self):
+        """
+        The analytic update agrees with the sample estimate of the same probabilities.
+        """
+        table = revenueTable(self.bundles, self.revenue)
+        bids  = numpy.asarray([8., 6., 3.])
+        for j in range(3):
+            mc = jointLocalUpdate(self.bundles, self.revenue, bids, j, self.samples)
+            a  = jointLocalUpdateA(table, bids, j, self.gmm)
+            g  = jointLocalUpdateA(table, bids, j, self.gmm, method = 'genz')
+            self.assertAlmostEqual(a, mc, delta = 0.1)
+            self.assertAlmostEqual(a, g, delta = 0.02)
+        
+    def test_cache(self):
+        """
+        An update is looked up when the bids of the other goods are unchanged.
+        """
+        table = revenueTable(self.bundles, self.revenue)
+        bids  = numpy.asarray([8., 6., 3.])
+        cache = winProbCache(self.gmm, cacheSize = 2)
+        
+        a = jointLocalUpdateA(table, bids, 0, self.gmm, cache)
+        bids[0] = 20.0
+        self.assertEqual(jointLocalUpdateA(table, bids, 0, self.gmm, cache), a)
+        self.assertEqual(cache.nHits, 1)
+        
+        jointLocalUpdateA(table, bids, 1, self.gmm, cache)
+        jointLocalUpdateA(table, bids, 2, self.gmm, cache)
+        self.assertEqual(len(cache.cache), 2)
+        
+    def test_jointLocalA(self):
+        initBids = numpy.asarray([20., 20., 20.])
+        
+        bids, converged, itr, d = jointLocalA(self.bundles, self.revenue, initBids, self.gmm, ret = 'all')
+        self.assertTrue(converged)
+        numpy.testing.assert_array_equal(jointLocalA(self.bundles, self.revenue, initBids, self.gmm), bids)
+        
+        mcBids = jointLocal(self.bundles, self.revenue, initBids, self.samples)
+        numpy.testing.assert_allclose(bids, mcBids, atol = 0.1)
+        
+if __name__ == "__main__":
+    unittest.main()
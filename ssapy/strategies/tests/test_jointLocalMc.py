@@ -1,8 +1,10 @@
 import unittest
 import numpy
 
-from ssapy.strategies.jointLocal import jointLocalMc, jointLocalUpdateMc
-from ssapy import listBundles, msListRevenue
+from ssapy.strategies.jointLocal import jointLocalMc, jointLocalUpdateMc,\
+    jointLocalUpdateMcDict
+from ssapy import listBundles, msListRevenue, msRandomValueVector, msScheduleRevenue
+from ssapy.util import revenueTable
 
 class test_jointLocalMc(unittest.TestCase):
     def test_jointLocalMc1(self):
@@ -84,5 +86,27 @@ class test_jointLocalMc(unittest.TestCase):
         print(tol)
 
 
+    def test_jointLocalUpdateMcDict(self):
+        """
+        The update must not depend on the revenue representation.
+        """
+        numpy.random.seed(0)
+        m = 4
+        v, l = msRandomValueVector(0, 50, m)
+        bundles = listBundles(m)
+        revenue = msListRevenue(bundles, v, l)
+        
+        bundleRevenueDict = dict((tuple(b),r) for b,r in zip(bundles,revenue))
+        
+        samples = numpy.round(numpy.random.rand(500,m)*50)
+        bids    = numpy.round(numpy.random.rand(m)*50)
+        
+        for j in range(m):
+            muj = jointLocalUpdateMc(bundles, revenue, bids, j, samples)
+            
+            self.assertEqual(jointLocalUpdateMcDict(bundleRevenueDict, bids, j, samples), muj)
+            self.assertEqual(jointLocalUpdateMcDict(revenueTable(bundles, revenue), bids, j, samples), muj)
+            self.assertEqual(jointLocalUpdateMcDict(msScheduleRevenue(v, l), bids, j, samples), muj)
+            
 if __name__ == "__main__":
     unittest.main()  
\ No newline at end of file
@@ -0,0 +1,92 @@
+import unittest
+import numpy
+
+from ssapy.strategies.localSearch import localSearch
+from ssapy.strategies.jointLocal import jointLocal, jointLocalUpdate
+from ssapy import listBundles, msListRevenue
+
+class test_localSearch(unittest.TestCase):
+    def setUp(self):
+        # x <- A x + c, a slow linear contraction with fixed point x* = (I-A)^-1 c
+        self.A = numpy.asarray([[0.0, 0.9, 0.05],
+                                [0.9, 0.0, 0.05],
+                                [0.05, 0.05, 0.0]])
+        self.c = numpy.asarray([1.0, 2.0, 3.0])
+        self.xStar = numpy.linalg.solve(numpy.eye(3) - self.A, self.c)
+
+    def update(self, bids, gIdx):
+        return numpy.dot(self.A[gIdx], bids) + self.c[gIdx]
+
+    def test_jacobi(self):
+        for jacobi in [False, True]:
+            bids, converged, nItr, d = localSearch(self.update, numpy.zeros(3), maxItr = 1000,
+                                                   tol = 1e-10, ret = 'all', jacobi = jacobi)
+            self.assertTrue(converged)
+            numpy.testing.assert_allclose(bids, self.xStar, atol = 1e-8)
+
+    def test_accel(self):
+        """
+        Extrapolation converges to the same fixed point in fewer iterations.
+        (componentwise aitken only for the gauss-seidel sweeps, the jacobi
+        iteration matrix has eigenvalues of both signs)
+        """
+        for jacobi, accels in [(True, ['anderson']), (False, ['aitken', 'anderson'])]:
+            bids, converged, nItr, d, trace = localSearch(self.update, numpy.zeros(3), maxItr = 1000,
+                                                          tol = 1e-10, ret = 'trace', jacobi = jacobi)
+            self.assertTrue(converged)
+            self.assertEqual(len(trace['stepNorm']), nItr)
+            self.assertEqual(len(trace['time']), nItr)
+            self.assertEqual(trace['cycle'], 0)
+
+            for accel in accels:
+                b, c, n, d = localSearch(self.update, numpy.zeros(3), maxItr = 1000,
+                                         tol = 1e-10, ret = 'all', jacobi = jacobi, accel = accel)
+                self.assertTrue(c)
+                self.assertLess(n, nItr)
+                numpy.testing.assert_allclose(b, self.xStar, atol = 1e-6)
+
+        with self.assertRaises(ValueError):
+            localSearch(self.update, numpy.zeros(3), accel = 'newton')
+
+    def test_cycle(self):
+        """
+        Jacobi updates of bids that try to undercut each other oscillate
+        with period 2; damping removes the oscillation.
+        """
+        def update(bids, gIdx):
+            return 10.0 - bids[1 - gIdx]
+
+        bids, converged, nItr, d, trace = localSearch(update, [0.0, 0.0], maxItr = 100, ret = 'trace',
+                                                      jacobi = True, detectCycles = True)
+        self.assertFalse(converged)
+        self.assertEqual(trace['cycle'], 2)
+        self.assertEqual(nItr, 2)
+
+        bids, converged, nItr, d = localSearch(update, [0.0, 0.0], maxItr = 100, ret = 'all',
+                                               jacobi = True, damping = 0.5)
+        self.assertTrue(converged)
+        numpy.testing.assert_allclose(bids, [5.0, 5.0])
+
+    def test_jointLocalDefault(self):
+        """
+        The default options reproduce the plain Gauss-Seidel loop.
+        """
+        numpy.random.seed(0)
+        m = 3
+        bundles = listBundles(m)
+        revenue = msListRevenue(bundles, [30., 25., 20.], 2)
+        samples = numpy.random.rand(100, m)*40
+        initBids = numpy.random.rand(m)*40
+
+        bids = initBids.copy()
+        for itr in range(10):
+            old = bids.copy()
+            for gIdx in range(m):
+                bids[gIdx] = jointLocalUpdate(bundles, revenue, bids, gIdx, samples)
+            if numpy.linalg.norm(old - bids) <= 1e-5:
+                break
+
+        numpy.testing.assert_equal(jointLocal(bundles, revenue, initBids, samples, maxItr = 10), bids)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,22 @@
-import os
-import pickle
 import unittest
 import numpy
+import sklearn.mixture
 
 from ssapy import listBundles, msListRevenue, msRandomValueVector
-from ssapy.strategies.margLocal import margLocalA, margLocalUpdate, margLocal
+from ssapy.strategies.margLocal import margLocalA, margLocalUpdate, margLocal, margBundleProb
+from ssapy.pricePrediction.jointGMM import jointGMM
 
+class empiricalCdf(object):
+    """
+    Marginal cdf of a set of samples with the margDistSCPP bidCdf interface.
+    """
+    def __init__(self, samples):
+        self.samples = samples
+        
+    def bidCdf(self, bids):
+        return numpy.mean(self.samples <= bids, 0)
 
 class test_margLocalBid(unittest.TestCase):
-    def setUp(self):
-        self.ppFile = os.path.realpath("./jointGmmScppHob_straightMU8_m5_n8_00013.pkl")
-        with open(self.ppFile,'r') as f:
-            self.pp = pickle.load(f)
-            
     def test_margLocalUpdate1(self):
         """
         Updates computed by hand given:
@@ -92,15 +96,50 @@ class test_margLocalBid(unittest.TestCase):
         
        
         
-#    def test_vanillia(self):
-#        m = 5
-#        bundles = listBundles(m)
-#        v,l = msRandomValueVector(0, 50, m)
-#        revenue = msListRevenue(bundles, v, l)
-#        
-#        print margLocalA(bundles = bundles, valuation = revenue, pricePrediction = self.pp, verbose = True)
-
-
+    def test_margBundleProb(self):
+        bundles = listBundles(3)
+        pwin    = numpy.asarray([0.2, 1.0, 0.5])
+        
+        p = [numpy.prod([pw if b else 1 - pw for b, pw in zip(bundle, pwin)]) for bundle in bundles]
+        numpy.testing.assert_allclose(margBundleProb(bundles, pwin), p)
+        
+        p = [numpy.prod([pw if b else 1 - pw for b, pw in zip(bundle[1:], pwin[1:])]) for bundle in bundles]
+        numpy.testing.assert_allclose(margBundleProb(bundles, pwin, 0), p)
+        
+    def test_margLocalA(self):
+        """
+        With the empirical cdf of the samples of test_margLocalUpdate1 margLocalA 
+        reproduces margLocal, with a jointGMM it agrees with margLocal on many samples.
+        """
+        samples = numpy.zeros((1000,2))
+        samples[:100,:] = numpy.asarray([20,15])
+        samples[100:500,:] = numpy.asarray([20,20])
+        samples[500:600,:] = numpy.asarray([30,15])
+        samples[600:,:] = numpy.asarray([30,20])
+        
+        bundles = listBundles(2)
+        revenue = msListRevenue(bundles, [45,20], 1)
+        
+        bids, converged, itr, d = margLocalA(bundles, revenue, numpy.asarray([25.,25.]), 
+                                             empiricalCdf(samples), ret = 'all')
+        numpy.testing.assert_array_equal(bids, [45,0])
+        self.assertTrue(converged)
+        self.assertEqual(itr, 3)
+        
+        numpy.random.seed(0)
+        X = numpy.vstack((numpy.random.multivariate_normal([6,9,12], numpy.eye(3)*4, 300),
+                          numpy.random.multivariate_normal([15,12,8], numpy.eye(3)*6, 300)))
+        gmm = jointGMM(n_components = 2, random_state = 0)
+        gmm.fit(X)
+        
+        bundles = listBundles(3)
+        revenue = msListRevenue(bundles, numpy.asarray([35., 25., 18.]), 2)
+        initBids = numpy.asarray([20., 20., 20.])
+        
+        bids = margLocalA(bundles, revenue, initBids, gmm)
+        samples = sklearn.mixture.GaussianMixture.sample(gmm, 200000)[0]
+        mcBids = margLocal(bundles, revenue, initBids, samples, verbose = False)
+        numpy.testing.assert_allclose(bids, mcBids, atol = 0.2)
         
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy
+
+from ssapy.strategies.multiStart import multiStartLocal
+from ssapy.strategies.jointLocal import jointLocal
+from ssapy.pricePrediction.jointGMM import expectedSurplus_
+from ssapy import listBundles, msListRevenue, msScheduleRevenue, agentFactory
+from ssapy.util import revenueTable
+
+class samplePricePrediction(object):
+    """
+    Price prediction resampling a fixed set of price vectors.
+    """
+    def __init__(self, X):
+        self.X = X
+        
+    def sample(self, n_samples = 1):
+        return self.X[numpy.random.randint(0, self.X.shape[0], n_samples)]
+    
+class test_multiStart(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        self.m = 3
+        self.v = [40., 30., 10.]
+        self.l = 2
+        
+        X = numpy.vstack((numpy.random.normal(10,2,(100,self.m)),
+                          numpy.random.normal(25,3,(100,self.m))))
+        self.pricePrediction = samplePricePrediction(X)
+        
+        self.samples     = self.pricePrediction.sample(n_samples = 500)
+        self.evalSamples = self.pricePrediction.sample(n_samples = 500)
+        
+    def test_multiStartLocal(self):
+        bundles = listBundles(self.m)
+        revenue = msListRevenue(bundles, self.v, self.l)
+        initBids = numpy.asarray([20.,20.,20.])
+        
+        bid, es, bids, surplus = multiStartLocal(bundles, revenue, self.pricePrediction, 
+                                                 self.samples, self.evalSamples,
+                                                 seeds = [initBids, 'straightMU8'], 
+                                                 nPerturb = 2, ret = 'all')
+        
+        self.assertEqual(bids.shape, (4,self.m))
+        numpy.testing.assert_allclose(bids[0], jointLocal(bundles, revenue, initBids, self.samples))
+        
+        table = revenueTable(bundles, revenue)
+        for b, s in zip(bids, surplus):
+            numpy.testing.assert_allclose(s, expectedSurplus_(table, b, self.evalSamples))
+            
+        self.assertEqual(es, numpy.max(surplus))
+        numpy.testing.assert_equal(bid, bids[numpy.argmax(surplus)])
+        
+        # revenue objects, another local strategy and several processes
+        bid = multiStartLocal(None, msScheduleRevenue(self.v, self.l), self.pricePrediction, 
+                              self.samples, self.evalSamples, localStrategy = 'condMVLocal', 
+                              nProcs = 2)
+        self.assertEqual(bid.shape, (self.m,))
+        
+    def test_agent(self):
+        agent = agentFactory(agentType = 'msMultiStartLocal', v = self.v, l = self.l,
+                             pricePrediction = self.pricePrediction, nsamples = 200)
+        self.assertEqual(agent.bid().shape, (self.m,))
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -27,11 +27,8 @@ def listBundles(m = 5):
 def bundle2idx(bundle = None):
         numpy.testing.assert_(bundle.dtype == bool,
                               msg="bundle.dtype = {0} != bool".format(bundle.dtype))
-        idx = 0
-        for i in range(bundle.shape[0]):
-            idx = (2**((bundle.shape[0]-1)-i))*bundle[i]
-            
-        return idx
+        
+        return int(bundles2codes(bundle)[0])
     
 def idx2bundle(index, nGoods = 5):
     """Convert to decimal rather than enumerating power set
@@ -60,6 +57,134 @@ def idx2bundle(index, nGoods = 5):
         
     return numpy.atleast_1d(binList)
 
+def codeDtype(m):
+    """
+    Smallest unsigned integer dtype holding the code of a bundle of m goods.
+    """
+    if m <= 32:
+        return numpy.dtype(numpy.uint32)
+    elif m <= 64:
+        return numpy.dtype(numpy.uint64)
+    else:
+        raise ValueError("codeDtype(...) - m = {0} > 64 goods cannot be packed.".format(m))
+    
+def bundles2codes(bundles):
+    """
+    Pack bool bundles into integer bundle codes.
+    
+    Codes are big endian, the first good is the most significant bit,
+    so the code of a bundle is its row index in listBundles(m).
+    
+    Inputs
+    ------
+        bundles  := (2d array-like, shape = (n,m), dtype = bool) 
+                    or a single bundle (1d, shape = (m,))
+    
+    Returns
+    -------
+        codes    := (1d numpy array, shape = (n,), dtype = codeDtype(m))
+    """
+    bundles = numpy.atleast_2d(bundles)
+    m       = bundles.shape[1]
+    dtype   = codeDtype(m)
+    
+    weights = numpy.left_shift(numpy.ones(m, dtype = dtype), 
+                               numpy.arange(m-1,-1,-1).astype(dtype))
+    
+    # the bits are disjoint so the sum is exact
+    return numpy.sum(bundles.astype(dtype)*weights, 1, dtype = dtype)
+
+def codes2bundles(codes, m):
+    """
+    Inverse of bundles2codes(...), codes shape (n,) -> bundles shape (n,m), dtype bool
+    """
+    dtype = codeDtype(m)
+    codes = numpy.atleast_1d(codes).astype(dtype)
+    
+    shifts = numpy.arange(m-1,-1,-1).astype(dtype)
+    
+    return (numpy.right_shift(codes[:,None], shifts) & dtype.type(1)).astype(bool)
+
+def goodBit(m, goodIdx):
+    """
+    The bit of goodIdx in the code of a bundle of m goods,
+    codes | bit adds the good and codes & ~bit removes it.
+    """
+    dtype = codeDtype(m)
+    return numpy.left_shift(dtype.type(1), dtype.type(m - 1 - goodIdx))
+
+def wonCodes(samples, bids):
+    """
+    Codes of the bundles won when bidding bids against each row of samples,
+    i.e. bundles2codes(samples <= bids).
+    
+    bids may also be a 2d array of K bid vectors, shape (K,m), in which case
+    the codes for every bid vector against the same samples are returned, 
+    shape (K,nSamples).
+    """
+    samples = numpy.atleast_2d(samples)
+    bids    = numpy.asarray(bids)
+    
+    if bids.ndim < 2:
+        return bundles2codes(samples <= numpy.atleast_1d(bids))
+    
+    m     = bids.shape[1]
+    dtype = codeDtype(m)
+    
+    codes = numpy.zeros((bids.shape[0], samples.shape[0]), dtype = dtype)
+    for goodIdx in range(m):
+        won = samples[:,goodIdx][None,:] <= bids[:,goodIdx][:,None]
+        codes |= won.astype(dtype) << dtype.type(m - 1 - goodIdx)
+        
+    return codes
+
+_popcountTable = numpy.array([bin(i).count('1') for i in range(256)], dtype = numpy.uint8)
+
+def popcount(codes):
+    """
+    Number of goods in each bundle code, shape (n,) -> (n,)
+    """
+    codes = numpy.atleast_1d(codes).astype(numpy.uint64)
+    
+    nbytes = codes.view(numpy.uint8).reshape(codes.shape + (8,))
+    
+    return numpy.sum(_popcountTable[nbytes], -1, dtype = int)
+
+def revenueTable(bundles, revenue):
+    """
+    Dense revenue array indexed by bundle code, table[bundles2codes(b)] = revenue of b,
+    so revenue lookups for many bundles are array indexing.
+    
+    Inputs
+    ------
+        bundles  := (2d array-like) list of bundles
+        
+        revenue  := (1d array-like) revenue (1:1 correspondence with bundles)
+                    or a bundleRevenueDict keyed by tuple(bundle), in which 
+                    case bundles may be None.
+                    A 2d revenue array, shape (K, nBundles), holds K revenue
+                    functions over the same bundles.
+    
+    Returns
+    -------
+        table    := (numpy array, shape = (2^m,) or (K,2^m))
+    """
+    if isinstance(revenue, dict):
+        bundles = list(revenue.keys())
+        revenue = [revenue[b] for b in bundles]
+    
+    bundles = numpy.atleast_2d(bundles).astype(bool)
+    revenue = numpy.atleast_1d(revenue)
+    
+    if bundles.shape[0] != revenue.shape[-1]:
+        raise ValueError("revenueTable(...) - bundles.shape[0] = {0} != revenue.shape[-1] = {1}".\
+                         format(bundles.shape[0],revenue.shape[-1]))
+    
+    table = numpy.zeros(revenue.shape[:-1] + (2**bundles.shape[1],), dtype = revenue.dtype)
+    table[...,bundles2codes(bundles)] = revenue
+    
+    return table
+
 def cost(bundles, price):
     """Compute the price of a list of bundles given closing prices of each good
     
@@ -169,8 +294,15 @@ def acq(bundles, revenue, priceVector, verbose = False, ties = 'random'):
     Returns
     -------
         optimalBundle, optimalSurplus
+        
+    NOTE:
+        If revenue is an implicit revenue function with an acq(priceVector)
+        method (e.g. ssapy.agents.marketSchedule.scheduleRevenue) the optimal
+        bundle is computed by that method and bundles is ignored.
     
     """   
+    if hasattr(revenue,'acq'):
+        return revenue.acq(priceVector)
     
     b = numpy.atleast_2d(bundles)
          
@@ -236,7 +368,14 @@ def marginalUtility(bundles, revenue, priceVector, goodIdx):
     Returns
     -------
         marginal utility (float)
+        
+    NOTE:
+        Dispatches to revenue.marginalUtility(priceVector, goodIdx) for
+        implicit revenue functions (see acq).
     """
+    if hasattr(revenue,'marginalUtility'):
+        return revenue.marginalUtility(priceVector, goodIdx)
+    
 #        priceVector = numpy.atleast_1d(priceVector)
     priceVector = numpy.asarray(priceVector,dtype = numpy.float)
     
@@ -257,4 +396,71 @@ def marginalUtility(bundles, revenue, priceVector, goodIdx):
     if margUtil < 0:
         raise ValueError("simYW.marginalUtility(...) - Negative Marginal Utility (shouldn't happen).")
     
-    return margUtil
\ No newline at end of file
+    return margUtil
+
+
+def compactArray(x, dtype = None, scale = 1):
+    """
+    Store a simulation output (bids, hob, surplus, ...) in a compact dtype.
+    
+    Floating point dtypes (e.g. numpy.float32) are a plain cast.
+    Integer dtypes store numpy.rint(x*scale) and are only allowed when lossless,
+    i.e. every element of x*scale is an integer within the range of dtype;
+    use expandArray(x, scale) to recover the original values.
+    
+    INPUTS:
+        x             :=     (array-like) values to store
+        
+        dtype         :=     (numpy dtype or string) output dtype,
+                             None returns x unchanged
+                             
+        scale         :=     (float) multiplier applied before storing as integers
+                             e.g. scale = 100 stores prices in cents.
+    Returns
+    -------
+        numpy array with dtype = dtype
+    """
+    x = numpy.asarray(x)
+    
+    if dtype is None:
+        return x
+    
+    dtype = numpy.dtype(dtype)
+    
+    if dtype.kind == 'f':
+        return x.astype(dtype)
+    
+    elif dtype.kind in 'iu':
+        scaled = x*scale
+        
+        y = numpy.rint(scaled)
+        if numpy.any(y != scaled):
+            raise ValueError("compactArray(...) - values * scale are not integers, " +\
+                             "cannot store as {0} without loss.".format(dtype))
+        
+        info = numpy.iinfo(dtype)
+        if y.size and (y.min() < info.min or y.max() > info.max):
+            raise ValueError("compactArray(...) - values * scale out of range for {0}.".format(dtype))
+        
+        return y.astype(dtype)
+    
+    else:
+        raise ValueError("compactArray(...) - unsupported dtype {0}".format(dtype))
+    
+def expandArray(X, scale = 1):
+    """
+    Inverse of compactArray(...): return floating point values for a
+    (possibly scaled integer) array so it can be handed to a fitter.
+    
+    float32 and float64 arrays keep their dtype, integer arrays
+    are converted to float32 (exact for |X| < 2**24).
+    """
+    X = numpy.asarray(X)
+    
+    if X.dtype.kind != 'f':
+        X = X.astype(numpy.float32)
+        
+    if scale != 1:
+        X = X/X.dtype.type(scale)
+        
+    return X
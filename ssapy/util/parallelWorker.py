@@ -6,6 +6,7 @@ from ssapy.agents.bidEvaluator import bidEvaluatorSMU8, bidEvaluatorSMU64, bidEv
  
 #from aucSim.simultaneousAuction import *
 from ssapy.auctions.simultaneousAuction import simultaneousAuction 
+from ssapy.util import compactArray
 
 import numpy
 import multiprocessing
@@ -21,6 +22,11 @@ class parallelWorkerBase(object):
         self.vmin               = kwargs.get('vmin',0)
         self.vmax               = kwargs.get('vmax',50)
         
+        # dtype (and integer scale) of the returned surplus array,
+        # see ssapy.util.compactArray
+        self.dtype              = kwargs.get('dtype',numpy.float)
+        self.scale              = kwargs.get('scale',1)
+        
         numpy.testing.assert_('margDistPrediction' in kwargs,
                               msg="Must specify a margianl price prediction distribution.")
         
@@ -167,7 +173,7 @@ class pwEqVl(parallelWorkerBase):
             
             agentSurplus.append( auction.agentSurplus() )
             
-        return numpy.atleast_2d(agentSurplus).astype(numpy.float)
+        return compactArray(numpy.atleast_2d(agentSurplus), self.dtype, self.scale)
     
     
 class pwEqNgames(parallelWorkerBase):
@@ -200,7 +206,7 @@ class pwEqNgames(parallelWorkerBase):
             
             agentSurplus.append( auction.agentSurplus() )
             
-        return numpy.atleast_2d(agentSurplus).astype(numpy.float)  
+        return compactArray(numpy.atleast_2d(agentSurplus), self.dtype, self.scale)  
     
 class pwVarNgames(parallelWorkerBase):
     """
@@ -236,7 +242,7 @@ class pwVarNgames(parallelWorkerBase):
             
             agentSurplus.append( auction.agentSurplus() )
             
-        return numpy.atleast_2d(agentSurplus).astype(numpy.float) 
+        return compactArray(numpy.atleast_2d(agentSurplus), self.dtype, self.scale) 
         
         
     
@@ -253,7 +259,7 @@ def runParallelJob(**kwargs):
     pool = multiprocessing.Pool(processes = NUM_PROC)
 
     if isinstance(pw,pwEqVl) or isinstance(pw,pwEqNgames):
-        result = numpy.atleast_2d(pool.map(pw, xrange(0,NUM_PROC))).astype(kwargs.get('resultType',numpy.float))
+        result = numpy.atleast_2d(pool.map(pw, xrange(0,NUM_PROC))).astype(kwargs.get('resultType',pw.dtype))
     if isinstance(pw,pwVarNgames):
         # a list of number of games
         try:
@@ -261,7 +267,7 @@ def runParallelJob(**kwargs):
         except KeyError:
             raise KeyError('Must specify the number of games each auction will run with nGameList parameter')
         
-        result = numpy.atleast_2d(pool.map(pw, nGameList)).astype(kwargs.get('resultType',numpy.float)) 
+        result = numpy.atleast_2d(pool.map(pw, nGameList)).astype(kwargs.get('resultType',pw.dtype)) 
         
     return numpy.reshape( result,(result.shape[0]*result.shape[1],result.shape[2]) )    
             
@@ -0,0 +1,142 @@
+"""
+this is /ssapy/util/revenue.py
+
+Revenue function protocol.
+
+A revenue function maps a set of won goods to a revenue. Strategies
+historically take a (2^m x m) bool bundle matrix with a dense revenue vector
+(or a dict keyed by tuple(bundle)); revenue objects implement the same
+function without requiring the 2^m enumeration:
+
+    m                        - number of goods
+    evaluate(won)            - revenue for a batch of won sets, either a bool
+                               array shape (n,m) (or (m,)) or integer bundle
+                               codes shape (n,) (see ssapy.util.bundles2codes)
+    expectedRevenue(pwin)    - expected revenue when good i is won
+                               independently with probability pwin[i]
+    acq(priceVector)         - optimal bundle and surplus, as ssapy.util.acq
+    marginalUtility(priceVector, goodIdx)
+    revenue[tuple(bundle)]   - revenue of a single bundle, so a revenue object can
+                               be used wherever a bundleRevenueDict is expected
+
+revenueBase implements everything from evaluate(...) by enumerating bundles;
+implementations override what they can do without enumeration
+(see ssapy.agents.marketSchedule.scheduleRevenue).
+"""
+import numpy
+
+from ssapy.util import listBundles, acq, marginalUtility,\
+    bundles2codes, codes2bundles, revenueTable
+
+def isRevenueFunction(revenue):
+    """
+    True if revenue implements the revenue function protocol,
+    False for dense revenue vectors and dicts.
+    """
+    return hasattr(revenue,'evaluate')
+
+def asRevenue(bundles = None, revenue = None):
+    """
+    Return a revenue object for either form of revenue function:
+    revenue objects are returned as is, a dense revenue vector (with its bundles)
+    is wrapped in a denseRevenue.
+    """
+    if isRevenueFunction(revenue):
+        return revenue
+
+    return denseRevenue(bundles, revenue)
+
+class revenueBase(object):
+    """
+    Base class of revenue objects; subclasses must set self.m and implement
+    evaluateBundles(won) for a bool array of shape (n,m).
+    """
+    def evaluateBundles(self, won):
+        raise NotImplementedError
+
+    def evaluate(self, won):
+        won = numpy.asarray(won)
+
+        if won.dtype == bool:
+            return self.evaluateBundles(numpy.atleast_2d(won))
+
+        return self.evaluateBundles(codes2bundles(won, self.m))
+
+    def __getitem__(self, bundle):
+        return self.evaluate(numpy.atleast_1d(bundle).astype(bool))[0]
+
+    def expectedRevenue(self, pwin):
+        pwin = numpy.atleast_1d(pwin).astype(numpy.float64)
+
+        bundles = listBundles(self.m)
+        p = numpy.prod(numpy.where(bundles, pwin, 1.0 - pwin), 1)
+
+        return numpy.dot(p, self.evaluate(bundles))
+
+    def acq(self, priceVector):
+        bundles = listBundles(self.m)
+        return acq(bundles, self.evaluate(bundles), priceVector)
+
+    def marginalUtility(self, priceVector, goodIdx):
+        bundles = listBundles(self.m)
+        return marginalUtility(bundles, self.evaluate(bundles), priceVector, goodIdx)
+
+class denseRevenue(revenueBase):
+    """
+    Revenue function stored as a dense table with one entry per bundle.
+
+    bundles may be listed in any order, the table is indexed by bundle code.
+    """
+    def __init__(self, bundles, revenue):
+        self.table = revenueTable(bundles, revenue)
+        self.m     = self.table.shape[0].bit_length() - 1
+
+    def evaluateBundles(self, won):
+        return self.table[bundles2codes(won)]
+
+    def evaluate(self, won):
+        won = numpy.asarray(won)
+
+        if won.dtype == bool:
+            return self.table[bundles2codes(won)]
+
+        return self.table[numpy.atleast_1d(won)]
+
+def codeRevenue(revenue, codes):
+    """
+    Revenue of an array of bundle codes for a revenue object, a dense revenue
+    table indexed by code (see ssapy.util.revenueTable) or a bundleRevenueDict.
+    """
+    if isRevenueFunction(revenue):
+        return revenue.evaluate(codes)
+
+    if isinstance(revenue, dict):
+        revenue = revenueTable(None, revenue)
+
+    return numpy.asarray(revenue)[codes]
+
+def marginalRevenue(revenue, won, goodIdx):
+    """
+    For each row of won (bool, shape (n,m)) the revenue with goodIdx won
+    less the revenue with goodIdx lost.
+    """
+    won = numpy.atleast_2d(won).copy()
+
+    won[:,goodIdx] = True
+    posRev = revenue.evaluate(won)
+
+    won[:,goodIdx] = False
+    negRev = revenue.evaluate(won)
+
+    return posRev - negRev
+
+def bundleSum(revenue, goodIdx, contains = True):
+    """
+    Sum of revenue over all 2^(m-1) bundles which do (contains = True)
+    or do not contain goodIdx, via expectedRevenue(...) with every other
+    good won with probability 1/2.
+    """
+    pwin = numpy.ones(revenue.m)*0.5
+    pwin[goodIdx] = 1.0 if contains else 0.0
+
+    return (2.0**(revenue.m - 1))*revenue.expectedRevenue(pwin)
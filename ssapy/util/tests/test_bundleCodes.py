@@ -0,0 +1,52 @@
+import unittest
+import numpy
+
+from ssapy.util import listBundles, bundle2idx, idx2bundle, bundles2codes,\
+    codes2bundles, wonCodes, popcount, revenueTable
+from ssapy import msListRevenue
+
+class test_bundleCodes(unittest.TestCase):
+    def test_codes(self):
+        """
+        Bundle codes are the row index into listBundles(m).
+        """
+        for m in [1,3,6]:
+            bundles = listBundles(m)
+            codes = bundles2codes(bundles)
+            
+            numpy.testing.assert_equal(codes, numpy.arange(2**m))
+            numpy.testing.assert_equal(codes2bundles(codes, m), bundles)
+            numpy.testing.assert_equal(popcount(codes), numpy.sum(bundles,1))
+            
+            for idx, bundle in enumerate(bundles):
+                self.assertEqual(bundle2idx(bundle), idx)
+                numpy.testing.assert_equal(idx2bundle(idx, m), bundle)
+        
+        m = 64
+        bundles = numpy.random.rand(50,m) < 0.5
+        bundles[0,:] = True
+        codes = bundles2codes(bundles)
+        
+        self.assertEqual(codes.dtype, numpy.uint64)
+        numpy.testing.assert_equal(codes2bundles(codes, m), bundles)
+        numpy.testing.assert_equal(popcount(codes), numpy.sum(bundles,1))
+        
+    def test_revenueTable(self):
+        m = 3
+        bundles = listBundles(m)
+        revenue = msListRevenue(bundles, [20,15,5], 2)
+        
+        samples = numpy.random.rand(100,m)*20
+        bids    = numpy.asarray([10.,5.,15.])
+        
+        brd = dict((tuple(b),r) for b,r in zip(bundles,revenue))
+        
+        table = revenueTable(bundles[::-1], revenue[::-1])
+        
+        numpy.testing.assert_equal(table, revenue)
+        numpy.testing.assert_equal(revenueTable(None, brd), revenue)
+        numpy.testing.assert_equal(table[wonCodes(samples, bids)], 
+                                   [brd[tuple(s <= bids)] for s in samples])
+        
+if __name__ == "__main__":
+    unittest.main()